@@ -0,0 +1,8 @@
+# accounts/async_urls.py
+from django.urls import path
+from .async_views import SignupAsyncView, LoginAsyncView
+
+urlpatterns = [
+    path('signup', SignupAsyncView.as_view(), name='async-signup'),
+    path('login', LoginAsyncView.as_view(), name='async-login'),
+]
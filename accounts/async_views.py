@@ -0,0 +1,43 @@
+# accounts/async_views.py
+"""
+Native async signup and login, served under `/async/auth/`. Requests,
+responses and error bodies match the sync `signup` and `login` views;
+password hashing runs in the bounded pool from `accounts.passwords`.
+"""
+from rest_framework import serializers, status
+
+from utils.async_views import AsyncAPIView
+
+from .passwords import aauthenticate
+from .serializers import AsyncLoginSerializer, AsyncSignupRequestSerializer, CustomTokenObtainPairSerializer, SignupResponseSerializer
+
+
+# Signup
+class SignupAsyncView(AsyncAPIView):
+    authentication_class = None
+
+    async def post(self, request):
+        serializer = AsyncSignupRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = await serializer.acreate()
+        return self.render(SignupResponseSerializer(user).data, status=status.HTTP_201_CREATED)
+
+
+# Login
+class LoginAsyncView(AsyncAPIView):
+    authentication_class = None
+    token_serializer_class = CustomTokenObtainPairSerializer
+
+    async def post(self, request):
+        serializer = AsyncLoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = await aauthenticate(serializer.validated_data["email"], serializer.validated_data["password"])
+        if user is None:
+            raise serializers.ValidationError({"detail": "Invalid email or password"})
+
+        refresh = await self.token_serializer_class.aget_token(user)
+        return self.render({
+            "refresh": str(refresh),
+            "access": str(refresh.access_token),
+            **self.token_serializer_class.user_data(user),
+        })
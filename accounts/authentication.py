@@ -0,0 +1,145 @@
+# accounts/authentication.py
+"""
+JWT authentication without a user query per request.
+
+Access tokens issued by the login endpoint carry an `is_active` claim.
+For those, `StatelessJWTAuthentication` builds a `ClaimsUser` straight
+from the validated token. Tokens without the claim (issued before it
+existed, or minted elsewhere) fall back to the real `User`, served from a
+short-lived in-process cache so each process looks a user up at most
+once per `ACCOUNTS_USER_CACHE_TTL` seconds. The cache holds the
+`ACCOUNTS_USER_CACHE_SIZE` most recently used users; older ones are
+evicted.
+
+The cache is per process: `invalidate_cached_user` clears the local
+entry, other processes see the change once their entry expires.
+
+Async views call `aauthenticate`, which handles access tokens carrying
+the claim on the event loop and sends everything else (which may need
+the database) through the sync path in a thread.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import User
+
+
+IS_ACTIVE_CLAIM = "is_active"
+
+# User ID -> (expiry, user), least recently used first
+_cached_users = OrderedDict()
+_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, "ACCOUNTS_USER_CACHE_TTL", 60)
+
+
+def _max_size():
+    return getattr(settings, "ACCOUNTS_USER_CACHE_SIZE", 10000)
+
+
+def get_cached_user(user_id):
+    """Return the `User` for `user_id` (a UUID or its string), or None if it does not exist."""
+    key = str(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _cached_users.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _cached_users.move_to_end(key)
+                return entry[1]
+            del _cached_users[key]
+
+    user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is not None:
+        with _lock:
+            _cached_users[key] = (now + _ttl(), user)
+            _cached_users.move_to_end(key)
+            while len(_cached_users) > _max_size():
+                _cached_users.popitem(last=False)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    with _lock:
+        _cached_users.pop(str(user_id), None)
+
+
+def clear_user_cache():
+    with _lock:
+        _cached_users.clear()
+
+
+class ClaimsUser(TokenUser):
+    """A `TokenUser` whose `id` is a UUID, like `User.id`, so it can scope querysets directly."""
+
+    @cached_property
+    def id(self):
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+    @cached_property
+    def is_active(self):
+        return self.token.get(IS_ACTIVE_CLAIM, True)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in for `JWTAuthentication` on endpoints that only need
+    `request.user.id`. `request.user` is a `ClaimsUser` when the token
+    carries an `is_active` snapshot, otherwise a cached `User`.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation on password change compares against the stored hash.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        if IS_ACTIVE_CLAIM in validated_token:
+            user = ClaimsUser(validated_token)
+        else:
+            user = get_cached_user(user_id)
+            if user is None:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+    async def aauthenticate(self, request):
+        """`authenticate` for async views; same results and errors."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        if not api_settings.CHECK_REVOKE_TOKEN and AccessToken in api_settings.AUTH_TOKEN_CLASSES:
+            # Access tokens are verified without the database (they are
+            # never blacklisted), so with the claim present nothing blocks.
+            try:
+                token = AccessToken(raw_token)
+            except TokenError:
+                token = None
+            if token is not None and IS_ACTIVE_CLAIM in token:
+                return self.get_user(token), token
+
+        return await sync_to_async(self.authenticate)(request)
@@ -0,0 +1,21 @@
+import pytest
+from rest_framework.test import APIClient
+from accounts.blacklist import blacklist_filter
+
+
+# Measure the blacklist filter as deployed, behind a shared cache
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    settings.CACHE_SHARED = True
+
+
+@pytest.fixture(autouse=True)
+def reset_blacklist_filter():
+    blacklist_filter.reset()
+    yield
+    blacklist_filter.reset()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
@@ -0,0 +1,35 @@
+# accounts/benchmarks/test_bench_accounts.py
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+# Password hashing dominates these requests, so they run a quarter as many iterations.
+def auth_iterations(benchmark):
+    return max(benchmark.iterations // 4, 20)
+
+
+def test_signup(benchmark, benchmark_data, api_client):
+    def call(i):
+        return api_client.post(reverse("signup"), {
+            "email": f"signup{i}@example.com",
+            "username": f"signup{i}",
+            "first_name": "New",
+            "last_name": "User",
+            "password": "StrongPass@123",
+            "confirm_password": "StrongPass@123",
+        }, format="json")
+
+    benchmark("accounts.signup", call, iterations=auth_iterations(benchmark), expected_status=status.HTTP_201_CREATED)
+
+
+def test_login(benchmark, benchmark_data, api_client):
+    users = benchmark_data.users
+
+    def call(i):
+        return api_client.post(reverse("login"), {"email": users[i % len(users)].email, "password": benchmark_data.password}, format="json")
+
+    benchmark("accounts.login", call, iterations=auth_iterations(benchmark))
@@ -0,0 +1,167 @@
+# accounts/blacklist.py
+"""
+In-memory membership filter for blacklisted refresh-token JTIs.
+
+Every refresh-token verification used to look the JTI up in the
+`token_blacklist` tables. The Bloom filter answers "definitely not
+blacklisted" from memory, which is the answer for nearly every live
+token; only possible members are confirmed against the database, which
+stays the authority.
+
+Each process loads the filter on first use and then follows new
+`BlacklistedToken` rows at most every `TOKEN_BLACKLIST_SYNC_INTERVAL`
+seconds. Each sync re-reads the last `TOKEN_BLACKLIST_SYNC_OVERLAP` ids
+below the highest one seen, so a row whose id was allocated earlier but
+committed later is still picked up.
+
+Revocations must take effect everywhere at once, so a negative answer
+is only trusted while the blacklist version in the shared cache
+(`TOKEN_BLACKLIST_CACHE_ALIAS`) matches the one this filter was synced
+at. Every blacklisting bumps that version once it commits, and a
+process that sees a new version syncs before answering. Without a
+shared cache (see `utils.caches`) every check goes to the database.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from utils.caches import is_shared
+
+
+VERSION_KEY = "accounts:blacklist:version"
+
+
+def _cache_alias():
+    return getattr(settings, "TOKEN_BLACKLIST_CACHE_ALIAS", "default")
+
+
+def current_version():
+    return caches[_cache_alias()].get(VERSION_KEY)
+
+
+def bump_version():
+    cache = caches[_cache_alias()]
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        # Re-adding a key (a sync overlapping the previous one) must not count twice.
+        if key in self:
+            return
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    """
+    The per-process filter, the highest `BlacklistedToken.id` it has
+    seen and the shared blacklist version it was synced at. The filter is
+    rebuilt from the table when it fills past its capacity (it grows) and
+    after compaction (see `reset`).
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._watermark = 0
+        self._version = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _settings():
+        return (
+            getattr(settings, "TOKEN_BLACKLIST_FILTER_CAPACITY", 1_000_000),
+            getattr(settings, "TOKEN_BLACKLIST_FILTER_ERROR_RATE", 0.001),
+            getattr(settings, "TOKEN_BLACKLIST_SYNC_INTERVAL", 5),
+            getattr(settings, "TOKEN_BLACKLIST_SYNC_OVERLAP", 1000),
+        )
+
+    def _load(self, bloom, after=0):
+        rows = (
+            BlacklistedToken.objects.filter(id__gt=max(after, 0))
+            .order_by("id")
+            .values_list("id", "token__jti")
+            .iterator(chunk_size=10_000)
+        )
+        watermark = after
+        for row_id, jti in rows:
+            bloom.add(jti)
+            watermark = max(watermark, row_id)
+        return watermark
+
+    def _rebuild(self, capacity, error_rate):
+        total = BlacklistedToken.objects.count()
+        # Leave headroom so a busy process does not rebuild again right away.
+        bloom = BloomFilter(max(capacity, total * 2), error_rate)
+        self._watermark = self._load(bloom)
+        self._filter = bloom
+
+    def sync(self, force=False):
+        capacity, error_rate, interval, overlap = self._settings()
+        if not force and self._filter is not None and time.monotonic() - self._synced_at < interval:
+            return
+        with self._lock:
+            # Read the version before the rows, so a bump during the load triggers another sync.
+            version = current_version() if is_shared(_cache_alias()) else None
+            if self._filter is None or self._filter.count >= self._filter.capacity:
+                self._rebuild(capacity, error_rate)
+            else:
+                self._watermark = self._load(self._filter, after=self._watermark - overlap)
+            self._version = version
+            self._synced_at = time.monotonic()
+
+    def might_contain(self, jti):
+        """False means the JTI is certainly not blacklisted; True must be confirmed in the database."""
+        if not is_shared(_cache_alias()):
+            return True
+        self.sync()
+        if jti in self._filter:
+            return True
+        if current_version() != self._version:
+            self.sync(force=True)
+            return jti in self._filter
+        return False
+
+    def add(self, jti):
+        self.sync()
+        with self._lock:
+            self._filter.add(jti)
+        transaction.on_commit(bump_version)
+
+    def reset(self):
+        """Drop the filter; the next use rebuilds it from the table."""
+        with self._lock:
+            self._filter = None
+            self._watermark = 0
+
+
+blacklist_filter = BlacklistFilter()
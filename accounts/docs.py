@@ -1,10 +1,27 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.drainage import set_override
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample
 from .serializers import (
     SignupRequestSerializer,
     CustomTokenObtainPairSerializer,
+    SlidingLoginSerializer,
+    TokenRefreshRequestSerializer,
+    SlidingTokenRefreshSerializer,
     LogoutSerializer,
     UserProfileSerializer,
 )
+from .authentication import StatelessJWTAuthentication
+
+
+# ---------------- Authentication ----------------
+class StatelessJWTScheme(SimpleJWTScheme):
+    # Same bearer scheme as JWTAuthentication; only the user lookup differs.
+    target_class = "accounts.authentication.StatelessJWTAuthentication"
+
+
+# Both authenticators document the one "jwtAuth" scheme on purpose.
+set_override(StatelessJWTAuthentication, "suppress_collision_warning", True)
+
 
 # ---------------- Signup ----------------
 signup_schema = extend_schema(
@@ -68,11 +85,67 @@ login_schema = extend_schema(
     ],
 )
 
+# ---------------- Token refresh ----------------
+refresh_schema = extend_schema(
+    tags=["user"],
+    summary="Refresh tokens",
+    description=(
+        "Exchange a refresh token for a new access token without sending the password again. "
+        "The refresh token is rotated: the response carries a new one and the one sent is blacklisted, so each refresh token works once."
+    ),
+    request=TokenRefreshRequestSerializer,
+    responses={200: TokenRefreshRequestSerializer},
+    examples=[
+        OpenApiExample(
+            "Refresh Request Example",
+            value={"refresh": "string.jwt.refresh.token"},
+            request_only=True,
+        ),
+        OpenApiExample(
+            "Refresh Success Response",
+            value={"access": "string.jwt.token", "refresh": "string.jwt.refresh.token"},
+            response_only=True,
+        ),
+    ],
+)
+
+# ---------------- Sliding sessions ----------------
+sliding_login_schema = extend_schema(
+    tags=["user"],
+    summary="Login with a sliding token",
+    description=(
+        "Login with email and password to receive a single sliding `token`, used as the bearer token. "
+        "Renew it with the sliding refresh endpoint before it expires, until its refresh window ends."
+    ),
+    request=SlidingLoginSerializer,
+    responses={200: SlidingLoginSerializer},
+    examples=[
+        OpenApiExample(
+            "Sliding Login Success Response",
+            value={
+                "token": "string.jwt.token",
+                "id": "c9f2c7c0-1c8f-4c8f-9c3a-b63a5b62cafa",
+                "email": "user@example.com",
+                "message": "User logged in successfully",
+            },
+            response_only=True,
+        ),
+    ],
+)
+
+sliding_refresh_schema = extend_schema(
+    tags=["user"],
+    summary="Renew a sliding token",
+    description="Extend a sliding token's expiry without the password. Fails once the token's refresh window (`refresh_exp`) has passed.",
+    request=SlidingTokenRefreshSerializer,
+    responses={200: SlidingTokenRefreshSerializer},
+)
+
 # ---------------- Logout ----------------
 logout_schema = extend_schema(
     tags=["user"],
     summary="Logout user",
-    description="Logout user by blacklisting the refresh token.",
+    description="Logout user by blacklisting the refresh token, or the sliding `token` for sliding sessions.",
     request=LogoutSerializer,
     responses={200: {"example": {"message": "User logged out successfully"}}},
     examples=[
@@ -0,0 +1,42 @@
+# accounts/management/commands/compact_token_blacklist.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.blacklist import blacklist_filter
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh and sliding tokens in small batches. "
+        "Expired tokens are rejected on their exp claim, so their rows are no longer needed. "
+        "Run it on a schedule (e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tokens deleted per transaction.")
+
+    def handle(self, *args, batch_size=1000, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        cutoff = timezone.now()
+        outstanding = blacklisted = 0
+        while True:
+            # Found through the expires_at index (accounts migration 0003).
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=cutoff)
+                .order_by("expires_at")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        blacklist_filter.reset()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {outstanding} expired outstanding tokens and {blacklisted} blacklist entries."
+        ))
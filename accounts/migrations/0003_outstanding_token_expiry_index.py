@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the blacklist app's outstanding tokens by expiry, so
+    `compact_token_blacklist` finds each batch of expired rows without
+    scanning live ones. Token lifetimes differ (refresh and sliding), so
+    expired rows are not a prefix of the primary key.
+    """
+
+    dependencies = [
+        ('accounts', '0002_uuid7_ids'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX accounts_outstandingtoken_expires_at ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX accounts_outstandingtoken_expires_at',
+        ),
+    ]
@@ -1,32 +1,32 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
-import uuid
+
+from utils.ids import uuid7
 
 
 
 class UserManager(BaseUserManager):
-    def create_user(self, email, username, first_name, last_name, password=None):
+    def _create_user(self, email, username, first_name, last_name, password, **extra_fields):
         if not email:
             raise ValueError("Email is required")
         if not username:
             raise ValueError("Username is required")
         email = self.normalize_email(email)
-        user = self.model(email=email, username=username, first_name=first_name, last_name=last_name)
+        user = self.model(email=email, username=username, first_name=first_name, last_name=last_name, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
         return user
 
+    def create_user(self, email, username, first_name, last_name, password=None):
+        return self._create_user(email, username, first_name, last_name, password)
+
     def create_superuser(self, email, username, first_name, last_name, password):
-        user = self.create_user(email, username, first_name, last_name, password)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save(using=self._db)
-        return user
+        return self._create_user(email, username, first_name, last_name, password, is_staff=True, is_superuser=True)
 
 
 class User(AbstractBaseUser, PermissionsMixin):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=150, unique=True)
     first_name = models.CharField(max_length=150)
@@ -0,0 +1,82 @@
+# accounts/passwords.py
+"""
+Password hashing for the async views, off the event loop.
+
+Hashing a password costs hundreds of milliseconds of CPU by design; run
+on the event loop it would stall every other request the worker is
+serving, and Django's own async auth helpers still hash inline. The
+async views hand it to a dedicated thread pool instead.
+`PASSWORD_HASHING_WORKERS` bounds how many hashes run at once per
+process; further requests wait for a free worker without blocking the
+loop.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .models import User
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count() or 1
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+    return _executor
+
+
+async def run_hasher(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+async def amake_password(password):
+    return await run_hasher(make_password, password)
+
+
+async def acheck_password(user, password):
+    """
+    `user.check_password` for async code: the hash is verified in the
+    pool, and a hash stored with outdated parameters is upgraded and
+    saved through the async ORM.
+    """
+    upgraded = []
+
+    def setter(raw_password):
+        # Runs in the pool thread; only rehashes, the save happens below.
+        user.set_password(raw_password)
+        # Hash upgrades are not password changes.
+        user._password = None
+        upgraded.append(True)
+
+    valid = await run_hasher(check_password, password, user.password, setter)
+    if upgraded:
+        await user.asave(update_fields=["password"])
+    return valid
+
+
+async def aauthenticate(email, password):
+    """
+    The `ModelBackend.authenticate` rules for email/password logins:
+    returns the user when the password matches an active account,
+    otherwise None. Unknown emails still pay for one hash, so response
+    times do not reveal which accounts exist.
+    """
+    try:
+        user = await User.objects.aget_by_natural_key(email)
+    except User.DoesNotExist:
+        await amake_password(password)
+        return None
+    if await acheck_password(user, password) and user.is_active:
+        return user
+    return None
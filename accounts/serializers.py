@@ -1,32 +1,56 @@
 # accounts/serializers.py
+import contextlib
+
+from asgiref.sync import sync_to_async
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from .models import User
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import IS_ACTIVE_CLAIM
+from .passwords import amake_password
+from .tokens import FilteredRefreshToken, FilteredSlidingToken
+from rest_framework_simplejwt.serializers import (
+    PasswordField,
+    TokenObtainPairSerializer,
+    TokenObtainSlidingSerializer,
+    TokenRefreshSerializer,
+    TokenRefreshSlidingSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import AuthenticationFailed
 import re
 
 
 # Signup Serialzier
+PASSWORD_PATTERN_CHECKS = [
+    (re.compile(r'[A-Z]'), "Password must contain at least 1 uppercase letter."),
+    (re.compile(r'[a-z]'), "Password must contain at least 1 lowercase letter."),
+    (re.compile(r'\d'), "Password must contain at least 1 number."),
+    (re.compile(r'[\W_]'), "Password must contain at least 1 special character."),
+]
+
+
 class SignupRequestSerializer(serializers.ModelSerializer):
+    """
+    Email and username uniqueness is enforced by the unique constraints
+    rather than one `exists()` query per field: a signup is a single
+    INSERT, and only a rejected one queries which values were taken.
+    """
     confirm_password = serializers.CharField(write_only=True, required=True)
+    unique_fields = ('email', 'username')
 
     class Meta:
         model = User
         fields = ('email', 'username', 'first_name', 'last_name', 'password', 'confirm_password')
         extra_kwargs = {'password': {'write_only': True}}
 
-    # Field-level validation for email
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
-    # Field-level validation for username
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.unique_fields:
+            fields[name].validators = [v for v in fields[name].validators if not isinstance(v, UniqueValidator)]
+        return fields
 
     # Object-lev validation for password
     def validate(self, attrs):
@@ -46,15 +70,8 @@ class SignupRequestSerializer(serializers.ModelSerializer):
             errors['confirm_password'] = ["Passwords do not match"]
 
         # Custom Validators
-        pattern_checks = [
-            (r'.*[A-Z].*', "Password must contain at least 1 uppercase letter."),
-            (r'.*[a-z].*', "Password must contain at least 1 lowercase letter."),
-            (r'.*\d.*', "Password must contain at least 1 number."),
-            (r'.*[\W_].*', "Password must contain at least 1 special character."),
-        ]
-
-        for pattern, message in pattern_checks:
-            if not re.search(pattern, password):
+        for pattern, message in PASSWORD_PATTERN_CHECKS:
+            if not pattern.search(password):
                 errors.setdefault('password', []).append(message)
 
         if errors:
@@ -63,7 +80,62 @@ class SignupRequestSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
+        with self.reporting_duplicates(validated_data):
+            return User.objects.create_user(**validated_data)
+
+    @contextlib.contextmanager
+    def reporting_duplicates(self, data):
+        """
+        Run the user INSERT in a savepoint, so a rejected one leaves any
+        enclosing transaction usable, and turn a unique violation into
+        the field errors.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError:
+            self.raise_unique_errors(data, list(self.taken_values(data)))
+            raise
+
+    def taken_values(self, data):
+        """The unique-field values of existing users that clash with `data`, in one query."""
+        query = Q()
+        for name in self.unique_fields:
+            query |= Q(**{name: data[name]})
+        return User.objects.filter(query).values_list(*self.unique_fields)
+
+    def raise_unique_errors(self, data, taken):
+        errors = {
+            name: [self.unique_message(name)]
+            for index, name in enumerate(self.unique_fields)
+            if any(row[index] == data[name] for row in taken)
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    @staticmethod
+    def unique_message(name):
+        # The wording of the UniqueValidator messages these checks replace.
+        field = User._meta.get_field(name)
+        return field.error_messages['unique'] % {'model_name': User._meta.verbose_name, 'field_label': field.verbose_name}
+
+
+class AsyncSignupRequestSerializer(SignupRequestSerializer):
+    """Signup for the async view: `acreate` hashes the password off the event loop."""
+
+    async def acreate(self):
+        data = dict(self.validated_data)
+        password = data.pop('password')
+        user = User(**data)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = await amake_password(password)
+        # The async ORM cannot open the savepoint, so the INSERT is one sync call.
+        await sync_to_async(self.insert)(user)
+        return user
+
+    def insert(self, user):
+        with self.reporting_duplicates(self.validated_data):
+            user.save(force_insert=True)
 
 
 class SignupResponseSerializer(serializers.ModelSerializer):
@@ -81,8 +153,31 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'username', 'first_name', 'last_name')
 
 
-# Login serializer
-class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+# Login serializers
+class LoginResponseMixin:
+    """Shared by the password logins: 400 on bad credentials, user info in the response, `is_active` claim."""
+
+    @classmethod
+    def get_token(cls, user):
+        # Snapshot used by StatelessJWTAuthentication instead of a user lookup.
+        token = super().get_token(user)
+        token[IS_ACTIVE_CLAIM] = user.is_active
+        return token
+
+    @classmethod
+    async def aget_token(cls, user):
+        token = await cls.token_class.afor_user(user)
+        token[IS_ACTIVE_CLAIM] = user.is_active
+        return token
+
+    @staticmethod
+    def user_data(user):
+        return {
+            "id": str(user.id),
+            "email": user.email,
+            "message": "User logged in successfully"
+        }
+
     def validate(self, attrs):
         try:
             data = super().validate(attrs)
@@ -92,19 +187,59 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError({"detail": "Invalid email or password"})
 
         # Add extra user info
-        data.update({
-            "id": str(self.user.id),
-            "email": self.user.email,
-            "message": "User logged in successfully"
-        })
+        data.update(self.user_data(self.user))
         return data
 
 
+class CustomTokenObtainPairSerializer(LoginResponseMixin, TokenObtainPairSerializer):
+    token_class = FilteredRefreshToken
+
+
+class SlidingLoginSerializer(LoginResponseMixin, TokenObtainSlidingSerializer):
+    token_class = FilteredSlidingToken
+
+
+class AsyncLoginSerializer(serializers.Serializer):
+    """Credentials for the async login, checked by `accounts.passwords.aauthenticate`."""
+    email = serializers.CharField()
+    password = PasswordField()
+
+
+# Token refresh serializers
+class TokenRefreshRequestSerializer(TokenRefreshSerializer):
+    """Rotates the refresh token (when ROTATE_REFRESH_TOKENS is on) and blacklists the old one."""
+    token_class = FilteredRefreshToken
+    refresh = serializers.CharField(help_text="Refresh token from login or the previous refresh.")
+    access = serializers.CharField(read_only=True)
+
+
+class SlidingTokenRefreshSerializer(TokenRefreshSlidingSerializer):
+    token_class = FilteredSlidingToken
+    token = serializers.CharField(help_text="Sliding token that has not passed its refresh_exp yet.")
+
+    def validate(self, attrs):
+        token = self.token_class(attrs["token"])
+        token.check_exp(api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM)
+
+        # Same account check as refreshing a pair: a plain indexed lookup, no password hashing.
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed("No active account found for the given token.", "no_active_account")
+
+        token.set_exp()
+        token.set_iat()
+        return {"token": str(token)}
+
+
 
 
 # Logout Serializer
 class LogoutSerializer(serializers.Serializer):
     refresh = serializers.CharField(
-        required=True,
+        required=False,
         help_text="Refresh token to be blacklisted on logout",
+    )
+    token = serializers.CharField(
+        required=False,
+        help_text="Sliding token to be blacklisted on logout, for sessions started with the sliding login",
     )
\ No newline at end of file
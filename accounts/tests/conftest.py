@@ -2,6 +2,22 @@ import pytest
 from django.urls import reverse
 from rest_framework.test import APIClient
 from accounts.models import User
+from accounts.blacklist import blacklist_filter
+
+
+# The test run is one process, so its in-memory cache is shared by every "worker"
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    settings.CACHE_SHARED = True
+
+
+# Rebuild the blacklist filter from each test's own database state
+@pytest.fixture(autouse=True)
+def reset_blacklist_filter():
+    blacklist_filter.reset()
+    yield
+    blacklist_filter.reset()
+
 
 @pytest.fixture
 def api_client():
@@ -1,7 +1,28 @@
 # accounts/tests/test_accounts.py
+import io
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import clear_user_cache, get_cached_user, invalidate_cached_user
+from accounts import passwords
+from accounts import blacklist
+from accounts.blacklist import BloomFilter, blacklist_filter
+from accounts.models import User
+from accounts.tokens import FilteredRefreshToken, FilteredSlidingToken
 
 
 
@@ -25,6 +46,30 @@ def test_signup_success(api_client):
     assert response.data["email"] == "newuser@example.com"
 
 
+@pytest.mark.django_db
+def test_signup_is_one_insert_and_reports_duplicates(api_client, test_user):
+    data = {
+        "email": "newuser@example.com",
+        "username": "newuser",
+        "first_name": "New",
+        "last_name": "User",
+        "password": "StrongPass@123",
+        "confirm_password": "StrongPass@123"
+    }
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(reverse("signup"), data, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    user_queries = [query["sql"] for query in queries.captured_queries if '"accounts_user"' in query["sql"]]
+    assert len(user_queries) == 1 and user_queries[0].startswith("INSERT")
+
+    duplicate = api_client.post(reverse("signup"), {**data, "username": test_user.username}, format="json")
+    assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+    assert duplicate.data == {
+        "email": ["user with this email already exists."],
+        "username": ["user with this username already exists."],
+    }
+
+
 @pytest.mark.django_db
 def test_signup_invalid_password(api_client):
     url = reverse("signup")
@@ -144,4 +189,257 @@ def test_update_user_profile_missing_field(api_client, test_user, auth_token):
     api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
     data = {"first_name": "Updated"} 
     response = api_client.put(url, data, format="json")
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+# Stateless authentication
+def _user_queries(queries):
+    return [query for query in queries.captured_queries if '"accounts_user"' in query["sql"]]
+
+
+@pytest.mark.django_db
+def test_tracker_requests_skip_user_lookup(api_client, auth_token):
+    access_token, _ = auth_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse("income-list"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert _user_queries(queries) == []
+
+
+@pytest.mark.django_db
+def test_tokens_without_claims_use_cached_user(api_client, test_user):
+    clear_user_cache()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(test_user).access_token}")
+
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get(reverse("income-list"))
+        api_client.get(reverse("income-list"))
+    assert len(_user_queries(queries)) == 1
+
+    test_user.is_active = False
+    test_user.save()
+    invalidate_cached_user(test_user.id)
+    assert api_client.get(reverse("income-list")).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_user_cache_evicts_least_recently_used(test_user, settings):
+    other_user = User.objects.create_user(
+        email="other@example.com", username="otheruser", first_name="Other", last_name="User", password="StrongPass@123"
+    )
+    settings.ACCOUNTS_USER_CACHE_SIZE = 1
+    clear_user_cache()
+    get_cached_user(test_user.id)
+    get_cached_user(other_user.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        get_cached_user(other_user.id)
+        get_cached_user(test_user.id)
+    assert len(_user_queries(queries)) == 1
+
+
+@pytest.mark.django_db
+def test_profile_update_invalidates_cached_user(api_client, test_user, auth_token):
+    access_token, _ = auth_token
+    clear_user_cache()
+    get_cached_user(test_user.id)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+    api_client.put(
+        reverse("user-profile", kwargs={"userID": test_user.id}),
+        {"first_name": "Renamed", "last_name": "User", "username": "renamed", "email": test_user.email},
+        format="json",
+    )
+
+    assert get_cached_user(test_user.id).first_name == "Renamed"
+
+
+# Blacklist filter
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti-{index}" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.django_db
+def test_live_refresh_token_skips_blacklist_lookup(api_client, auth_token):
+    _, refresh_token = auth_token
+    blacklist_filter.sync(force=True)
+
+    with CaptureQueriesContext(connection) as queries:
+        FilteredRefreshToken(refresh_token)
+
+    assert not [query for query in queries.captured_queries if "token_blacklist" in query["sql"]]
+
+
+@pytest.mark.django_db
+def test_logged_out_refresh_token_is_rejected(api_client, auth_token):
+    access_token, refresh_token = auth_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+    assert api_client.post(reverse("logout"), {"refresh": refresh_token}, format="json").status_code == status.HTTP_200_OK
+    assert blacklist_filter.might_contain(FilteredRefreshToken(refresh_token, verify=False)["jti"])
+    again = api_client.post(reverse("logout"), {"refresh": refresh_token}, format="json")
+    assert again.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_revocation_elsewhere_is_seen_before_the_next_sync(test_user, settings):
+    settings.TOKEN_BLACKLIST_SYNC_INTERVAL = 3600
+    first, second = FilteredRefreshToken.for_user(test_user), FilteredRefreshToken.for_user(test_user)
+    blacklist_filter.sync(force=True)
+
+    # Another worker blacklists a token: the row lands, then the shared version moves.
+    BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=first["jti"]))
+    blacklist.bump_version()
+    assert blacklist_filter.might_contain(first["jti"])
+
+    # A row whose lower id commits after a higher one was synced is still picked up.
+    revoked = BlacklistedToken.objects.get().id
+    newer = OutstandingToken.objects.create(user=test_user, jti="newer", token="x", expires_at=timezone.now() + timedelta(hours=1))
+    BlacklistedToken.objects.create(id=revoked + 5, token=newer)
+    blacklist_filter.sync(force=True)
+    BlacklistedToken.objects.create(id=revoked + 2, token=OutstandingToken.objects.get(jti=second["jti"]))
+    blacklist_filter.sync(force=True)
+    assert blacklist_filter.might_contain(second["jti"])
+
+
+def test_blacklist_filter_is_bypassed_without_a_shared_cache(settings):
+    settings.CACHE_SHARED = False
+    assert blacklist_filter.might_contain("never-issued")
+
+
+@pytest.mark.django_db
+def test_compact_token_blacklist_removes_expired_tokens(test_user):
+    # A long-lived token issued first: expired rows are not a prefix of the IDs.
+    live = FilteredSlidingToken.for_user(test_user)
+    expired = timezone.now() - timedelta(hours=1)
+    for index in range(5):
+        token = OutstandingToken.objects.create(user=test_user, jti=f"old-{index}", token="x", expires_at=expired)
+        BlacklistedToken.objects.create(token=token)
+    refresh = FilteredRefreshToken.for_user(test_user)
+
+    call_command("compact_token_blacklist", batch_size=2, stdout=io.StringIO())
+
+    assert set(OutstandingToken.objects.values_list("jti", flat=True)) == {live["jti"], refresh["jti"]}
+    assert not BlacklistedToken.objects.exists()
+
+
+# Token refresh and sliding sessions
+@pytest.mark.django_db
+def test_refresh_rotates_without_password_check(api_client, auth_token):
+    _, refresh_token = auth_token
+
+    with patch.object(User, "check_password") as check_password:
+        response = api_client.post(reverse("token-refresh"), {"refresh": refresh_token}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert check_password.call_count == 0
+    assert response.data["refresh"] != refresh_token
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    assert api_client.get(reverse("income-list")).status_code == status.HTTP_200_OK
+
+    reused = APIClient().post(reverse("token-refresh"), {"refresh": refresh_token}, format="json")
+    assert reused.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_sliding_session_refresh_and_logout(api_client, test_user):
+    login = api_client.post(reverse("sliding-login"), {"email": test_user.email, "password": "StrongPass@123"}, format="json")
+    assert login.status_code == status.HTTP_200_OK
+    token = login.data["token"]
+
+    renewed = api_client.post(reverse("sliding-refresh"), {"token": token}, format="json")
+    assert renewed.status_code == status.HTTP_200_OK
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {renewed.data['token']}")
+    assert api_client.get(reverse("income-list")).status_code == status.HTTP_200_OK
+
+    assert api_client.post(reverse("logout"), {"token": renewed.data["token"]}, format="json").status_code == status.HTTP_200_OK
+    assert APIClient().post(reverse("sliding-refresh"), {"token": token}, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_compaction_keeps_revoked_sliding_tokens_until_refresh_exp(api_client, test_user):
+    login = api_client.post(reverse("sliding-login"), {"email": test_user.email, "password": "StrongPass@123"}, format="json")
+    token = api_client.post(reverse("sliding-refresh"), {"token": login.data["token"]}, format="json").data["token"]
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert api_client.post(reverse("logout"), {"token": token}, format="json").status_code == status.HTTP_200_OK
+
+    # Past the first `exp`, but the token could still be refreshed.
+    with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(hours=3)):
+        call_command("compact_token_blacklist", stdout=io.StringIO())
+
+    assert BlacklistedToken.objects.filter(token__jti=FilteredSlidingToken(token, verify=False)["jti"]).exists()
+    assert APIClient().post(reverse("sliding-refresh"), {"token": token}, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+    # Rows written with the plain `exp` are extended when the token is revoked.
+    legacy = FilteredSlidingToken.for_user(test_user)
+    OutstandingToken.objects.filter(jti=legacy["jti"]).update(expires_at=timezone.now())
+    legacy.blacklist()
+    assert OutstandingToken.objects.get(jti=legacy["jti"]).expires_at == legacy.outstanding_expiry()
+
+
+@pytest.mark.django_db
+def test_async_signup_and_login(api_client):
+    client = AsyncClient()
+    data = {
+        "email": "async@example.com",
+        "username": "asyncuser",
+        "first_name": "Async",
+        "last_name": "User",
+        "password": "StrongPass@123",
+        "confirm_password": "StrongPass@123",
+    }
+    signup = async_to_sync(client.post)(reverse("async-signup"), data, content_type="application/json")
+    assert signup.status_code == status.HTTP_201_CREATED
+    assert User.objects.get(id=signup.json()["id"]).check_password("StrongPass@123")
+
+    duplicate = async_to_sync(client.post)(reverse("async-signup"), data, content_type="application/json")
+    assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+    assert duplicate.json() == api_client.post(reverse("signup"), data, format="json").data
+
+    hashing_threads = []
+    check_password = passwords.check_password
+
+    def record_thread(*args):
+        hashing_threads.append(threading.current_thread().name)
+        return check_password(*args)
+
+    credentials = {"email": "async@example.com", "password": "StrongPass@123"}
+    with patch.object(passwords, "check_password", record_thread):
+        login = async_to_sync(client.post)(reverse("async-login"), credentials, content_type="application/json")
+    assert login.status_code == status.HTTP_200_OK
+    assert hashing_threads[0].startswith("password-hashing")
+    assert OutstandingToken.objects.filter(jti=RefreshToken(login.json()["refresh"])["jti"]).exists()
+
+    headers = {"Authorization": f"Bearer {login.json()['access']}"}
+    assert async_to_sync(client.get)(reverse("async-income-list"), headers=headers).status_code == status.HTTP_200_OK
+
+    wrong = async_to_sync(client.post)(reverse("async-login"), {**credentials, "password": "nope"}, content_type="application/json")
+    assert wrong.status_code == status.HTTP_400_BAD_REQUEST
+    assert wrong.json() == {"detail": "Invalid email or password"}
+
+
+@pytest.mark.django_db
+def test_async_writes_are_csrf_exempt(test_user):
+    client = AsyncClient(enforce_csrf_checks=True)
+
+    login = async_to_sync(client.post)(
+        reverse("async-login"), {"email": test_user.email, "password": "StrongPass@123"}, content_type="application/json",
+    )
+    assert login.status_code == status.HTTP_200_OK
+
+    headers = {"Authorization": f"Bearer {login.json()['access']}"}
+    created = async_to_sync(client.post)(
+        reverse("async-income-list"), {"nameOfRevenue": "Salary", "amount": "2500.00"}, content_type="application/json", headers=headers,
+    )
+    assert created.status_code == status.HTTP_201_CREATED
@@ -0,0 +1,80 @@
+# accounts/tokens.py
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken, SlidingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import blacklist_filter
+
+
+class FilteredBlacklistMixin:
+    """
+    Blacklist handling for refresh and sliding tokens. The check asks the
+    in-memory filter first and only queries the blacklist tables when it
+    reports a possible match. Blacklisting a token that is already
+    blacklisted fails, so two requests racing to rotate (or log out) the
+    same token cannot both succeed.
+
+    The outstanding-token row expires at `outstanding_expiry`, the last
+    moment the token can be used or refreshed, so `compact_token_blacklist`
+    never removes the blacklist entry of a token that still works.
+    """
+
+    def outstanding_expiry(self):
+        return datetime_from_epoch(self.payload["exp"])
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.might_contain(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        if not created:
+            raise TokenError(_("Token is blacklisted"))
+        # The row may have been written by BlacklistMixin with the `exp` claim.
+        expires_at = self.outstanding_expiry()
+        if blacklisted.token.expires_at < expires_at:
+            OutstandingToken.objects.filter(pk=blacklisted.token_id).update(expires_at=expires_at)
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted, created
+
+    @classmethod
+    def for_user(cls, user):
+        # Token.for_user, skipping BlacklistMixin.for_user, which records `exp` as the expiry.
+        token = super(BlacklistMixin, cls).for_user(user)
+        OutstandingToken.objects.create(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=token.outstanding_expiry(),
+        )
+        return token
+
+    @classmethod
+    async def afor_user(cls, user):
+        """`for_user` for async views: the outstanding-token row is written with the async ORM."""
+        token = super(BlacklistMixin, cls).for_user(user)
+        await OutstandingToken.objects.acreate(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=token.outstanding_expiry(),
+        )
+        return token
+
+
+class FilteredRefreshToken(FilteredBlacklistMixin, RefreshToken):
+    pass
+
+
+class FilteredSlidingToken(FilteredBlacklistMixin, SlidingToken):
+
+    def outstanding_expiry(self):
+        # Refreshing extends `exp` up to `refresh_exp`, keeping the jti.
+        refresh_exp = self.payload.get(api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM, self.payload["exp"])
+        return datetime_from_epoch(max(self.payload["exp"], refresh_exp))
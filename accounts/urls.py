@@ -1,10 +1,13 @@
 # accounts/urls.py
 from django.urls import path
-from .views import SignupView, LoginView, UserProfileView, LogoutView
+from .views import SignupView, LoginView, UserProfileView, LogoutView, TokenRefreshRequestView, SlidingLoginView, SlidingRefreshView
 
 urlpatterns = [
     path('signup', SignupView.as_view(), name='signup'),
     path('login', LoginView.as_view(), name='login'),
+    path('refresh', TokenRefreshRequestView.as_view(), name='token-refresh'),
+    path('sliding/login', SlidingLoginView.as_view(), name='sliding-login'),
+    path('sliding/refresh', SlidingRefreshView.as_view(), name='sliding-refresh'),
     path("logout", LogoutView.as_view(), name="logout"),
     path('user/<uuid:userID>/profile', UserProfileView.as_view(), name='user-profile'),
 ]
\ No newline at end of file
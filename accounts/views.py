@@ -3,18 +3,23 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import RetrieveUpdateAPIView
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenObtainSlidingView, TokenRefreshSlidingView, TokenRefreshView
+from rest_framework_simplejwt.tokens import TokenError
 
 from .serializers import (
     SignupRequestSerializer,
     CustomTokenObtainPairSerializer,
+    SlidingLoginSerializer,
+    TokenRefreshRequestSerializer,
+    SlidingTokenRefreshSerializer,
     LogoutSerializer,
     UserProfileSerializer,
     SignupResponseSerializer
 )
 from .models import User
-from .docs import signup_schema, login_schema, logout_schema, profile_schema
+from .authentication import invalidate_cached_user
+from .tokens import FilteredRefreshToken, FilteredSlidingToken
+from .docs import signup_schema, login_schema, logout_schema, profile_schema, refresh_schema, sliding_login_schema, sliding_refresh_schema
 
 
 
@@ -39,6 +44,26 @@ class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
 
 
+# Token refresh
+@refresh_schema
+class TokenRefreshRequestView(TokenRefreshView):
+    serializer_class = TokenRefreshRequestSerializer
+    permission_classes = [AllowAny]
+
+
+# Sliding sessions
+@sliding_login_schema
+class SlidingLoginView(TokenObtainSlidingView):
+    serializer_class = SlidingLoginSerializer
+    permission_classes = [AllowAny]
+
+
+@sliding_refresh_schema
+class SlidingRefreshView(TokenRefreshSlidingView):
+    serializer_class = SlidingTokenRefreshSerializer
+    permission_classes = [AllowAny]
+
+
 #Logout 
 @logout_schema
 class LogoutView(APIView):
@@ -47,11 +72,12 @@ class LogoutView(APIView):
 
     def post(self, request):
         refresh_token = request.data.get("refresh")
-        if not refresh_token:
+        sliding_token = request.data.get("token")
+        if not refresh_token and not sliding_token:
             return Response({"detail": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token) if refresh_token else FilteredSlidingToken(sliding_token)
             token.blacklist()
             return Response({"message": "User logged out successfully"}, status=status.HTTP_200_OK)
         except TokenError:
@@ -67,6 +93,10 @@ class UserProfileView(RetrieveUpdateAPIView):
     lookup_field = "id"
     lookup_url_kwarg = 'userID'
 
+    def perform_update(self, serializer):
+        user = serializer.save()
+        invalidate_cached_user(user.id)
+
     def get(self, request, *args, **kwargs):
         try:
             return self.retrieve(request, *args, **kwargs)
@@ -0,0 +1,150 @@
+import io
+import json
+import platform
+import random
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import django
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from tracker.models import Income, Expenditure
+from utils import benchmark as measurement
+
+
+RESULTS = pytest.StashKey[dict]()
+BASELINE = pytest.StashKey[dict]()
+
+
+# Benchmarks (`pytest -m benchmark`, see tracker/benchmarks and accounts/benchmarks)
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-users", type=int, default=50, help="Users seeded for the benchmarks.")
+    group.addoption("--benchmark-rows", type=int, default=200, help="Incomes and expenditures seeded per user.")
+    group.addoption("--benchmark-iterations", type=int, default=200, help="Timed requests per tracker case; auth cases run a quarter as many.")
+    group.addoption("--benchmark-json", metavar="PATH", help="Write the results to this JSON file.")
+    group.addoption("--benchmark-baseline", metavar="PATH", help="Fail cases that regressed against the results in this JSON file.")
+    group.addoption("--benchmark-threshold", type=float, default=0.25, help="Allowed latency and memory growth over the baseline, as a fraction.")
+
+
+def benchmark_environment(config):
+    return {
+        "users": config.getoption("benchmark_users"),
+        "rows_per_user": config.getoption("benchmark_rows"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+
+
+def load_baseline(config):
+    path = config.getoption("benchmark_baseline")
+    if not path:
+        return {}
+    with open(path) as stored:
+        baseline = json.load(stored)
+    current = benchmark_environment(config)
+    for key in ("users", "rows_per_user"):
+        if baseline["environment"][key] != current[key]:
+            raise pytest.UsageError(
+                f"The baseline was recorded with {key}={baseline['environment'][key]}, this run uses {current[key]}."
+            )
+    return baseline["results"]
+
+
+def pytest_configure(config):
+    config.stash[RESULTS] = {}
+    config.stash[BASELINE] = load_baseline(config)
+
+
+def pytest_sessionfinish(session):
+    results = session.config.stash.get(RESULTS, None)
+    path = session.config.getoption("benchmark_json")
+    if not results or not path:
+        return
+    with open(path, "w") as output:
+        json.dump({"environment": benchmark_environment(session.config), "results": results}, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(RESULTS, None)
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'case':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KiB':>10}")
+    for name, result in sorted(results.items()):
+        terminalreporter.write_line(
+            f"{name:<32}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}{result['queries']:>9}{result['peak_kib']:>10}"
+        )
+
+
+@pytest.fixture(scope="session")
+def benchmark_data(pytestconfig, django_db_setup, django_db_blocker):
+    """
+    Seed `--benchmark-users` users with `--benchmark-rows` incomes and
+    expenditures each, spread over the last 60 days, once per session.
+    Every user signs in with the returned `password`.
+    """
+    users = pytestconfig.getoption("benchmark_users")
+    rows = pytestconfig.getoption("benchmark_rows")
+    password = "StrongPass@123"
+    hashed = make_password(password)
+    categories = [choice for choice, _ in Expenditure.CATEGORY_CHOICES]
+    now = timezone.now()
+    generator = random.Random(0)
+
+    with django_db_blocker.unblock():
+        accounts = User.objects.bulk_create([
+            User(email=f"bench{n}@example.com", username=f"bench{n}", first_name="Bench", last_name=f"User {n}", password=hashed)
+            for n in range(users)
+        ])
+        incomes, expenditures = [], []
+        for user in accounts:
+            for n in range(rows):
+                created_at = now - timedelta(minutes=generator.randrange(60 * 24 * 60))
+                incomes.append(Income(user=user, nameOfRevenue=f"Invoice {n}", amount=Decimal(generator.randint(100, 500000)).scaleb(-2), created_at=created_at))
+                expenditures.append(Expenditure(
+                    user=user, category=generator.choice(categories), nameOfItem=f"Purchase {n}",
+                    amount=Decimal(generator.randint(100, 99999)).scaleb(-2), created_at=created_at,
+                ))
+        Income.objects.bulk_create(incomes, batch_size=2000)
+        Expenditure.objects.bulk_create(expenditures, batch_size=2000)
+        call_command("rebuild_rollups", stdout=io.StringIO())
+
+    return SimpleNamespace(
+        users=accounts,
+        password=password,
+        incomes=[incomes[n * rows:(n + 1) * rows] for n in range(users)],
+        expenditures=[expenditures[n * rows:(n + 1) * rows] for n in range(users)],
+    )
+
+
+@pytest.fixture
+def benchmark(pytestconfig):
+    """
+    `benchmark(name, call, iterations=None, expected_status=200)` measures
+    `call(i)` (see `utils.benchmark.measure`), records the result under
+    `name` and fails the test if it regressed against the baseline.
+    `benchmark.iterations` is the configured number of timed requests.
+    """
+    baseline = pytestconfig.stash[BASELINE]
+    threshold = pytestconfig.getoption("benchmark_threshold")
+
+    def run(name, call, iterations=None, expected_status=200):
+        result = measurement.measure(call, iterations or run.iterations, expected_status)
+        pytestconfig.stash[RESULTS][name] = result
+        if name in baseline:
+            found = measurement.regressions(result, baseline[name], threshold)
+            if found:
+                pytest.fail(f"{name} regressed: {'; '.join(found)}")
+        return result
+
+    run.iterations = pytestconfig.getoption("benchmark_iterations")
+    return run
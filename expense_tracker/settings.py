@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -80,10 +81,68 @@ WSGI_APPLICATION = 'expense_tracker.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# DATABASE_PROFILE=production tunes SQLite for concurrent requests:
+# - WAL lets readers run alongside the single writer; synchronous=NORMAL
+#   is durable in WAL mode except for the last commits on power loss.
+# - Write transactions take the write lock at BEGIN (IMMEDIATE) and wait up
+#   to `timeout` seconds (the busy timeout) for it, instead of failing with
+#   "database is locked" when a read transaction tries to upgrade.
+# - mmap and a larger page cache serve hot pages without read() calls.
+# - Connections are kept across requests (use DATABASE_CONN_MAX_AGE=0 under ASGI).
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'development')
+
+SQLITE_PRODUCTION_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': int(os.environ.get('DATABASE_BUSY_TIMEOUT', 20)),
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA cache_size=-32000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Read replicas for tracker reads (tracker.routers): DATABASE_REPLICAS is a
+# comma-separated list of database files kept in sync with the primary,
+# added as aliases replica1, replica2, ... Tests read them through the primary.
+# Replicas are only read from when the cache is shared (CACHE_SHARED below).
+TRACKER_REPLICA_DATABASES = []
+for number, name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': name.strip(), 'TEST': {'MIRROR': 'default'}}
+    TRACKER_REPLICA_DATABASES.append(alias)
+
+# Ledger shards (tracker.sharding): DATABASE_SHARDS is a comma-separated list
+# of database files added as aliases shard1, shard2, ... next to the default
+# database, which keeps the users and stays the first shard. Run
+# `manage.py migrate --database <alias>` for each, and `rebalance_shards`
+# after adding one.
+TRACKER_SHARDS = ['default']
+for number, name in enumerate(filter(None, os.environ.get('DATABASE_SHARDS', '').split(',')), start=1):
+    alias = f'shard{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': name.strip()}
+    TRACKER_SHARDS.append(alias)
+
+# Seconds a user's shard lookup is cached; also the rebalance grace period
+TRACKER_SHARD_CACHE_SECONDS = 10
+
+DATABASE_ROUTERS = ['tracker.routers.ShardRouter', 'tracker.routers.ReplicaRouter']
+
+# Seconds after a write during which that user's reads stay on the primary
+TRACKER_READ_YOUR_WRITES_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -152,8 +211,6 @@ SPECTACULAR_SETTINGS = {
 
 
 # Logging
-import os
-
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -181,15 +238,60 @@ LOGGING = {
     },
 }
 
+# Cache
+# Local development uses the in-process cache; point CACHE_BACKEND/CACHE_LOCATION
+# at a shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "expense-tracker"),
+    }
+}
+
+# Whether the caches above are shared by every worker process (utils.caches).
+# None detects it from the backend: the in-process locmem cache is not, so the
+# features that need a shared cache fall back or stay off with it. Set
+# CACHE_SHARED=1 when serving from a single process (e.g. runserver).
+CACHE_SHARED = {"1": True, "0": False}.get(os.environ.get("CACHE_SHARED", ""))
+
+# Seconds a cached tracker response is kept. Writes invalidate earlier than this.
+TRACKER_CACHE_TIMEOUT = 300
+
+# Days ledger rows stay in the hot tables before `archive_ledger` moves them (tracker.archive)
+TRACKER_ARCHIVE_AFTER_DAYS = 90
+
+# Seconds a process may reuse a looked-up user for JWTs without an is_active claim
+ACCOUNTS_USER_CACHE_TTL = 60
+# ... and how many such users it keeps, evicting the least recently used
+ACCOUNTS_USER_CACHE_SIZE = 10000
+
+# Threads per process hashing passwords for the async signup/login (None: one per CPU)
+PASSWORD_HASHING_WORKERS = None
+
+# In-memory filter of blacklisted refresh tokens (accounts.blacklist)
+TOKEN_BLACKLIST_FILTER_CAPACITY = 1_000_000
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5
+# Ids below the highest one seen that each sync reads again, for rows committed out of id order
+TOKEN_BLACKLIST_SYNC_OVERLAP = 1000
+# Cache holding the blacklist version every process checks before trusting the filter
+TOKEN_BLACKLIST_CACHE_ALIAS = "default"
+
 from datetime import timedelta
 
 # SIMPLE JWT SETTINGS
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=2),
     "REFRESH_TOKEN_LIFETIME": timedelta(hours=3),
-    "ROTATE_REFRESH_TOKENS": False,
+    "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": False,
+    "SLIDING_TOKEN_LIFETIME": timedelta(hours=2),
+    "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "AUTH_TOKEN_CLASSES": (
+        "rest_framework_simplejwt.tokens.AccessToken",
+        "accounts.tokens.FilteredSlidingToken",
+    ),
 }
 
 
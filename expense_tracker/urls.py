@@ -27,6 +27,10 @@ urlpatterns = [
     path('auth/', include("accounts.urls")),
     path('user/', include("tracker.urls")),
 
+    #  Native async variants (for ASGI deployments)
+    path('async/auth/', include("accounts.async_urls")),
+    path('async/user/', include("tracker.async_urls")),
+
     #  Schema & Swagger
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -1,6 +1,48 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_migrate
+
+
+def reinstall_search_triggers(sender, using="default", **kwargs):
+    # SQLite table rebuilds in later migrations drop the FTS triggers;
+    # put them back once the index itself has been created.
+    from django.db import connections
+    from . import search
+
+    if search.is_supported(using) and search.SEARCH_TABLE in connections[using].introspection.table_names():
+        search.install(using)
+
+
+def assign_shard(sender, instance, created, **kwargs):
+    # New users go to the shard their ID hashes to.
+    from . import sharding
+
+    if created and not kwargs.get("raw") and sharding.is_sharded():
+        sharding.assign(instance.id)
+
+
+def delete_sharded_ledger(sender, instance, **kwargs):
+    # The delete cascade only reaches rows on the default database.
+    from . import sharding
+
+    if sharding.is_sharded():
+        sharding.delete_user(instance.id)
+
+
+def drop_search_triggers(sender, using="default", plan=None, **kwargs):
+    # Put back by reinstall_search_triggers once the migrations are done.
+    from . import search
+
+    if plan:
+        search.drop_triggers(using)
 
 
 class TrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracker'
+
+    def ready(self):
+        pre_migrate.connect(drop_search_triggers, sender=self)
+        post_migrate.connect(reinstall_search_triggers, sender=self)
+        post_save.connect(assign_shard, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(delete_sharded_ledger, sender=settings.AUTH_USER_MODEL)
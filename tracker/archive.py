@@ -0,0 +1,146 @@
+# tracker/archive.py
+"""
+Hot/cold tiers for the ledger tables.
+
+`manage.py archive_ledger` moves income and expenditure rows created
+before a cutoff into `ArchivedIncome` / `ArchivedExpenditure`, which have
+the same columns but a single `(user, created_at)` index. The hot tables,
+with all their list and filter indexes, then only hold recent rows, so
+their size stays bounded by the archival window instead of growing
+forever.
+
+The cutoff of the latest run is kept in `ArchiveWatermark`. Reads stay
+transparent:
+
+- list, export and summary queries also read the archive only when their
+  `created_after` bound is missing or falls before the watermark
+  (`reaches_archive`), merging both tiers in the requested order;
+- retrieve falls back to the archive when the row is not hot;
+- a single-row write to an archived row restores it to the hot table
+  first (`restore`); bulk writes update or delete archived rows in place,
+  so a broad filter does not pull cold rows back into the hot table.
+
+The watermark is raised, and every process given time to see it, before
+any row moves, so a concurrent read never misses a row that is in
+transit. Rollups count both tiers, so archival
+leaves them untouched.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import cache, sharding
+from .models import Income, Expenditure, ArchivedIncome, ArchivedExpenditure, ArchiveWatermark
+
+
+ARCHIVES = {
+    Income: ArchivedIncome,
+    Expenditure: ArchivedExpenditure,
+}
+
+WATERMARK_KEY = "tracker:archive:watermark"
+
+# How long a process may use a cached watermark; `archive_ledger` waits
+# this long after raising it before moving rows.
+WATERMARK_CACHE_SECONDS = 60
+
+
+# ---------------- Watermark ----------------
+def _cached_watermark():
+    # Cached as a 1-tuple so "no archive yet" (None) is cached too.
+    return cache.get_cache().get(WATERMARK_KEY)
+
+
+def _cache_watermark(value):
+    cache.get_cache().set(WATERMARK_KEY, (value,), timeout=WATERMARK_CACHE_SECONDS)
+    return value
+
+
+def watermark():
+    """Rows created before this may be archived; None until the first archival."""
+    cached = _cached_watermark()
+    if cached is not None:
+        return cached[0]
+    value = ArchiveWatermark.objects.values_list("archived_before", flat=True).first()
+    return _cache_watermark(value)
+
+
+async def awatermark():
+    cached = _cached_watermark()
+    if cached is not None:
+        return cached[0]
+    value = await ArchiveWatermark.objects.values_list("archived_before", flat=True).afirst()
+    return _cache_watermark(value)
+
+
+def _reaches(value, filters):
+    return value is not None and ("created_after" not in filters or filters["created_after"] < value)
+
+
+def reaches_archive(filters):
+    """Whether a read with these `LedgerFilterSerializer` filters can match archived rows."""
+    return _reaches(watermark(), filters)
+
+
+async def areaches_archive(filters):
+    return _reaches(await awatermark(), filters)
+
+
+def raise_watermark(cutoff):
+    """Move the watermark up to `cutoff` (never down) and return it."""
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        current = ArchiveWatermark.objects.select_for_update().first()
+        if current is None:
+            current = ArchiveWatermark.objects.create(archived_before=cutoff)
+        elif cutoff > current.archived_before:
+            current.archived_before = cutoff
+            current.save(update_fields=["archived_before", "updated_at"])
+    return _cache_watermark(current.archived_before)
+
+
+# ---------------- Moving rows ----------------
+def _copy_sql(source, target):
+    columns = ", ".join(f'"{field.column}"' for field in target._meta.concrete_fields)
+    return (
+        f"INSERT INTO {target._meta.db_table} ({columns}) "
+        f"SELECT {columns} FROM {source._meta.db_table} WHERE id IN (%s)"
+    )
+
+
+def _move(source, target, ids, using):
+    """Copy rows to `target` with one INSERT ... SELECT and delete them from `source`, atomically."""
+    ids = [source._meta.pk.get_db_prep_value(pk, connections[using]) for pk in ids]
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(_copy_sql(source, target) % ", ".join(["%s"] * len(ids)), ids)
+        source.objects.using(using).filter(pk__in=ids).delete()
+
+
+def archive_before(cutoff, using=DEFAULT_DB_ALIAS, batch_size=1000, log=None):
+    """
+    Move every hot row created before `cutoff` on database `using` into
+    the archive, `batch_size` rows per transaction. Call
+    `raise_watermark(cutoff)` first. Returns `{model: rows moved}`.
+    """
+    log = log or (lambda message: None)
+    moved = {}
+    for model, archived in ARCHIVES.items():
+        moved[model] = 0
+        old = model.objects.using(using).filter(created_at__lt=cutoff).order_by("created_at", "id")
+        while True:
+            batch = list(old.values_list("id", flat=True)[:batch_size])
+            if not batch:
+                break
+            _move(model, archived, batch, using)
+            moved[model] += len(batch)
+            log(f"{using}: archived {moved[model]} {model._meta.verbose_name_plural}")
+    return moved
+
+
+def restore(model, user_id, pk):
+    """Move one archived row of the user back to the hot table; returns whether there was one."""
+    archived = ARCHIVES[model]
+    using = sharding.ledger_db()
+    if not archived.objects.using(using).filter(user_id=user_id, pk=pk).exists():
+        return False
+    _move(archived, model, [pk], using)
+    return True
+
@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import IncomeListAsyncView, IncomeDetailAsyncView, ExpenditureListAsyncView, ExpenditureDetailAsyncView
+
+urlpatterns = [
+    path('income', IncomeListAsyncView.as_view(), name='async-income-list'),
+    path('income/<str:incomeID>', IncomeDetailAsyncView.as_view(), name='async-income-detail'),
+    path('expenditure', ExpenditureListAsyncView.as_view(), name='async-expense-list'),
+    path('expenditure/<str:expenditureID>', ExpenditureDetailAsyncView.as_view(), name='async-expense-detail'),
+]
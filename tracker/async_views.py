@@ -0,0 +1,173 @@
+# tracker/async_views.py
+"""
+Native async versions of the income and expenditure CRUD routes, served
+under `/async/user/`.
+
+Reads use the async ORM and the same `RowEncoder` fast path as the sync
+viewsets, so the response bodies are identical. Writes reuse
+`LedgerWriteMixin`: a row and its `MonthlyRollup` change must commit in
+one transaction, which the async ORM cannot open, so each write runs as
+one `sync_to_async` call. Nothing here holds a thread while waiting on
+the client.
+
+Response caching and ETags are left to the sync routes.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.async_views import AsyncAPIView
+
+from . import archive, sharding
+from .encoders import row_encoder
+from .filters import apply_ledger_filters, plan_list_query
+from .mixins import LedgerWriteMixin, SparseFieldsMixin
+from .pagination import KeysetPagination
+from .serializers import ExpenditureSerializer, IncomeSerializer, ListQuerySerializer
+
+
+class LedgerAsyncView(AsyncAPIView):
+    """The parts of `GenericAPIView` the tracker mixins build on."""
+    serializer_class = None
+    lookup_url_kwarg = None
+    _shard_token = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._shard_token is not None:
+                sharding.deactivate(self._shard_token)
+                self._shard_token = None
+
+    async def initial(self, request):
+        # As `ShardMixin`; the placement lookup may query the default database.
+        await super().initial(request)
+        for_write = request.method not in SAFE_METHODS
+        if sharding.is_sharded():
+            alias = await sync_to_async(sharding.shard_for_user)(request.user.id, for_write=for_write)
+        else:
+            alias = sharding.shard_for_user(request.user.id, for_write=for_write)
+        self._shard_token = sharding.activate(alias)
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        return self.get_serializer_class()(*args, **kwargs)
+
+    def get_row_encoder(self):
+        return row_encoder(self.get_serializer_class())
+
+    def get_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.filter(user_id=self.request.user.id)
+
+    async def aget_archived_queryset(self, filters):
+        """As `ArchiveMixin.get_archived_queryset`."""
+        if not await archive.areaches_archive(filters):
+            return None
+        model = archive.ARCHIVES[self.get_serializer_class().Meta.model]
+        return model.objects.filter(user_id=self.request.user.id)
+
+    async def aget_object(self):
+        # An archived row is restored to the hot table first, as in `ArchiveMixin`.
+        queryset = self.get_queryset()
+        pk = self.kwargs[self.lookup_url_kwarg]
+        try:
+            try:
+                return await queryset.aget(id=pk)
+            except queryset.model.DoesNotExist:
+                if not await sync_to_async(archive.restore)(queryset.model, self.request.user.id, pk):
+                    raise
+                return await queryset.aget(id=pk)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+class LedgerListAsyncView(SparseFieldsMixin, LedgerWriteMixin, LedgerAsyncView):
+    pagination_class = KeysetPagination
+
+    async def get(self, request):
+        model = self.get_serializer_class().Meta.model
+        query = ListQuerySerializer(data=request.query_params, context={"model": model})
+        query.is_valid(raise_exception=True)
+        filters = dict(query.validated_data)
+        self.ordering = (filters.pop("ordering"),)
+        index = plan_list_query(model, filters, self.ordering[0])
+
+        encoder = self.get_row_encoder()
+        paginator = self.pagination_class()
+        ordering = [field.lstrip("-") for field in paginator.get_ordering(self)]
+        columns = encoder.columns_with(ordering)
+        queryset = apply_ledger_filters(self.get_queryset(), filters).values_list(*columns, named=True)
+        archived = await self.aget_archived_queryset(filters)
+        if archived is None:
+            page = await paginator.apaginate_queryset(queryset, request, view=self)
+        else:
+            archived = apply_ledger_filters(archived, filters).values_list(*columns, named=True)
+            page = await paginator.apaginate_querysets([queryset, archived], request, view=self)
+
+        response = self.json_response(paginator.get_paginated_content([encoder.encode_json(row) for row in page]))
+        response["X-Query-Index"] = index.name
+        return response
+
+    async def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(self.perform_create)(serializer)
+        return self.render(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class LedgerDetailAsyncView(SparseFieldsMixin, LedgerWriteMixin, LedgerAsyncView):
+
+    async def get(self, request, **kwargs):
+        encoder = self.get_row_encoder()
+        pk = self.kwargs[self.lookup_url_kwarg]
+        try:
+            row = await self.get_queryset().filter(id=pk).values_list(*encoder.columns).afirst()
+            archived = await self.aget_archived_queryset({}) if row is None else None
+            if archived is not None:
+                row = await archived.filter(id=pk).values_list(*encoder.columns).afirst()
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            raise Http404(f"No {self.get_serializer_class().Meta.model._meta.object_name} matches the given query.")
+        return self.json_response(encoder.encode_json(row).encode("utf-8"))
+
+    async def put(self, request, **kwargs):
+        return await self.update(request, partial=False)
+
+    async def patch(self, request, **kwargs):
+        return await self.update(request, partial=True)
+
+    async def update(self, request, partial):
+        serializer = self.get_serializer(await self.aget_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(self.perform_update)(serializer)
+        return self.render(serializer.data)
+
+    async def delete(self, request, **kwargs):
+        await sync_to_async(self.perform_destroy)(await self.aget_object())
+        return self.json_response(b"", status=status.HTTP_204_NO_CONTENT)
+
+
+# Income
+class IncomeListAsyncView(LedgerListAsyncView):
+    serializer_class = IncomeSerializer
+
+
+class IncomeDetailAsyncView(LedgerDetailAsyncView):
+    serializer_class = IncomeSerializer
+    lookup_url_kwarg = "incomeID"
+
+
+# Expenditure
+class ExpenditureListAsyncView(LedgerListAsyncView):
+    serializer_class = ExpenditureSerializer
+
+
+class ExpenditureDetailAsyncView(LedgerDetailAsyncView):
+    serializer_class = ExpenditureSerializer
+    lookup_url_kwarg = "expenditureID"
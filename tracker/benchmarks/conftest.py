@@ -0,0 +1,34 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.authentication import IS_ACTIVE_CLAIM
+
+
+# Serve every read from the database: the response cache would turn all
+# but the first request per user into a cache hit and hide the query path.
+# ETags stay on, as they are wherever the cache is shared.
+@pytest.fixture(autouse=True)
+def uncached_responses(settings):
+    settings.CACHE_SHARED = True
+    settings.TRACKER_CACHE_TIMEOUT = 0
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+# Authorization headers for the seeded users, in `benchmark_data.users` order,
+# with access tokens shaped like the ones the login endpoint issues
+@pytest.fixture(scope="session")
+def auth_headers(benchmark_data):
+    headers = []
+    for user in benchmark_data.users:
+        token = AccessToken.for_user(user)
+        token[IS_ACTIVE_CLAIM] = user.is_active
+        headers.append({"HTTP_AUTHORIZATION": f"Bearer {token}"})
+    return headers
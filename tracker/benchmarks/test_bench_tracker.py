@@ -0,0 +1,70 @@
+# tracker/benchmarks/test_bench_tracker.py
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+# Route basename, seeded rows attribute, detail URL kwarg, create payload
+RESOURCES = {
+    "income": ("incomes", "incomeID", {"nameOfRevenue": "Salary", "amount": "2500.00"}),
+    "expense": ("expenditures", "expenditureID", {"category": "FOOD", "nameOfItem": "Groceries", "amount": "42.50"}),
+}
+
+
+def pick(benchmark_data, resource, i):
+    """The i-th call's user index and one of their rows; distinct for every i below users x rows."""
+    rows = getattr(benchmark_data, RESOURCES[resource][0])
+    user = i % len(rows)
+    return user, rows[user][i // len(rows) % len(rows[user])]
+
+
+def detail_url(resource, row):
+    return reverse(f"{resource}-detail", kwargs={RESOURCES[resource][1]: row.id})
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_list(benchmark, benchmark_data, api_client, auth_headers, resource):
+    url = reverse(f"{resource}-list")
+    users = len(benchmark_data.users)
+    benchmark(f"tracker.{resource}.list", lambda i: api_client.get(url, **auth_headers[i % users]))
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_retrieve(benchmark, benchmark_data, api_client, auth_headers, resource):
+    def call(i):
+        user, row = pick(benchmark_data, resource, i)
+        return api_client.get(detail_url(resource, row), **auth_headers[user])
+
+    benchmark(f"tracker.{resource}.retrieve", call)
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_create(benchmark, benchmark_data, api_client, auth_headers, resource):
+    url = reverse(f"{resource}-list")
+    payload = RESOURCES[resource][2]
+    users = len(benchmark_data.users)
+    benchmark(
+        f"tracker.{resource}.create",
+        lambda i: api_client.post(url, payload, format="json", **auth_headers[i % users]),
+        expected_status=status.HTTP_201_CREATED,
+    )
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_update(benchmark, benchmark_data, api_client, auth_headers, resource):
+    def call(i):
+        user, row = pick(benchmark_data, resource, i)
+        return api_client.patch(detail_url(resource, row), {"amount": f"{i % 500 + 1}.25"}, format="json", **auth_headers[user])
+
+    benchmark(f"tracker.{resource}.update", call)
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_delete(benchmark, benchmark_data, api_client, auth_headers, resource):
+    def call(i):
+        user, row = pick(benchmark_data, resource, i)
+        return api_client.delete(detail_url(resource, row), **auth_headers[user])
+
+    benchmark(f"tracker.{resource}.delete", call, expected_status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,158 @@
+# tracker/cache.py
+"""
+Per-user response cache for the tracker read paths.
+
+Keys embed a per-user generation number. Every committed write bumps the
+generation, which orphans all of that user's cached responses at once
+without having to enumerate them; orphaned entries simply expire. The
+same generation doubles as the version behind the tracker ETags.
+
+Single-row saves and deletes bump it themselves (`LedgerEntry`); code
+that changes ledger rows with set-based ORM writes or raw SQL must call
+`invalidate_user` for each affected user.
+
+A generation in one worker's private cache would let other workers keep
+serving stale bodies and 304s, so the response cache and ETags are only
+`enabled` when `TRACKER_CACHE_ALIAS` is shared (see `utils.caches`).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from utils.caches import is_shared
+from . import sharding
+from .encoders import PrerenderedJSONResponse
+
+
+STATS_KEYS = ("hits", "misses")
+
+
+def cache_alias():
+    return getattr(settings, "TRACKER_CACHE_ALIAS", "default")
+
+
+def get_cache():
+    return caches[cache_alias()]
+
+
+def enabled():
+    """Whether responses may be cached and ETags issued (the cache is shared by all workers)."""
+    return is_shared(cache_alias())
+
+
+def _generation_key(user_id):
+    return f"tracker:generation:{user_id}"
+
+
+def get_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock rather than 0 so an evicted counter never
+        # reissues a generation that older cached entries were stored under.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_user(user_id):
+    """
+    Bump the user's generation once the current transaction commits, and
+    pin their reads to the primary database while replicas catch up.
+    """
+    def committed():
+        bump_generation(user_id)
+        pin_reads_to_primary(user_id)
+
+    transaction.on_commit(committed, using=sharding.ledger_db())
+
+
+def _pin_key(user_id):
+    return f"tracker:primary-reads:{user_id}"
+
+
+def pin_reads_to_primary(user_id):
+    window = getattr(settings, "TRACKER_READ_YOUR_WRITES_SECONDS", 5)
+    if window > 0:
+        get_cache().set(_pin_key(user_id), True, timeout=window)
+
+
+def reads_pinned_to_primary(user_id):
+    return get_cache().get(_pin_key(user_id), False)
+
+
+def response_key(request, scope):
+    digest = hashlib.md5(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return f"tracker:response:{request.user.id}:{get_generation(request.user.id)}:{scope}:{digest}"
+
+
+def etag_for(request, path=None):
+    """
+    Entity tag for `path` (default: the request path and query string)
+    as seen by the requesting user. It changes whenever any of the
+    user's rows change.
+    """
+    path = path or request.get_full_path()
+    digest = hashlib.md5(f"{get_generation(request.user.id)}:{path}".encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def _count(stat):
+    cache = get_cache()
+    key = f"tracker:stats:{stat}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    cache = get_cache()
+    values = cache.get_many([f"tracker:stats:{stat}" for stat in STATS_KEYS])
+    return {stat: values.get(f"tracker:stats:{stat}", 0) for stat in STATS_KEYS}
+
+
+def reset_stats():
+    get_cache().delete_many([f"tracker:stats:{stat}" for stat in STATS_KEYS])
+
+
+def cached_response(request, scope, build_response):
+    """
+    Serve `request` from the cache, or call `build_response()` and store
+    its data. Only 200 responses are stored. The outcome is reported in
+    the `X-Cache` header.
+    """
+    if not enabled():
+        return build_response()
+    cache = get_cache()
+    key = response_key(request, scope)
+    data = cache.get(key)
+    if data is not None:
+        _count("hits")
+        # Pre-rendered JSON bodies are stored as bytes and served as they are.
+        response = PrerenderedJSONResponse(data) if isinstance(data, bytes) else Response(data)
+        response["X-Cache"] = "HIT"
+        return response
+
+    _count("misses")
+    response = build_response()
+    if response.status_code == 200:
+        data = response.json_content if isinstance(response, PrerenderedJSONResponse) else response.data
+        cache.set(key, data, timeout=getattr(settings, "TRACKER_CACHE_TIMEOUT", 300))
+    response["X-Cache"] = "MISS"
+    return response
@@ -1,12 +1,40 @@
-from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample
-from .serializers import IncomeSerializer, ExpenditureSerializer
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiParameter
+from .serializers import (
+    IncomeSerializer,
+    ExpenditureSerializer,
+    BulkSelectionSerializer,
+    SummarySerializer,
+    StatementImportSerializer,
+    StatementImportReportSerializer,
+    SearchResultsSerializer,
+)
+
+
+def fields_parameter(serializer_class):
+    names = ", ".join(serializer_class.Meta.fields)
+    return OpenApiParameter(
+        "fields", str, description=f"Comma-separated fields to return (default all): {names}. Only those columns are read from the database."
+    )
+
 
 # ---------------- Income Schemas ----------------
 income_schemas = extend_schema_view(
     list=extend_schema(
         tags=["income"],
         summary="List incomes",
-        description="Retrieve a list of all income records for the authenticated user.",
+        description=(
+            "Retrieve the authenticated user's income records, newest first, one page at a time. Follow the `next` link to fetch the following page. "
+            "Only filter/ordering combinations backed by an index are accepted; the index used is returned in `X-Query-Index`."
+        ),
+        parameters=[
+            fields_parameter(IncomeSerializer),
+            OpenApiParameter("ordering", str, enum=["created_at", "-created_at", "amount", "-amount", "id", "-id"], description="Sort order. Defaults to -created_at; `id` follows creation order only for records created after the switch to UUIDv7 IDs."),
+            OpenApiParameter("created_after", str, description="Only include records created at or after this date/time."),
+            OpenApiParameter("created_before", str, description="Only include records created before this date/time."),
+            OpenApiParameter("min_amount", str, description="Only include records of at least this amount. Requires ordering by amount."),
+            OpenApiParameter("max_amount", str, description="Only include records of at most this amount. Requires ordering by amount."),
+        ],
         responses={200: IncomeSerializer(many=True)},
     ),
     create=extend_schema(
@@ -32,6 +60,7 @@ income_schemas = extend_schema_view(
         tags=["income"],
         summary="Retrieve an income",
         description="Retrieve a specific income record by ID.",
+        parameters=[fields_parameter(IncomeSerializer)],
         responses={200: IncomeSerializer},
     ),
     update=extend_schema(
@@ -72,6 +101,38 @@ income_schemas = extend_schema_view(
             ),
         ],
     ),
+    bulk_create=extend_schema(
+        tags=["income"],
+        summary="Add many incomes",
+        description="Create up to 5000 income records in a single transaction. Either every item is saved or, if any item is invalid, none are and the errors are returned per item index.",
+        request=IncomeSerializer(many=True),
+        responses={201: IncomeSerializer(many=True)},
+        examples=[
+            OpenApiExample(
+                "Bulk Create Income Request Example",
+                value={"amount": 2000, "nameOfRevenue": "Salary"},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Create Income Error Response",
+                value={"detail": "Some items are invalid.", "errors": [{"index": 1, "errors": {"nameOfRevenue": ["This field is required."]}}]},
+                response_only=True,
+                status_codes=["400"],
+            ),
+        ],
+    ),
+    export=extend_schema(
+        tags=["income"],
+        summary="Export incomes",
+        description="Stream every income record for the authenticated user, oldest first, as CSV or newline-delimited JSON. The download starts immediately and memory use does not grow with history length.",
+        parameters=[
+            fields_parameter(IncomeSerializer),
+            OpenApiParameter("fmt", str, OpenApiParameter.PATH, enum=["csv", "ndjson"], description="Export format."),
+            OpenApiParameter("created_after", str, description="Only include records created at or after this date/time."),
+            OpenApiParameter("created_before", str, description="Only include records created before this date/time."),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR, (200, "application/x-ndjson"): OpenApiTypes.STR},
+    ),
     destroy=extend_schema(
         tags=["income"],
         summary="Delete an income",
@@ -81,12 +142,72 @@ income_schemas = extend_schema_view(
 )
 
 
+# Bulk PATCH/DELETE are mapped onto the `bulk` action, so they are attached by apply_schemas.
+income_bulk_schemas = {
+    "bulk_update": extend_schema(
+        tags=["income"],
+        summary="Update many incomes",
+        description="Apply the same field changes to every selected income record in a single UPDATE. Select records with either a list of `ids` or a `filter`.",
+        request={"application/json": {"type": "object"}},
+        responses={200: {"example": {"updated": 2}}},
+        examples=[
+            OpenApiExample(
+                "Bulk Update Incomes By IDs Request Example",
+                value={"ids": ["c56a4180-65aa-42ec-a945-5fd21dac0538", "0b8f5c36-1f8a-4ad1-9c8e-5bb1a2a0e8f1"], "changes": {"nameOfRevenue": "Salary"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Update Incomes By Filter Request Example",
+                value={"filter": {"created_after": "2025-09-01", "created_before": "2025-10-01"}, "changes": {"nameOfRevenue": "Salary"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Update Incomes Success Response",
+                value={"updated": 2},
+                response_only=True,
+            ),
+        ],
+    ),
+    "bulk_destroy": extend_schema(
+        tags=["income"],
+        summary="Delete many incomes",
+        description="Delete every selected income record in a single DELETE. Select records with either a list of `ids` or a `filter`.",
+        request=BulkSelectionSerializer,
+        responses={200: {"example": {"deleted": 2}}},
+        examples=[
+            OpenApiExample(
+                "Bulk Delete Incomes Request Example",
+                value={"filter": {"created_after": "2025-09-01", "created_before": "2025-10-01"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Delete Incomes Success Response",
+                value={"deleted": 2},
+                response_only=True,
+            ),
+        ],
+    ),
+}
+
+
 # ---------------- Expenditure Schemas ----------------
 expenditure_schemas = extend_schema_view(
     list=extend_schema(
         tags=["expenditure"],
         summary="List expenditures",
-        description="Retrieve a list of all expenditure records for the authenticated user.",
+        description=(
+            "Retrieve the authenticated user's expenditure records, newest first, one page at a time. Follow the `next` link to fetch the following page. "
+            "Only filter/ordering combinations backed by an index are accepted; the index used is returned in `X-Query-Index`."
+        ),
+        parameters=[
+            fields_parameter(ExpenditureSerializer),
+            OpenApiParameter("ordering", str, enum=["created_at", "-created_at", "amount", "-amount", "id", "-id"], description="Sort order. Defaults to -created_at; `id` follows creation order only for records created after the switch to UUIDv7 IDs."),
+            OpenApiParameter("category", str, many=True, description="Only include these categories."),
+            OpenApiParameter("created_after", str, description="Only include records created at or after this date/time."),
+            OpenApiParameter("created_before", str, description="Only include records created before this date/time."),
+            OpenApiParameter("min_amount", str, description="Only include records of at least this amount. Requires ordering by amount."),
+            OpenApiParameter("max_amount", str, description="Only include records of at most this amount. Requires ordering by amount."),
+        ],
         responses={200: ExpenditureSerializer(many=True)},
     ),
     create=extend_schema(
@@ -112,6 +233,7 @@ expenditure_schemas = extend_schema_view(
         tags=["expenditure"],
         summary="Retrieve an expenditure",
         description="Retrieve a specific expenditure record by ID.",
+        parameters=[fields_parameter(ExpenditureSerializer)],
         responses={200: ExpenditureSerializer},
     ),
     update=extend_schema(
@@ -152,10 +274,184 @@ expenditure_schemas = extend_schema_view(
             ),
         ],
     ),
+    bulk_create=extend_schema(
+        tags=["expenditure"],
+        summary="Add many expenditures",
+        description="Create up to 5000 expenditure records in a single transaction. Either every item is saved or, if any item is invalid, none are and the errors are returned per item index.",
+        request=ExpenditureSerializer(many=True),
+        responses={201: ExpenditureSerializer(many=True)},
+        examples=[
+            OpenApiExample(
+                "Bulk Create Expenditure Request Example",
+                value={"amount": 500, "category": "FOOD", "nameOfItem": "Pizza"},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Create Expenditure Error Response",
+                value={"detail": "Some items are invalid.", "errors": [{"index": 1, "errors": {"category": ["\"BUS\" is not a valid choice."]}}]},
+                response_only=True,
+                status_codes=["400"],
+            ),
+        ],
+    ),
+    export=extend_schema(
+        tags=["expenditure"],
+        summary="Export expenditures",
+        description="Stream every expenditure record for the authenticated user, oldest first, as CSV or newline-delimited JSON. The download starts immediately and memory use does not grow with history length.",
+        parameters=[
+            fields_parameter(ExpenditureSerializer),
+            OpenApiParameter("fmt", str, OpenApiParameter.PATH, enum=["csv", "ndjson"], description="Export format."),
+            OpenApiParameter("created_after", str, description="Only include records created at or after this date/time."),
+            OpenApiParameter("created_before", str, description="Only include records created before this date/time."),
+            OpenApiParameter("category", str, many=True, description="Only include these categories."),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR, (200, "application/x-ndjson"): OpenApiTypes.STR},
+    ),
     destroy=extend_schema(
         tags=["expenditure"],
         summary="Delete an expenditure",
         description="Delete an existing expenditure record by ID.",
         responses={204: None},
     ),
-)
\ No newline at end of file
+)
+
+
+expenditure_bulk_schemas = {
+    "bulk_update": extend_schema(
+        tags=["expenditure"],
+        summary="Update many expenditures",
+        description="Apply the same field changes to every selected expenditure record in a single UPDATE. Select records with either a list of `ids` or a `filter`.",
+        request={"application/json": {"type": "object"}},
+        responses={200: {"example": {"updated": 2}}},
+        examples=[
+            OpenApiExample(
+                "Bulk Update Expenditures By IDs Request Example",
+                value={"ids": ["c56a4180-65aa-42ec-a945-5fd21dac0538", "0b8f5c36-1f8a-4ad1-9c8e-5bb1a2a0e8f1"], "changes": {"category": "TRANSPORT"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Update Expenditures By Filter Request Example",
+                value={"filter": {"category": ["OTHER"], "created_after": "2025-09-01", "created_before": "2025-10-01"}, "changes": {"category": "TRANSPORT"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Update Expenditures Success Response",
+                value={"updated": 2},
+                response_only=True,
+            ),
+        ],
+    ),
+    "bulk_destroy": extend_schema(
+        tags=["expenditure"],
+        summary="Delete many expenditures",
+        description="Delete every selected expenditure record in a single DELETE. Select records with either a list of `ids` or a `filter`.",
+        request=BulkSelectionSerializer,
+        responses={200: {"example": {"deleted": 2}}},
+        examples=[
+            OpenApiExample(
+                "Bulk Delete Expenditures Request Example",
+                value={"filter": {"category": ["OTHER"], "created_after": "2025-09-01", "created_before": "2025-10-01"}},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Bulk Delete Expenditures Success Response",
+                value={"deleted": 2},
+                response_only=True,
+            ),
+        ],
+    ),
+}
+
+
+# ---------------- Summary Schema ----------------
+summary_schema = extend_schema(
+    tags=["summary"],
+    summary="Ledger summary",
+    description="Totals, counts and net balance per day, week or month, plus expenditure totals per category. Computed in the database for the authenticated user.",
+    parameters=[
+        OpenApiParameter("period", str, enum=["day", "week", "month"], description="Bucket size. Defaults to month."),
+        OpenApiParameter("created_after", str, description="Only include records created at or after this date/time."),
+        OpenApiParameter("created_before", str, description="Only include records created before this date/time."),
+        OpenApiParameter("category", str, many=True, description="Only include expenditures in these categories."),
+    ],
+    responses={200: SummarySerializer},
+    examples=[
+        OpenApiExample(
+            "Summary Success Response",
+            value={
+                "period": "month",
+                "totals": {"income": "2000.00", "expenditure": "500.00", "net": "1500.00", "income_count": 1, "expenditure_count": 2},
+                "periods": [
+                    {"period": "2025-09-01", "income": "2000.00", "expenditure": "500.00", "net": "1500.00", "income_count": 1, "expenditure_count": 2},
+                ],
+                "categories": [
+                    {"category": "FOOD", "total": "300.00", "count": 1},
+                    {"category": "TRANSPORT", "total": "200.00", "count": 1},
+                ],
+            },
+            response_only=True,
+        ),
+    ],
+)
+
+
+# ---------------- Import Schema ----------------
+import_schema = extend_schema(
+    tags=["import"],
+    summary="Import a bank statement",
+    description=(
+        "Upload a CSV or OFX statement as multipart `file`. CSV needs a header with `date`, `description` and `amount` "
+        "(optional `category` and `type`). Negative amounts become expenditures and positive amounts become incomes. "
+        "Valid rows are inserted in batches. Invalid rows are skipped and reported (the first 100 are listed)."
+    ),
+    request={"multipart/form-data": StatementImportSerializer},
+    responses={201: StatementImportReportSerializer},
+    examples=[
+        OpenApiExample(
+            "Import Success Response",
+            value={
+                "rows": 3,
+                "imported": {"income": 1, "expenditure": 1},
+                "rejected": 1,
+                "errors": [{"row": 4, "errors": {"category": ['"PETS" is not a valid choice.']}}],
+            },
+            response_only=True,
+        ),
+    ],
+)
+
+
+# ---------------- Search Schema ----------------
+search_schema = extend_schema(
+    tags=["search"],
+    summary="Search incomes and expenditures by name",
+    description=(
+        "Full-text search over `nameOfRevenue` and `nameOfItem` for the authenticated user. Every word must match the start of a word "
+        "in the name (`rent mar` finds \"Rent March\"). Results are ranked best first and paginated; follow the `next` link for more. "
+        "Pages continue after the last result seen even as scores shift with other writes; only changes to your own matching "
+        "records between pages can make a result repeat or be skipped."
+    ),
+    parameters=[
+        OpenApiParameter("q", str, required=True, description="Words to search for."),
+        OpenApiParameter("kind", str, enum=["income", "expenditure"], description="Only search one kind of record."),
+        OpenApiParameter("cursor", str, description="The pagination cursor value."),
+        OpenApiParameter("page_size", int, description="Number of results to return per page."),
+    ],
+    responses={200: SearchResultsSerializer},
+    examples=[
+        OpenApiExample(
+            "Search Success Response",
+            value={
+                "next": None,
+                "results": [
+                    {
+                        "kind": "expenditure",
+                        "score": -1.25,
+                        "record": {"id": "c56a4180-65aa-42ec-a945-5fd21dac0538", "category": "TRANSPORT", "nameOfItem": "Uber to airport", "amount": "32.00"},
+                    },
+                ],
+            },
+            response_only=True,
+        ),
+    ],
+)
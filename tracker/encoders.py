@@ -0,0 +1,231 @@
+# tracker/encoders.py
+"""
+Serializer-free encoding of ledger rows.
+
+`RowEncoder` reads a ModelSerializer's fields once and compiles one
+small function per field, so rows fetched with `values_list` can be
+turned into JSON (or CSV text) without instantiating models or walking
+serializer fields per row. The output is byte-for-byte what
+`JSONRenderer` produces for the serializer's `.data`; field types or
+options without a dedicated encoder fall back to the field's own
+`to_representation`.
+
+`MoneyField` columns are fetched as the stored integer minor units
+(`<field>__cents`) and formatted with integer arithmetic, so amounts
+never become `Decimal`s on the way out.
+"""
+import decimal
+import functools
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .fields import MoneyField
+
+
+def _dumps(value):
+    # Same settings and post-processing as JSONRenderer.render().
+    text = json.dumps(value, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def _nullable(encode):
+    # Serializers emit None for a None attribute without calling the field.
+    return lambda value: "null" if value is None else encode(value)
+
+
+def _decimal_text(field):
+    if (
+        field.localize
+        or field.normalize_output
+        or field.decimal_places is None
+        or not getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    ):
+        return None
+    quantum = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def encode(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(quantum, rounding=rounding, context=context):f}"
+    return encode
+
+
+def _minor_units_text(field, model_field):
+    """Encode stored minor units as `field` would encode the `Decimal` they stand for."""
+    if _decimal_text(field) is None or field.decimal_places != model_field.decimal_places:
+        return None
+    places = field.decimal_places
+    scale = 10 ** places
+
+    def encode(value):
+        units, fraction = divmod(abs(value), scale)
+        sign = "-" if value < 0 else ""
+        return f"{sign}{units}.{fraction:0{places}d}" if places else f"{sign}{units}"
+    return encode
+
+
+def _money_field(serializer_class, field):
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    if model is None or not isinstance(field, serializers.DecimalField):
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    return model_field if isinstance(model_field, MoneyField) else None
+
+
+def _datetime_text(field):
+    if getattr(field, "format", api_settings.DATETIME_FORMAT) != ISO_8601:
+        return None
+    enforce_timezone = field.enforce_timezone
+
+    def encode(value):
+        if isinstance(value, str):
+            return value
+        text = enforce_timezone(value).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return encode
+
+
+def _uuid_text(field):
+    if field.uuid_format != "hex_verbose":
+        return None
+    return str
+
+
+def text_encoder(field):
+    """A function equal to `field.to_representation`, specialised where it pays off."""
+    compile_ = None
+    if isinstance(field, serializers.DecimalField):
+        compile_ = _decimal_text
+    elif isinstance(field, serializers.DateTimeField):
+        compile_ = _datetime_text
+    elif isinstance(field, serializers.UUIDField):
+        compile_ = _uuid_text
+    return (compile_ and compile_(field)) or field.to_representation
+
+
+def json_encoder(field):
+    """A function returning the JSON text of `field.to_representation(value)`."""
+    if type(field) is serializers.CharField or (
+        type(field) is serializers.ChoiceField and all(isinstance(key, str) for key in field.choices)
+    ):
+        # Stored strings come out unchanged.
+        return _nullable(_dumps)
+    if isinstance(field, (serializers.DecimalField, serializers.DateTimeField, serializers.UUIDField)):
+        text = text_encoder(field)
+        if text is not field.to_representation:
+            # These representations never contain characters that need escaping.
+            return _nullable(lambda value: f'"{text(value)}"')
+    to_representation = field.to_representation
+    return _nullable(lambda value: _dumps(to_representation(value)))
+
+
+class RowEncoder:
+    """
+    Encodes `values_list(*encoder.columns)` rows of the serializer's model
+    exactly as the serializer would. Extra trailing values in a row are
+    ignored, so callers may fetch additional columns (e.g. for a cursor).
+    """
+
+    def __init__(self, names, columns, text_encoders, json_encoders):
+        self.names = list(names)
+        self.columns = list(columns)
+        self.text_encoders = list(text_encoders)
+        self.json_encoders = list(json_encoders)
+        self._keys = [f"{_dumps(name)}:" for name in self.names]
+        self._selections = {}
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        names, columns, text_encoders, json_encoders = [], [], [], []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            money = _money_field(serializer_class, field)
+            minor_units = money and _minor_units_text(field, money)
+            names.append(field.field_name)
+            if minor_units:
+                columns.append(f"{field.source}__cents")
+                text_encoders.append(minor_units)
+                json_encoders.append(_nullable(lambda value, text=minor_units: f'"{text(value)}"'))
+            else:
+                columns.append(field.source.replace(".", "__"))
+                text_encoders.append(text_encoder(field))
+                json_encoders.append(json_encoder(field))
+        return cls(names, columns, text_encoders, json_encoders)
+
+    def select(self, names):
+        """An encoder for a subset of the fields, in serializer order."""
+        names = frozenset(names)
+        if names not in self._selections:
+            keep = [index for index, name in enumerate(self.names) if name in names]
+            self._selections[names] = RowEncoder(*(
+                [values[index] for index in keep]
+                for values in (self.names, self.columns, self.text_encoders, self.json_encoders)
+            ))
+        return self._selections[names]
+
+    def columns_with(self, extra):
+        """`columns` followed by any of `extra` not already among them."""
+        return self.columns + [column for column in extra if column not in self.columns]
+
+    def encode_text(self, row):
+        return [None if value is None else encode(value) for encode, value in zip(self.text_encoders, row)]
+
+    def encode_json(self, row):
+        return "{" + ",".join([key + encode(value) for key, encode, value in zip(self._keys, self.json_encoders, row)]) + "}"
+
+
+@functools.lru_cache(maxsize=None)
+def row_encoder(serializer_class):
+    return RowEncoder.for_serializer(serializer_class)
+
+
+class PrerenderedJSONResponse(Response):
+    """
+    A Response whose JSON body was encoded up front. Compact JSON
+    renderers send those bytes as they are; `.data`, used by any other
+    renderer and by the response cache, is decoded from them on demand.
+    """
+
+    def __init__(self, content, status=None, headers=None):
+        self.json_content = content
+        self._data = None
+        super().__init__(None, status=status, headers=headers)
+
+    @property
+    def data(self):
+        if self._data is None and self.json_content is not None:
+            self._data = json.loads(self.json_content)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, "accepted_renderer", None)
+        if not (
+            isinstance(renderer, JSONRenderer)
+            and renderer.compact
+            and not renderer.ensure_ascii
+            and renderer.get_indent(self.accepted_media_type, self.renderer_context) is None
+        ):
+            return super().rendered_content
+        self["Content-Type"] = self.content_type or (
+            f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+        )
+        return self.json_content
@@ -0,0 +1,49 @@
+# tracker/fields.py
+import decimal
+from functools import cached_property
+
+from django.db import models
+
+
+class MoneyField(models.DecimalField):
+    """
+    A `DecimalField` stored as a whole number of minor units (cents for
+    `decimal_places=2`) in a BIGINT column.
+
+    Python code, validation and serializers still see `Decimal`s exactly
+    as before; the database compares, orders and sums plain integers, and
+    SQLite returns them without the text round trip decimals need.
+    `values_list("<field>__cents")` fetches the stored integers as they
+    are, for code that formats them itself (see `tracker.encoders`).
+    """
+
+    def get_internal_type(self):
+        return "BigIntegerField"
+
+    def to_minor_units(self, value):
+        return int(value.scaleb(self.decimal_places).to_integral_value())
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, "as_sql"):
+            return value
+        return self.to_minor_units(value)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decimal.Decimal(value).scaleb(-self.decimal_places)
+
+
+@MoneyField.register_lookup
+class Cents(models.Transform):
+    """The stored minor units of a `MoneyField`, unconverted."""
+    lookup_name = "cents"
+
+    @cached_property
+    def output_field(self):
+        return models.BigIntegerField()
+
+    def as_sql(self, compiler, connection):
+        return compiler.compile(self.lhs)
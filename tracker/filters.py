@@ -0,0 +1,94 @@
+# tracker/filters.py
+from rest_framework.exceptions import ValidationError
+
+
+# Query parameter -> column it constrains.
+FILTER_COLUMNS = {
+    "category": "category",
+    "created_after": "created_at",
+    "created_before": "created_at",
+    "min_amount": "amount",
+    "max_amount": "amount",
+}
+
+# Columns compared with `=`/`IN`; every other filtered column is a range.
+EQUALITY_COLUMNS = {"category"}
+
+ORDERING_COLUMNS = ("created_at", "amount", "id")
+
+
+def apply_ledger_filters(queryset, filters):
+    """
+    Narrow a user-scoped income/expenditure queryset with validated
+    `LedgerFilterSerializer` data. `created_after` is inclusive and
+    `created_before` is exclusive; amount bounds are inclusive.
+    """
+    if "category" in filters:
+        queryset = queryset.filter(category__in=filters["category"])
+    if "created_after" in filters:
+        queryset = queryset.filter(created_at__gte=filters["created_after"])
+    if "created_before" in filters:
+        queryset = queryset.filter(created_at__lt=filters["created_before"])
+    if "min_amount" in filters:
+        queryset = queryset.filter(amount__gte=filters["min_amount"])
+    if "max_amount" in filters:
+        queryset = queryset.filter(amount__lte=filters["max_amount"])
+    return queryset
+
+
+def find_index(model, filters, ordering):
+    """
+    Return the `(user, ...)` composite index on `model` that serves the
+    filters and the ordering as a single index range scan, or None.
+
+    The index must start with `user`, continue with every equality
+    column, and then with the ordering column; a range filter is only
+    allowed on that ordering column.
+    """
+    filtered = {FILTER_COLUMNS[name] for name in filters if name in FILTER_COLUMNS}
+    equality = filtered & EQUALITY_COLUMNS
+    ranges = filtered - equality
+    order_column = ordering.lstrip("-")
+
+    if ranges - {order_column}:
+        return None
+
+    for index in model._meta.indexes:
+        fields = list(index.fields)
+        if fields[0] != "user":
+            continue
+        if set(fields[1:1 + len(equality)]) != equality:
+            continue
+        if fields[1 + len(equality):2 + len(equality)] != [order_column]:
+            continue
+        return index
+    return None
+
+
+def supported_combinations(model):
+    """Human-readable list of what `find_index` accepts, for error messages."""
+    combinations = []
+    for index in model._meta.indexes:
+        fields = list(index.fields)
+        if fields[0] != "user" or fields[-1] not in ORDERING_COLUMNS:
+            continue
+        *equality, order_column = fields[1:]
+        filters = list(equality)
+        if order_column in FILTER_COLUMNS.values():
+            filters.append(f"{order_column} range")
+        if not filters:
+            combinations.append(f"ordering by {order_column}")
+            continue
+        combinations.append(f"ordering by {order_column}, optionally filtering by: {', '.join(filters)}")
+    return combinations
+
+
+def plan_list_query(model, filters, ordering):
+    """Reject filter/ordering combinations that no composite index can serve."""
+    index = find_index(model, filters, ordering)
+    if index is None:
+        raise ValidationError({
+            "detail": "This combination of filters and ordering would scan every record; it is not supported.",
+            "supported": supported_combinations(model),
+        })
+    return index
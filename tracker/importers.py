@@ -0,0 +1,269 @@
+# tracker/importers.py
+"""
+Streaming import of bank statements (CSV or OFX).
+
+Parsers yield one transaction at a time, rows are checked by
+`RowValidator` (the model field rules, without building a serializer
+per row) and valid rows are written with batched `bulk_create`. Only the
+current batch and a capped list of errors are ever held in memory.
+"""
+import csv
+import re
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.core.validators import MinValueValidator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import cache, rollups, sharding
+from .models import Income, Expenditure
+
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+INCOME = "income"
+EXPENDITURE = "expenditure"
+
+
+# ---------------- Parsers ----------------
+def parse_csv(stream):
+    """
+    Read a CSV statement with a header row. Recognised columns are
+    `date`, `description` (or `name`), `amount`, and optionally
+    `category` and `type` (income/expenditure). Without a `type` column
+    negative amounts are expenditures and positive amounts are incomes.
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, {
+            "type": (row.get("type") or "").strip().lower(),
+            "name": (row.get("description") or row.get("name") or "").strip(),
+            "amount": (row.get("amount") or "").strip(),
+            "category": (row.get("category") or "").strip().upper(),
+            "date": (row.get("date") or "").strip(),
+        }
+
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+OFX_DATE = re.compile(r"^(\d{8})(\d{6})?")
+
+
+def _ofx_date(value):
+    match = OFX_DATE.match(value)
+    if not match:
+        return value
+    day, clock = match.groups()
+    return f"{day[:4]}-{day[4:6]}-{day[6:]}" + (f"T{clock[:2]}:{clock[2:4]}:{clock[4:]}" if clock else "")
+
+
+def parse_ofx(stream, chunk_size=64 * 1024):
+    """
+    Read `<STMTTRN>` blocks from an OFX 1.x (SGML) or 2.x (XML) statement.
+    The file is scanned in fixed-size chunks; only the unfinished tail of
+    the previous chunk is carried over.
+    """
+    index = 0
+    current = None
+    tail = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        text = tail + chunk
+        if chunk:
+            # Hold back everything from the last "<" so a tag or value cut
+            # by the chunk boundary is parsed whole in the next round.
+            cut = text.rfind("<")
+            if cut <= 0:
+                tail = text
+                continue
+            body, tail = text[:cut], text[cut:]
+        else:
+            body, tail = text, ""
+
+        for closing, tag, value in OFX_TAG.findall(body):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if current is not None:
+                    index += 1
+                    yield index, current
+                current = None if closing else {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+        if not chunk:
+            break
+
+    if current is not None:
+        index += 1
+        yield index, current
+
+
+def ofx_rows(stream):
+    for index, transaction_ in parse_ofx(stream):
+        yield index, {
+            "type": "",
+            "name": transaction_.get("NAME") or transaction_.get("MEMO") or "",
+            "amount": transaction_.get("TRNAMT", ""),
+            "category": "",
+            "date": _ofx_date(transaction_.get("DTPOSTED", "")),
+        }
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": ofx_rows,
+}
+
+
+# ---------------- Validation ----------------
+class RowValidator:
+    """
+    Mirrors the `Income`/`Expenditure` field rules (positive amount within
+    the field's digits, valid `CATEGORY_CHOICES`, name max length) using
+    the model metadata, so the checks stay in step with the models.
+    """
+
+    def __init__(self):
+        self.rules = {
+            INCOME: self._rules_for(Income, "nameOfRevenue"),
+            EXPENDITURE: self._rules_for(Expenditure, "nameOfItem"),
+        }
+        self.categories = {value for value, _ in Expenditure.CATEGORY_CHOICES}
+        self.default_category = Expenditure._meta.get_field("category").default
+
+    @staticmethod
+    def _rules_for(model, name_field):
+        amount = model._meta.get_field("amount")
+        minimum = min(
+            (validator.limit_value for validator in amount.validators if isinstance(validator, MinValueValidator)),
+            default=None,
+        )
+        return {
+            "name_field": name_field,
+            "name_max_length": model._meta.get_field(name_field).max_length,
+            "max_digits": amount.max_digits,
+            "decimal_places": amount.decimal_places,
+            "min_value": minimum,
+        }
+
+    def validate(self, raw):
+        """Return `(kind, field values, errors)` for one parsed row."""
+        errors = {}
+
+        try:
+            amount = Decimal(raw["amount"].replace(",", ""))
+            if not amount.is_finite():
+                raise InvalidOperation
+        except (InvalidOperation, ValueError):
+            return None, None, {"amount": ["A valid number is required."]}
+
+        kind = raw["type"] or (EXPENDITURE if amount < 0 else INCOME)
+        if kind not in self.rules:
+            return None, None, {"type": [f'"{raw["type"]}" is not a valid type.']}
+        rules = self.rules[kind]
+        amount = abs(amount)
+
+        if rules["min_value"] is not None and amount < rules["min_value"]:
+            errors.setdefault("amount", []).append(f"Ensure this value is greater than or equal to {rules['min_value']}.")
+        _, digits, exponent = amount.normalize().as_tuple() if amount else amount.as_tuple()
+        decimals = max(-exponent, 0)
+        whole_digits = max(len(digits) + exponent, 0)
+        if decimals > rules["decimal_places"]:
+            errors.setdefault("amount", []).append(f"Ensure that there are no more than {rules['decimal_places']} decimal places.")
+        if whole_digits > rules["max_digits"] - rules["decimal_places"]:
+            errors.setdefault("amount", []).append(
+                f"Ensure that there are no more than {rules['max_digits'] - rules['decimal_places']} digits before the decimal point."
+            )
+
+        name = raw["name"]
+        if not name:
+            errors["name"] = ["This field may not be blank."]
+        elif len(name) > rules["name_max_length"]:
+            errors["name"] = [f"Ensure this field has no more than {rules['name_max_length']} characters."]
+
+        values = {rules["name_field"]: name, "amount": amount}
+
+        if kind == EXPENDITURE:
+            category = raw["category"] or self.default_category
+            if category not in self.categories:
+                errors["category"] = [f'"{category}" is not a valid choice.']
+            values["category"] = category
+
+        if raw["date"]:
+            created_at = self._parse_date(raw["date"])
+            if created_at is None:
+                errors["date"] = ["Use YYYY-MM-DD or an ISO 8601 date/time."]
+            values["created_at"] = created_at
+
+        return kind, values, errors
+
+    @staticmethod
+    def _parse_date(value):
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                if day is None:
+                    return None
+                parsed = datetime.combine(day, time.min)
+        except ValueError:
+            return None
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+# ---------------- Import ----------------
+def import_rows(user, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate and insert parsed `(row number, raw row)` pairs for `user`.
+    Each batch is written in its own transaction together with its rollup
+    deltas. Returns a summary report.
+    """
+    validator = RowValidator()
+    models = {INCOME: Income, EXPENDITURE: Expenditure}
+    pending = {INCOME: [], EXPENDITURE: []}
+    report = {
+        "rows": 0,
+        "imported": {INCOME: 0, EXPENDITURE: 0},
+        "rejected": 0,
+        "errors": [],
+    }
+
+    def flush(kind):
+        objs = pending[kind]
+        if not objs:
+            return
+        with transaction.atomic(using=sharding.ledger_db()):
+            models[kind].objects.bulk_create(objs, batch_size=batch_size)
+            rollups.record_created(objs)
+        report["imported"][kind] += len(objs)
+        pending[kind] = []
+
+    for row_number, raw in rows:
+        report["rows"] += 1
+        kind, values, errors = validator.validate(raw)
+        if errors:
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": row_number, "errors": errors})
+            continue
+
+        pending[kind].append(models[kind](user_id=user.id, **values))
+        if len(pending[kind]) >= batch_size:
+            flush(kind)
+
+    flush(INCOME)
+    flush(EXPENDITURE)
+    if report["imported"][INCOME] or report["imported"][EXPENDITURE]:
+        cache.invalidate_user(user.id)
+    return report
+
+
+def import_statement(user, stream, file_format, batch_size=IMPORT_BATCH_SIZE):
+    """`stream` is a text stream; `file_format` is "csv" or "ofx"."""
+    return import_rows(user, PARSERS[file_format](stream), batch_size=batch_size)
@@ -0,0 +1,37 @@
+# tracker/management/commands/archive_ledger.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker import archive, sharding
+
+
+class Command(BaseCommand):
+    help = "Move income and expenditure rows older than the cutoff from the hot tables into the archive tables, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=getattr(settings, "TRACKER_ARCHIVE_AFTER_DAYS", 90),
+            help="Archive rows created more than this many days ago. Defaults to TRACKER_ARCHIVE_AFTER_DAYS.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows moved per transaction.")
+        parser.add_argument(
+            "--grace", type=float, default=archive.WATERMARK_CACHE_SECONDS,
+            help="Seconds to wait after raising the watermark, so every process reads it before rows move.",
+        )
+
+    def handle(self, *args, older_than_days, batch_size=1000, grace=archive.WATERMARK_CACHE_SECONDS, **options):
+        if older_than_days < 1:
+            raise CommandError("--older-than-days must be at least 1.")
+
+        previous = archive.watermark()
+        cutoff = archive.raise_watermark(timezone.now() - timedelta(days=older_than_days))
+        if cutoff != previous:
+            time.sleep(grace)
+        moved = 0
+        for alias in sharding.shard_aliases():
+            moved += sum(archive.archive_before(cutoff, using=alias, batch_size=batch_size, log=self.stdout.write).values())
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} rows created before {cutoff:%Y-%m-%d %H:%M}."))
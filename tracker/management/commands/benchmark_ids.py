@@ -0,0 +1,92 @@
+# tracker/management/commands/benchmark_ids.py
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracker.models import Income
+from utils.ids import uuid7
+
+
+GENERATORS = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+def income_ddl():
+    """The income table and its indexes, as migrations create them."""
+    with connection.schema_editor(collect_sql=True) as editor:
+        editor.create_model(Income)
+    return editor.collected_sql
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare insert throughput and on-disk size of the income table with random (uuid4) "
+        "and time-ordered (uuid7) primary keys, each in a scratch SQLite database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000, help="Rows inserted per run.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per transaction.")
+        parser.add_argument("--users", type=int, default=100, help="Distinct users the rows are spread over.")
+        parser.add_argument(
+            "--cache-kib", type=int, default=2000,
+            help="SQLite page cache per run, in KiB. Keep it well below the table size to see the effect of locality.",
+        )
+
+    def handle(self, *args, rows=200_000, batch_size=1000, users=100, cache_kib=2000, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark builds scratch SQLite databases; run it with the SQLite settings.")
+        if rows < 1 or batch_size < 1 or users < 1:
+            raise CommandError("--rows, --batch-size and --users must be at least 1.")
+
+        ddl = income_ddl()
+        user_ids = [uuid7().hex for _ in range(users)]
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, generate in GENERATORS.items():
+                path = os.path.join(directory, f"{name}.sqlite3")
+                results[name] = self.run(path, ddl, generate, user_ids, rows, batch_size, cache_kib)
+                elapsed, pages, size = results[name]
+                self.stdout.write(
+                    f"{name}: {rows / elapsed:,.0f} rows/s, {pages:,} pages, {size / 2**20:.1f} MiB"
+                )
+
+        speedup = results["uuid4"][0] / results["uuid7"][0]
+        self.stdout.write(self.style.SUCCESS(f"uuid7 inserts ran {speedup:.2f}x the speed of uuid4."))
+
+    def run(self, path, ddl, generate, user_ids, rows, batch_size, cache_kib):
+        db = sqlite3.connect(path, isolation_level=None)
+        try:
+            db.execute(f"PRAGMA cache_size = -{cache_kib}")
+            for statement in ddl:
+                db.execute(statement)
+
+            start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+            sql = (
+                'INSERT INTO "tracker_income" ("id", "user_id", "nameOfRevenue", "amount", "created_at", "updated_at") '
+                "VALUES (?, ?, ?, ?, ?, ?)"
+            )
+            began = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                batch = []
+                for n in range(offset, min(offset + batch_size, rows)):
+                    stamp = (start + timedelta(seconds=n)).isoformat(sep=" ")
+                    batch.append((generate().hex, random.choice(user_ids), "Salary", random.randint(100, 10**6), stamp, stamp))
+                db.execute("BEGIN")
+                db.executemany(sql, batch)
+                db.execute("COMMIT")
+            elapsed = time.perf_counter() - began
+
+            pages = db.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            db.close()
+        return elapsed, pages, os.path.getsize(path)
@@ -0,0 +1,19 @@
+# tracker/management/commands/cache_stats.py
+from django.core.management.base import BaseCommand
+
+from tracker import cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters for the tracker response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing them.")
+
+    def handle(self, *args, reset=False, **options):
+        counters = cache.stats()
+        lookups = counters["hits"] + counters["misses"]
+        ratio = counters["hits"] / lookups if lookups else 0.0
+        self.stdout.write(f"hits={counters['hits']} misses={counters['misses']} hit_ratio={ratio:.2%}")
+        if reset:
+            cache.reset_stats()
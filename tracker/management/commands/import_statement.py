@@ -0,0 +1,34 @@
+# tracker/management/commands/import_statement.py
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from tracker import sharding
+from tracker.importers import IMPORT_BATCH_SIZE, import_statement
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or OFX bank statement into a user's ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Statement file to import.")
+        parser.add_argument("--user", required=True, help="Email or ID of the user who owns the statement.")
+        parser.add_argument("--format", dest="file_format", choices=["csv", "ofx"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows inserted per transaction.")
+
+    def handle(self, *args, path, user, file_format=None, batch_size=IMPORT_BATCH_SIZE, **options):
+        lookup = {"email": user} if "@" in user else {"id": user}
+        try:
+            owner = User.objects.get(**lookup)
+        except (User.DoesNotExist, ValidationError):
+            raise CommandError(f"User {user} not found.")
+
+        if file_format is None:
+            file_format = "csv" if path.lower().endswith(".csv") else "ofx"
+
+        with open(path, encoding="utf-8-sig", errors="replace", newline="") as stream, sharding.user_shard(owner.id, for_write=True):
+            report = import_statement(owner, stream, file_format, batch_size=batch_size)
+
+        self.stdout.write(json.dumps(report, indent=2))
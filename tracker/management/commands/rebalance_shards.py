@@ -0,0 +1,52 @@
+# tracker/management/commands/rebalance_shards.py
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from tracker import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Move users' ledgers between TRACKER_SHARDS while the API keeps serving them. "
+        "Without --user, moves every user who is not on the shard their ID hashes to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", dest="user_ids", action="append", help="Move this user ID. Repeatable.")
+        parser.add_argument("--to", dest="target", help="Target shard alias. Defaults to each user's hashed shard.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows copied or deleted per transaction.")
+        parser.add_argument("--grace", type=float, help="Seconds to wait for other processes to see a placement change. Defaults to TRACKER_SHARD_CACHE_SECONDS.")
+        parser.add_argument("--dry-run", action="store_true", help="List the moves without making them.")
+
+    def handle(self, *args, user_ids=None, target=None, batch_size=500, grace=None, dry_run=False, **options):
+        aliases = sharding.shard_aliases()
+        if target is not None and target not in aliases:
+            raise CommandError(f"{target!r} is not one of TRACKER_SHARDS ({', '.join(aliases)}).")
+
+        users = User.objects.order_by("id").values_list("id", flat=True)
+        if user_ids:
+            try:
+                users = users.filter(id__in=user_ids)
+                found = set(users)
+            except ValidationError:
+                raise CommandError("--user takes user IDs.")
+            missing = len(set(user_ids)) - len(found)
+            if missing:
+                raise CommandError(f"{missing} of the given users were not found.")
+
+        moved = 0
+        for user_id in users.iterator(chunk_size=batch_size):
+            sharding.forget_placement(user_id)
+            source = sharding.shard_for_user(user_id)
+            destination = target or sharding.hashed_shard(user_id)
+            if source == destination:
+                continue
+            moved += 1
+            if dry_run:
+                self.stdout.write(f"{user_id}: {source} -> {destination}")
+                continue
+            sharding.move_user(user_id, destination, batch_size=batch_size, grace=grace, log=self.stdout.write)
+
+        verb = "Would move" if dry_run else "Moved"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {moved} users."))
@@ -0,0 +1,56 @@
+# tracker/management/commands/rebuild_rollups.py
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from tracker import rollups, sharding
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or with --verify, check) MonthlyRollup rows from the raw income and expenditure tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Report mismatches without writing anything.")
+        parser.add_argument("--user", dest="user_ids", action="append", help="Limit to this user ID. Repeatable.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Users fetched per database round trip.")
+
+    def handle(self, *args, verify=False, user_ids=None, batch_size=500, **options):
+        users = User.objects.order_by("id").values_list("id", flat=True)
+        if user_ids:
+            try:
+                users = users.filter(id__in=user_ids)
+                found = set(users)
+            except ValidationError:
+                raise CommandError("--user takes user IDs.")
+            missing = len(set(user_ids)) - len(found)
+            if missing:
+                raise CommandError(f"{missing} of the given users were not found.")
+
+        checked = mismatched = 0
+        # Users are streamed and each ledger is aggregated in the database,
+        # so memory stays flat regardless of how many rows are involved.
+        for user_id in users.iterator(chunk_size=batch_size):
+            checked += 1
+            if verify:
+                with sharding.user_shard(user_id):
+                    expected = rollups.expected_rollups(user_id)
+                    stored = rollups.stored_rollups(user_id)
+                if expected != stored:
+                    mismatched += 1
+                    for key in sorted(expected.keys() | stored.keys()):
+                        if expected.get(key) != stored.get(key):
+                            month, kind, category = key
+                            self.stdout.write(
+                                f"{user_id} {month:%Y-%m} {kind} {category or '-'}: "
+                                f"stored={stored.get(key)} expected={expected.get(key)}"
+                            )
+            else:
+                with sharding.user_shard(user_id, for_write=True):
+                    rollups.rebuild_user(user_id)
+
+        if verify:
+            if mismatched:
+                raise CommandError(f"{mismatched} of {checked} users have rollups that do not match their ledger.")
+            self.stdout.write(self.style.SUCCESS(f"Rollups match for all {checked} users."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {checked} users."))
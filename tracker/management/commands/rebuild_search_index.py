@@ -0,0 +1,27 @@
+# tracker/management/commands/rebuild_search_index.py
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import search, sharding
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over income and expenditure names from the ledger tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", dest="user_ids", action="append", help="Limit to this user ID. Repeatable.")
+
+    def handle(self, *args, user_ids=None, **options):
+        if not search.is_supported():
+            raise CommandError("Full-text search needs SQLite with FTS5; other databases search with icontains and need no index.")
+
+        if user_ids:
+            indexed = 0
+            for user_id in user_ids:
+                try:
+                    indexed += search.rebuild(user_id=user_id, using=sharding.shard_for_user(user_id))
+                except (ValueError, ValidationError):
+                    raise CommandError(f"{user_id!r} is not a valid user ID.")
+        else:
+            indexed = sum(search.rebuild(using=alias) for alias in sharding.shard_aliases())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} records."))
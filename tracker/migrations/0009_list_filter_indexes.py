@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_created_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['user', 'amount'], name='tracker_exp_user_id_20cce7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['user', 'category', 'created_at'], name='tracker_exp_user_id_51a2a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'amount'], name='tracker_inc_user_id_e3db0b_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+
+# The search schema as this migration introduced it. Kept inline rather
+# than imported from tracker.search, which keeps changing; the current
+# triggers are installed after every migrate (see tracker.apps).
+SEARCH_TABLE = 'tracker_search'
+
+# (kind, ledger table, name column)
+SOURCES = [
+    ('income', 'tracker_income', 'nameOfRevenue'),
+    ('expenditure', 'tracker_expenditure', 'nameOfItem'),
+]
+
+
+def trigger_sql(kind, table, name):
+    insert = (
+        f"INSERT INTO {SEARCH_TABLE}(name, owner, kind, record) "
+        f"VALUES (new.\"{name}\", 'u' || new.\"user_id\", '{kind}', new.id);"
+    )
+    delete = f"DELETE FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'record:\"' || old.id || '\"';"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF \"{name}\", \"user_id\" ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "name, owner, kind, record, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # Rank on the name only; the other columns are used for filtering.
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 0.0, 0.0, 0.0)')")
+        for kind, table, name in SOURCES:
+            for statement in trigger_sql(kind, table, name):
+                cursor.execute(statement)
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for kind, table, name in SOURCES:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(name, owner, kind, record) "
+                f"SELECT \"{name}\", 'u' || \"user_id\", '{kind}', id FROM {table}"
+            )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for _, table, _ in SOURCES:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,67 @@
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+import tracker.fields
+
+
+BATCH_SIZE = 2000
+
+# (model, decimal field, max_digits, validators, default, (user, field) index name)
+MONEY_FIELDS = [
+    ('income', 'amount', 12, [django.core.validators.MinValueValidator(1)], None, 'tracker_inc_user_id_e3db0b_idx'),
+    ('expenditure', 'amount', 6, [django.core.validators.MinValueValidator(1)], None, 'tracker_exp_user_id_20cce7_idx'),
+    ('archivedincome', 'amount', 12, [], None, None),
+    ('archivedexpenditure', 'amount', 6, [], None, None),
+    ('monthlyrollup', 'total', 14, [], 0, None),
+]
+
+
+def copy_to_minor_units(apps, schema_editor):
+    """Fill `<field>_cents` from the decimal column, BATCH_SIZE rows per UPDATE."""
+    using = schema_editor.connection.alias
+    for model_name, field, *_ in MONEY_FIELDS:
+        model = apps.get_model('tracker', model_name)
+        cents = f'{field}_cents'
+        pending = model.objects.using(using).filter(**{f'{cents}__isnull': True}).order_by('pk')
+        while True:
+            batch = list(pending.values_list('pk', flat=True)[:BATCH_SIZE])
+            if not batch:
+                break
+            model.objects.using(using).filter(pk__in=batch).update(
+                **{cents: Cast(Round(F(field) * 100), output_field=BigIntegerField())}
+            )
+
+
+def money_operations():
+    before, after = [], []
+    for model_name, field, max_digits, validators, default, index_name in MONEY_FIELDS:
+        cents = f'{field}_cents'
+        before.append(migrations.AddField(model_name=model_name, name=cents, field=models.BigIntegerField(null=True)))
+        if index_name:
+            after.append(migrations.RemoveIndex(model_name=model_name, name=index_name))
+        kwargs = {'decimal_places': 2, 'max_digits': max_digits}
+        if validators:
+            kwargs['validators'] = validators
+        if default is not None:
+            kwargs['default'] = default
+        after += [
+            migrations.RemoveField(model_name=model_name, name=field),
+            migrations.RenameField(model_name=model_name, old_name=cents, new_name=field),
+            migrations.AlterField(model_name=model_name, name=field, field=tracker.fields.MoneyField(**kwargs)),
+        ]
+        if index_name:
+            after.append(migrations.AddIndex(
+                model_name=model_name, index=models.Index(fields=['user', field], name=index_name),
+            ))
+    return before + [migrations.RunPython(copy_to_minor_units, elidable=False)] + after
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_ledger_archive'),
+    ]
+
+    operations = money_operations()
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:41
+
+import utils.ids
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_money_minor_units'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='expenditure',
+            name='tracker_exp_user_id_2394ee_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='income',
+            name='tracker_inc_user_id_3b61f2_idx',
+        ),
+        migrations.AlterField(
+            model_name='expenditure',
+            name='id',
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='income',
+            name='id',
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['user', 'id'], name='tracker_exp_user_id_6709e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'id'], name='tracker_inc_user_id_f34b65_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.db import migrations, transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+# (ledger model, archive model, rollup kind)
+LEDGERS = [
+    ('income', 'archivedincome', 'INCOME'),
+    ('expenditure', 'archivedexpenditure', 'EXPENDITURE'),
+]
+
+
+def month_totals(queryset, by_category):
+    group_by = ['month', 'category'] if by_category else ['month']
+    return (
+        queryset.order_by()
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values(*group_by)
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Rebuild `MonthlyRollup` from the ledger, one user per transaction.
+    Rows written before rollups existed were never counted; rebuilding
+    rather than adding keeps this safe to run over rollups that are
+    already correct.
+    """
+    using = schema_editor.connection.alias
+    MonthlyRollup = apps.get_model('tracker', 'MonthlyRollup')
+
+    user_ids = set()
+    for model_name, archive_name, _ in LEDGERS:
+        for name in (model_name, archive_name):
+            model = apps.get_model('tracker', name)
+            user_ids.update(model.objects.using(using).order_by().values_list('user_id', flat=True).distinct())
+
+    for user_id in sorted(user_ids):
+        rows = []
+        for model_name, archive_name, kind in LEDGERS:
+            totals = defaultdict(lambda: [0, 0])
+            for name in (model_name, archive_name):
+                model = apps.get_model('tracker', name)
+                by_category = model_name == 'expenditure'
+                for row in month_totals(model.objects.using(using).filter(user_id=user_id), by_category):
+                    bucket = totals[(row['month'], row.get('category', ''))]
+                    bucket[0] += row['total']
+                    bucket[1] += row['count']
+            rows += [
+                MonthlyRollup(user_id=user_id, month=month, kind=kind, category=category, total=total, count=count)
+                for (month, category), (total, count) in totals.items()
+            ]
+        with transaction.atomic(using=using):
+            MonthlyRollup.objects.using(using).filter(user_id=user_id).delete()
+            MonthlyRollup.objects.using(using).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_uuid7_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop, elidable=False),
+    ]
@@ -0,0 +1,432 @@
+# tracker/mixins.py
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from . import archive, cache, rollups, routers, sharding
+from .encoders import PrerenderedJSONResponse, row_encoder
+from .exports import IgnoreClientContentNegotiation, export_response
+from .filters import apply_ledger_filters, plan_list_query
+from .serializers import BulkSelectionSerializer, LedgerFilterSerializer, ListQuerySerializer
+
+
+class FilteredListMixin:
+    """
+    Filtering and ordering for the list route. Filter/ordering
+    combinations are only served when a `(user, ...)` composite index
+    covers them; the index used is reported in `X-Query-Index`.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_serializer_class().Meta.model
+        query = ListQuerySerializer(data=request.query_params, context={"model": model})
+        query.is_valid(raise_exception=True)
+        self.list_filters = dict(query.validated_data)
+        self.ordering = (self.list_filters.pop("ordering"),)
+        index = plan_list_query(model, self.list_filters, self.ordering[0])
+
+        response = super().list(request, *args, **kwargs)
+        response["X-Query-Index"] = index.name
+        return response
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            queryset = apply_ledger_filters(queryset, self.list_filters)
+        return queryset
+
+
+def _etag_matches(header, etag, weak=True):
+    if header is None:
+        return False
+    candidates = parse_etags(header)
+    if "*" in candidates:
+        return True
+    if weak:
+        candidates = [candidate.removeprefix("W/") for candidate in candidates]
+    return etag in candidates
+
+
+class ConditionalMixin:
+    """
+    ETag support built on the per-user cache generation.
+
+    GET list/retrieve answer `If-None-Match` with 304 before anything is
+    queried or serialized. PUT/PATCH honour `If-Match` and fail with 412
+    when the user's data changed since the client last read it. Off,
+    like the response cache, unless the cache is shared (`cache.enabled`);
+    an `If-Match` other than `*` then cannot be checked and fails with 412
+    rather than allowing an unconditional overwrite.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_get(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_get(request, super().retrieve, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        etag = cache.etag_for(request) if cache.enabled() else None
+        if_match = request.headers.get("If-Match")
+        if if_match is not None and not _etag_matches(if_match, etag, weak=False):
+            return Response(
+                {"detail": "The resource has changed since it was last fetched."},
+                status=status.HTTP_412_PRECONDITION_FAILED,
+            )
+        response = super().update(request, *args, **kwargs)
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response["ETag"] = cache.etag_for(request)
+        return response
+
+    def _conditional_get(self, request, handler, *args, **kwargs):
+        if not cache.enabled():
+            return handler(request, *args, **kwargs)
+        etag = cache.etag_for(request)
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+
+class CachedReadMixin:
+    """
+    Serves list and retrieve responses from the per-user cache in
+    `tracker.cache`. Writes invalidate it through `cache.invalidate_user`.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return cache.cached_response(request, "list", lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return cache.cached_response(request, "retrieve", lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
+
+
+class ShardMixin:
+    """
+    Runs the request against the shard holding the user's ledger (see
+    `tracker.sharding`). Writes are refused with 503 while the user is
+    being moved to another shard.
+    """
+    _shard_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        alias = sharding.shard_for_user(request.user.id, for_write=request.method not in SAFE_METHODS)
+        self._shard_token = sharding.activate(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._shard_token is not None:
+            sharding.deactivate(self._shard_token)
+            self._shard_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaReadMixin:
+    """
+    Serves safe requests from a read replica (see `tracker.routers`),
+    unless the user wrote recently and must read from the primary.
+    """
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not cache.reads_pinned_to_primary(request.user.id):
+            self._replica_token = routers.enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            routers.reset_replica_reads(self._replica_token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    `?fields=id,amount,created_at` limits read responses to those fields.
+    The selection reaches the query too: only the requested columns (plus
+    any the cursor needs) are fetched.
+    """
+    fields_query_param = "fields"
+
+    def get_requested_fields(self):
+        raw = self.request.query_params.get(self.fields_query_param, "")
+        names = [name.strip() for name in raw.split(",") if name.strip()]
+        if not names:
+            return None
+        available = row_encoder(self.get_serializer_class()).names
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: [f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."]
+            })
+        return names
+
+    def get_row_encoder(self):
+        encoder = super().get_row_encoder()
+        fields = self.get_requested_fields()
+        return encoder.select(fields) if fields else encoder
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method in SAFE_METHODS:
+            kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class FastReadMixin:
+    """
+    List and retrieve without a serializer per row: the serialized fields
+    are fetched with `values_list` and encoded straight to JSON by the
+    compiled `RowEncoder`, skipping model instantiation. The bytes match
+    what the serializer and `JSONRenderer` would have produced.
+    """
+
+    def get_row_encoder(self):
+        return row_encoder(self.get_serializer_class())
+
+    def get_archived_queryset(self, filters=None):
+        """
+        Archived rows a read with these filters (default: the list
+        filters) may also need (see `ArchiveMixin`), or None.
+        """
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if not hasattr(self.paginator, "get_paginated_content"):
+            return super().list(request, *args, **kwargs)
+        encoder = self.get_row_encoder()
+        # The cursor is built from the ordering columns, so fetch them even
+        # when they are not part of the output; the encoder ignores them.
+        columns = encoder.columns_with([field.lstrip("-") for field in self.paginator.get_ordering(self)])
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*columns, named=True)
+        archived = self.get_archived_queryset()
+        if archived is None:
+            page = self.paginate_queryset(queryset)
+        else:
+            archived = self.filter_queryset(archived).values_list(*columns, named=True)
+            page = self.paginator.paginate_querysets([queryset, archived], request, view=self)
+        return PrerenderedJSONResponse(self.paginator.get_paginated_content([encoder.encode_json(row) for row in page]))
+
+    def retrieve(self, request, *args, **kwargs):
+        encoder = self.get_row_encoder()
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            row = queryset.filter(**lookup).values_list(*encoder.columns).first()
+            archived = self.get_archived_queryset() if row is None else None
+            if archived is not None:
+                row = archived.filter(**lookup).values_list(*encoder.columns).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        return PrerenderedJSONResponse(encoder.encode_json(row).encode("utf-8"))
+
+
+class ArchiveMixin:
+    """
+    Makes archived rows (see `tracker.archive`) part of the ledger: lists
+    and exports that reach back past the watermark merge in the archive,
+    retrieve falls back to it, updating or deleting a single archived row
+    restores it to the hot table first, and bulk updates and deletes also
+    apply to the selected archived rows, in place.
+    """
+
+    def get_archived_queryset(self, filters=None):
+        if filters is None:
+            filters = self.list_filters if self.action == "list" else {}
+        if not archive.reaches_archive(filters):
+            return None
+        model = archive.ARCHIVES[self.get_serializer_class().Meta.model]
+        return model.objects.filter(user_id=self.request.user.id)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            model = self.get_serializer_class().Meta.model
+            try:
+                restored = archive.restore(model, self.request.user.id, self.kwargs[self.lookup_url_kwarg])
+            except (TypeError, ValueError, DjangoValidationError):
+                restored = False
+            if not restored:
+                raise
+        return super().get_object()
+
+    def bulk_querysets(self, queryset):
+        archived = self.get_archived_queryset(self.bulk_selection.get("filter", {}))
+        if archived is None:
+            return super().bulk_querysets(queryset)
+        return [*super().bulk_querysets(queryset), self.select_bulk(archived)]
+
+
+class LedgerWriteMixin:
+    """
+    Saves single rows for the authenticated user. The rows keep
+    `MonthlyRollup` in step and invalidate the user's cached reads
+    themselves (see `LedgerEntry`).
+    """
+
+    def perform_create(self, serializer):
+        with transaction.atomic(using=sharding.ledger_db()):
+            serializer.save(user_id=self.request.user.id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=sharding.ledger_db()):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(using=sharding.ledger_db()):
+            instance.delete()
+
+
+class BulkMixin:
+    """
+    Adds set-based routes on `<resource>/bulk`:
+
+    - POST validates a JSON array in one pass and inserts it with batched
+      `bulk_create` inside a single transaction. The request is
+      all-or-nothing: if any item is invalid nothing is saved and the
+      per-item errors are returned keyed by their position.
+    - PATCH applies the same `changes` to every selected row with one UPDATE.
+    - DELETE removes every selected row with one DELETE.
+
+    PATCH and DELETE select rows by `ids` or by `filter`, always within
+    `get_queryset()`, so users can only touch their own records.
+    """
+    bulk_max_items = 5000
+    bulk_batch_size = 500
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk', pagination_class=None)
+    def bulk_create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.data:
+            return Response({"detail": "Expected a non-empty list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_items:
+            return Response(
+                {"detail": f"A maximum of {self.bulk_max_items} items can be created at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errors = [
+                {"index": index, "errors": item_errors}
+                for index, item_errors in enumerate(serializer.errors)
+                if item_errors
+            ]
+            return Response({"detail": "Some items are invalid.", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = serializer.child.Meta.model
+        objs = [model(user_id=request.user.id, **item) for item in serializer.validated_data]
+        self.perform_bulk_create(objs)
+
+        return Response(self.get_serializer(objs, many=True).data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        queryset = self.get_bulk_queryset(request)
+
+        changes = request.data.get("changes")
+        if not isinstance(changes, dict) or not changes:
+            return Response({"changes": ["Expected a non-empty object of field changes."]}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=changes, partial=True)
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data:
+            return Response({"changes": ["No writable fields were provided."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = self.perform_bulk_update(queryset, serializer.validated_data)
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        queryset = self.get_bulk_queryset(request)
+        deleted = self.perform_bulk_destroy(queryset)
+        return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
+    def get_bulk_queryset(self, request):
+        queryset = self.get_queryset()
+        selection = BulkSelectionSerializer(data=request.data, context={"model": queryset.model})
+        selection.is_valid(raise_exception=True)
+
+        self.bulk_selection = selection.validated_data
+        return self.select_bulk(queryset)
+
+    def select_bulk(self, queryset):
+        """Narrow `queryset` to the rows picked by the validated `bulk_selection`."""
+        if "ids" in self.bulk_selection:
+            return queryset.filter(id__in=self.bulk_selection["ids"])
+        return apply_ledger_filters(queryset, self.bulk_selection["filter"])
+
+    def bulk_querysets(self, queryset):
+        """The selected rows of each table a bulk PATCH/DELETE writes to."""
+        return [queryset]
+
+    def perform_bulk_create(self, objs):
+        model = type(objs[0])
+        with transaction.atomic(using=sharding.ledger_db()):
+            model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+            rollups.record_created(objs)
+            cache.invalidate_user(self.request.user.id)
+
+    def perform_bulk_update(self, queryset, changes):
+        updated = 0
+        with transaction.atomic(using=sharding.ledger_db()):
+            for rows in self.bulk_querysets(queryset):
+                before = rollups.deltas_for_queryset(rows)
+                # QuerySet.update() bypasses auto_now, so stamp updated_at explicitly.
+                updated += rows.update(**changes, updated_at=timezone.now())
+                rollups.record_bulk_update(self.request.user.id, queryset.model, before, changes)
+            cache.invalidate_user(self.request.user.id)
+        return updated
+
+    def perform_bulk_destroy(self, queryset):
+        deleted = 0
+        with transaction.atomic(using=sharding.ledger_db()):
+            for rows in self.bulk_querysets(queryset):
+                rollups.apply_deltas(self.request.user.id, queryset.model, rollups.deltas_for_queryset(rows, sign=-1))
+                deleted += rows.delete()[0]
+            cache.invalidate_user(self.request.user.id)
+        return deleted
+
+
+class ExportMixin:
+    """
+    Adds `GET <resource>/export/csv` and `GET <resource>/export/ndjson`,
+    streaming the user's full (optionally filtered) history oldest first.
+    """
+    export_filename = "export"
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'export/(?P<fmt>csv|ndjson)',
+        url_name='export',
+        pagination_class=None,
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request, fmt, *args, **kwargs):
+        queryset = self.get_queryset()
+        query = LedgerFilterSerializer(data=request.query_params, context={"model": queryset.model})
+        query.is_valid(raise_exception=True)
+        querysets = [apply_ledger_filters(queryset, query.validated_data)]
+        archived = self.get_archived_queryset(query.validated_data)
+        if archived is not None:
+            querysets.append(apply_ledger_filters(archived, query.validated_data))
+        # The body streams after the view returns; fix the database chosen for this request now.
+        querysets = [queryset.using(queryset.db) for queryset in querysets]
+        return export_response(querysets, self.get_row_encoder(), fmt, self.export_filename)
+
+    def get_row_encoder(self):
+        return row_encoder(self.get_serializer_class())
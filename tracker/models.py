@@ -1,25 +1,96 @@
-from django.db import models
-import uuid
+import copy
+
+from django.db import models, router, transaction
 from accounts.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from utils.ids import uuid7
+from .fields import MoneyField
+
+
+
+
+# Ledger rows
+class LedgerEntry(models.Model):
+    """
+    Keeps `MonthlyRollup` in step with single-row `save()` and `delete()`,
+    and invalidates the user's cached responses, whoever calls them: the
+    viewsets, the admin or a shell. Both run on the row's own database,
+    which is activated as the shard for the duration. Set-based writes (`bulk_create`,
+    `QuerySet.update()`/`.delete()`) bypass these methods and must record
+    their deltas through `tracker.rollups` and call
+    `tracker.cache.invalidate_user` themselves.
+    """
+    ROLLUP_FIELDS = ("created_at", "amount")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored = instance._rollup_values()
+        return instance
+
+    def _rollup_values(self):
+        if any(field in self.get_deferred_fields() for field in self.ROLLUP_FIELDS):
+            return None
+        return {field: getattr(self, field) for field in self.ROLLUP_FIELDS}
+
+    def _stored_copy(self, using):
+        """This row as last stored, or None if it is not stored yet."""
+        stored = getattr(self, "_stored", None)
+        if stored is None:
+            stored = type(self)._base_manager.using(using).filter(pk=self.pk).values(*self.ROLLUP_FIELDS).first()
+            if stored is None:
+                return None
+        before = copy.copy(self)
+        before.__dict__.update(stored)
+        return before
+
+    def save(self, *args, **kwargs):
+        from . import cache, rollups, sharding
+
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with sharding.using_shard(using), transaction.atomic(using=using):
+            before = None if self._state.adding else self._stored_copy(using)
+            super().save(*args, **kwargs)
+            if before is None:
+                rollups.record_created([self])
+            else:
+                rollups.record_changed(before, self)
+            cache.invalidate_user(self.user_id)
+        self._stored = self._rollup_values()
 
+    def delete(self, using=None, keep_parents=False):
+        from . import cache, rollups, sharding
 
+        using = using or router.db_for_write(type(self), instance=self)
+        with sharding.using_shard(using), transaction.atomic(using=using):
+            stored = self._stored_copy(using)
+            result = super().delete(using=using, keep_parents=keep_parents)
+            if stored is not None:
+                rollups.record_deleted([stored])
+            cache.invalidate_user(self.user_id)
+        self._stored = None
+        return result
 
 
 # Income
-class Income(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incomes')
+class Income(LedgerEntry):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incomes', db_constraint=False)
     nameOfRevenue = models.CharField(max_length=255)
-    amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(1)])
-    created_at = models.DateTimeField(auto_now_add=True)
+    amount = MoneyField(max_digits=12, decimal_places=2, validators=[MinValueValidator(1)])
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=['user']),
+            models.Index(fields=['user', 'id']),
             models.Index(fields=['created_at']),
-            models.Index(fields=['user', 'created_at'])
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'amount']),
         ]
 
 
@@ -28,7 +99,7 @@ class Income(models.Model):
 
 
 # Expenditure
-class Expenditure(models.Model):
+class Expenditure(LedgerEntry):
 
     CATEGORY_CHOICES = [
         ('FOOD', 'Food & Groceries'),
@@ -40,23 +111,106 @@ class Expenditure(models.Model):
         ('EDUCATION', 'Education'),
         ('OTHER', 'Other'),
     ]
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expenditures")
+    ROLLUP_FIELDS = ("created_at", "amount", "category")
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expenditures", db_constraint=False)
     category = models.CharField(choices=CATEGORY_CHOICES, default='OTHER', max_length=20)
     nameOfItem = models.CharField(max_length=255)
-    amount = models.DecimalField(max_digits=6, decimal_places=2, validators=[MinValueValidator(1)])
-    created_at = models.DateTimeField(auto_now_add=True)
+    amount = MoneyField(max_digits=6, decimal_places=2, validators=[MinValueValidator(1)])
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     # indexing 
     class Meta:
         indexes = [
-            models.Index(fields=['user']),
+            models.Index(fields=['user', 'id']),
             models.Index(fields=['category']),
             models.Index(fields=['created_at']),
             models.Index(fields=['user', 'category']),
-            models.Index(fields=['user', 'created_at'])
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'amount']),
+            models.Index(fields=['user', 'category', 'created_at']),
         ]
         
     def __str__(self):
-        return f"{self.nameOfItem} - {self.amount}"
\ No newline at end of file
+        return f"{self.nameOfItem} - {self.amount}"
+
+# Monthly rollup
+class MonthlyRollup(models.Model):
+
+    INCOME = 'INCOME'
+    EXPENDITURE = 'EXPENDITURE'
+    KIND_CHOICES = [
+        (INCOME, 'Income'),
+        (EXPENDITURE, 'Expenditure'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rollups', db_constraint=False)
+    month = models.DateField()
+    kind = models.CharField(choices=KIND_CHOICES, max_length=20)
+    category = models.CharField(max_length=20, blank=True, default='')
+    total = MoneyField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'kind', 'category'], name='unique_monthly_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.kind} {self.category} - {self.total}"
+
+
+# Archive tier: rows older than the watermark, moved out of the hot tables
+# by `manage.py archive_ledger` (see tracker.archive). Same columns, one index.
+class ArchivedIncome(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_incomes', db_constraint=False)
+    nameOfRevenue = models.CharField(max_length=255)
+    amount = MoneyField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.nameOfRevenue} - {self.amount}"
+
+
+class ArchivedExpenditure(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_expenditures", db_constraint=False)
+    category = models.CharField(choices=Expenditure.CATEGORY_CHOICES, default='OTHER', max_length=20)
+    nameOfItem = models.CharField(max_length=255)
+    amount = MoneyField(max_digits=6, decimal_places=2)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.nameOfItem} - {self.amount}"
+
+
+class ArchiveWatermark(models.Model):
+    """Rows created before `archived_before` may be in the archive; one row, on the default database."""
+    archived_before = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# Shard assignment
+class ShardAssignment(models.Model):
+    """Which `TRACKER_SHARDS` alias holds a user's ledger; lives on the default database."""
+    user_id = models.UUIDField(primary_key=True)
+    alias = models.CharField(max_length=100)
+    moving = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
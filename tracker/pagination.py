@@ -0,0 +1,213 @@
+# tracker/pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering columns instead of
+    using OFFSET, so every page costs the same no matter how deep it is.
+
+    The cursor holds the ordering values of the last row on the page and
+    the next page is fetched with a row-value comparison against them.
+    The primary key is always the final ordering column, which keeps the
+    ordering total and stable under concurrent inserts.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, fetching the page with the async ORM."""
+        return self.finish_page([row async for row in self.page_queryset(queryset, request, view)])
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        `paginate_queryset` over several querysets selecting the same
+        columns, such as the hot and archived ledger rows: each supplies
+        its own next page and the pages are merged in order.
+        """
+        rows = [row for queryset in querysets for row in self.page_queryset(queryset, request, view)]
+        return self.finish_page(self.merge(rows))
+
+    async def apaginate_querysets(self, querysets, request, view=None):
+        rows = [row for queryset in querysets async for row in self.page_queryset(queryset, request, view)]
+        return self.finish_page(self.merge(rows))
+
+    def merge(self, rows):
+        # List orderings are one column plus `id`, both in the same direction.
+        return sorted(rows, key=self.get_position, reverse=self.ordering[0].startswith('-'))
+
+    def page_queryset(self, queryset, request, view=None):
+        """The unevaluated queryset for the requested page, plus one extra row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.seek_filter(self.position))
+
+        # Fetch one extra row to know whether a next page exists without a COUNT(*).
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = self.get_position(results[-1]) if self.has_next else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_content(self, results):
+        """
+        The `get_paginated_response` document as compact JSON bytes, built
+        from results that are already encoded JSON objects.
+        """
+        next_link = json.dumps(self.get_next_link(), ensure_ascii=False)
+        return ('{"next":%s,"results":[%s]}' % (next_link, ','.join(results))).encode('utf-8')
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id',) if ordering[-1].startswith('-') else ('id',)
+        return ordering
+
+    def get_position(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def seek_filter(self, position):
+        """
+        Build `(a, b, c) > (x, y, z)` (or `<` for descending columns)
+        as nested OR/AND conditions the index can satisfy as a range scan.
+        """
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            name = field.lstrip('-')
+            lookup = '%s__lt' % name if field.startswith('-') else '%s__gt' % name
+            if condition is None:
+                condition = Q(**{lookup: value})
+            else:
+                condition = Q(**{lookup: value}) | (Q(**{name: value}) & condition)
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def encode_cursor(self, position):
+        payload = json.dumps([str(value) for value in position], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Keyset pagination over full-text hits: seeks on the FTS `(rank, rowid)`
+    of the last hit instead of model columns. Ranks drift as the index
+    changes, so `search.search` re-reads the last hit's rank by rowid.
+    """
+    ordering = ('rank', 'rowid')
+
+    def paginate_search(self, request, run_search):
+        """`run_search(after, limit)` returns hits ordered by `(rank, rowid)`."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.position = self.decode_search_cursor(request)
+
+        hits = run_search(self.position, self.page_size + 1)
+        self.has_next = len(hits) > self.page_size
+        hits = hits[:self.page_size]
+        self.next_position = (hits[-1].rank, hits[-1].rowid) if self.has_next else None
+        return hits
+
+    def decode_search_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            rank, rowid = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            return float(rank), int(rowid)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
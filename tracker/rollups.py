@@ -0,0 +1,158 @@
+# tracker/rollups.py
+"""
+Incremental maintenance of `MonthlyRollup`.
+
+Single-row saves and deletes record their change from the model itself
+(`LedgerEntry`), and every set-based write path in the tracker views
+calls into this module, each inside the same transaction as the write,
+so the rollup rows always agree with the committed ledger. Deltas are keyed by `(month, category)` and
+carry `(total, count)` changes for one user and one kind.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import sharding
+from .archive import ARCHIVES
+from .models import Income, Expenditure, ArchivedExpenditure, MonthlyRollup
+
+
+TOTAL_FIELD = MonthlyRollup._meta.get_field('total')
+
+KIND_BY_MODEL = {
+    Income: MonthlyRollup.INCOME,
+    Expenditure: MonthlyRollup.EXPENDITURE,
+}
+
+
+def month_of(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _category(obj):
+    return getattr(obj, 'category', '')
+
+
+def deltas_for_objects(objs, sign=1):
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for obj in objs:
+        delta = deltas[(month_of(obj.created_at), _category(obj))]
+        delta[0] += sign * Decimal(obj.amount)
+        delta[1] += sign
+    return deltas
+
+
+def deltas_for_queryset(queryset, sign=1):
+    """Group the selected rows in the database instead of loading them."""
+    group_by = ['month', 'category'] if queryset.model in (Expenditure, ArchivedExpenditure) else ['month']
+    rows = (
+        queryset.order_by()
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values(*group_by)
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for row in rows:
+        delta = deltas[(row['month'], row.get('category', ''))]
+        delta[0] += sign * row['total']
+        delta[1] += sign * row['count']
+    return deltas
+
+
+def apply_deltas(user_id, model, deltas):
+    kind = KIND_BY_MODEL[model]
+    for (month, category), (total, count) in deltas.items():
+        if not total and not count:
+            continue
+        key = {'user_id': user_id, 'month': month, 'kind': kind, 'category': category}
+        # Typed as the column so the delta is sent in minor units too.
+        increment = {'total': F('total') + Value(total, output_field=TOTAL_FIELD), 'count': F('count') + count}
+        updated = MonthlyRollup.objects.filter(**key).update(**increment)
+        if updated:
+            continue
+        try:
+            with transaction.atomic(using=sharding.ledger_db()):
+                MonthlyRollup.objects.create(**key, total=total, count=count)
+        except IntegrityError:
+            # A concurrent writer created the row first; fold into it instead.
+            MonthlyRollup.objects.filter(**key).update(**increment)
+
+
+def record_created(objs):
+    objs = list(objs)
+    if objs:
+        apply_deltas(objs[0].user_id, type(objs[0]), deltas_for_objects(objs))
+
+
+def record_deleted(objs):
+    objs = list(objs)
+    if objs:
+        apply_deltas(objs[0].user_id, type(objs[0]), deltas_for_objects(objs, sign=-1))
+
+
+def record_changed(before, after):
+    """`before` is a snapshot of the row taken before `after` was saved."""
+    deltas = deltas_for_objects([before], sign=-1)
+    for key, (total, count) in deltas_for_objects([after]).items():
+        deltas[key][0] += total
+        deltas[key][1] += count
+    apply_deltas(after.user_id, type(after), deltas)
+
+
+def record_bulk_update(user_id, model, before, changes):
+    """
+    Fold a set-based UPDATE into the rollups. `before` holds the
+    per-group deltas of the selected rows captured before the UPDATE
+    ran; every row in a group receives the same `changes`, so the new
+    groups follow without reading the rows again.
+    """
+    if 'amount' not in changes and 'category' not in changes:
+        return
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for (month, category), (total, count) in before.items():
+        deltas[(month, category)][0] -= total
+        deltas[(month, category)][1] -= count
+        new_key = (month, changes.get('category', category))
+        deltas[new_key][0] += changes['amount'] * count if 'amount' in changes else total
+        deltas[new_key][1] += count
+    apply_deltas(user_id, model, deltas)
+
+
+def expected_rollups(user_id):
+    """Recompute a user's rollups from raw rows: `{(month, kind, category): (total, count)}`."""
+    expected = {}
+    for model, kind in KIND_BY_MODEL.items():
+        # Archived rows still count (see tracker.archive).
+        deltas = deltas_for_queryset(model.objects.filter(user_id=user_id))
+        for key, (total, count) in deltas_for_queryset(ARCHIVES[model].objects.filter(user_id=user_id)).items():
+            deltas[key][0] += total
+            deltas[key][1] += count
+        for (month, category), (total, count) in deltas.items():
+            expected[(month, kind, category)] = (total, count)
+    return expected
+
+
+def stored_rollups(user_id):
+    return {
+        (row.month, row.kind, row.category): (row.total, row.count)
+        for row in MonthlyRollup.objects.filter(user_id=user_id, count__gt=0)
+    }
+
+
+def rebuild_user(user_id):
+    with transaction.atomic(using=sharding.ledger_db()):
+        # Delete before aggregating: the delete takes the write lock (SQLite)
+        # or locks the user's rollup rows, so a concurrent write either
+        # committed before the aggregate and is counted, or applies its delta
+        # to the rebuilt rows once this transaction commits.
+        MonthlyRollup.objects.filter(user_id=user_id).delete()
+        expected = expected_rollups(user_id)
+        MonthlyRollup.objects.bulk_create([
+            MonthlyRollup(user_id=user_id, month=month, kind=kind, category=category, total=total, count=count)
+            for (month, kind, category), (total, count) in expected.items()
+        ])
+    return expected
@@ -0,0 +1,125 @@
+# tracker/routers.py
+"""
+Database routing for the tracker: read replicas and user shards.
+
+`ReplicaRouter` sends reads of tracker models to one of the
+`TRACKER_REPLICA_DATABASES` aliases, the same one for the whole
+context, but only while replica reads are enabled for it (see
+`ReplicaReadMixin`, which enables them for safe requests). Writes, other apps' models and all code outside
+such a request go to the primary, so the router is inert until a view
+opts in.
+
+Replicas lag behind the primary. A user whose write just committed is
+pinned to the primary for `TRACKER_READ_YOUR_WRITES_SECONDS` (see
+`tracker.cache.pin_reads_to_primary`), so they always see their own
+changes. The pin lives in the tracker cache, so replicas are only used
+when that cache is shared by every worker (see `utils.caches`); with a
+per-process cache another worker would not see the pin and could serve
+the user a stale read.
+
+`ShardRouter` sends tracker models to the shard activated for the
+current context (see `tracker.sharding`), and keeps `accounts`,
+`ShardAssignment` and `ArchiveWatermark` on the default database. It comes first in
+`DATABASE_ROUTERS`; on the default shard it defers reads to
+`ReplicaRouter`.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from utils.caches import is_shared
+from . import sharding
+
+
+# The replica reads in the current context go to, if any
+_replica = contextvars.ContextVar("tracker_replica", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "TRACKER_REPLICA_DATABASES", []))
+
+
+def replicas_enabled():
+    return bool(replica_aliases()) and is_shared(getattr(settings, "TRACKER_CACHE_ALIAS", "default"))
+
+
+def enable_replica_reads():
+    """
+    Route tracker reads in the current context to one replica, picked
+    now so every query of the request sees the same replication lag;
+    returns a token for `reset_replica_reads`.
+    """
+    return _replica.set(random.choice(replica_aliases()) if replicas_enabled() else None)
+
+
+def reset_replica_reads(token):
+    _replica.reset(token)
+
+
+class ReplicaRouter:
+    app_label = "tracker"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ShardRouter:
+    app_label = "tracker"
+    global_models = {"shardassignment", "archivewatermark"}
+
+    def _is_ledger(self, model):
+        return model._meta.app_label == self.app_label and model._meta.model_name not in self.global_models
+
+    def _shard(self, model, hints):
+        if model._meta.app_label == self.app_label and not self._is_ledger(model):
+            return DEFAULT_DB_ALIAS
+        if not self._is_ledger(model):
+            return None
+        alias = sharding.active_shard()
+        if alias or not sharding.is_sharded():
+            return alias
+        # Outside a request: follow the instance being saved or deleted. A new
+        # row's `_state.db` is only copied from its user, who lives on the default.
+        instance = hints.get("instance")
+        if instance is not None and getattr(instance, "user_id", None):
+            if instance._state.adding:
+                return sharding.shard_for_user(instance.user_id)
+            return instance._state.db or sharding.shard_for_user(instance.user_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        alias = self._shard(model, hints)
+        if alias == DEFAULT_DB_ALIAS and self._is_ledger(model):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ledger rows point at users on the default database.
+        databases = {*sharding.shard_aliases(), *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not sharding.is_sharded() or db not in sharding.shard_aliases():
+            return None
+        if app_label == self.app_label and model_name not in self.global_models:
+            return True
+        return db == DEFAULT_DB_ALIAS
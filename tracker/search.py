@@ -0,0 +1,261 @@
+# tracker/search.py
+"""
+Full-text search over income and expenditure names.
+
+On SQLite the names live in the FTS5 table `tracker_search`, one row per
+record, kept in sync by triggers on the ledger tables, so every write
+path (ORM saves, bulk_create, queryset updates and deletes, cascades)
+updates it without extra application code. The owner and record IDs are
+indexed as tokens, which scopes each match to one user through the
+full-text index itself and lets the triggers find a record's row
+without a scan.
+
+Archived rows (see `tracker.archive`) stay searchable: the archive
+tables carry the same triggers, and a row moving between a ledger table
+and its archive keeps its index entry, because each trigger skips rows
+that also exist in the twin table at that moment.
+
+Other databases fall back to `icontains` on the name columns.
+"""
+import re
+import uuid
+from dataclasses import dataclass
+
+from django.db import connections
+
+from . import sharding
+from .models import Income, Expenditure, ArchivedIncome, ArchivedExpenditure
+
+
+SEARCH_TABLE = "tracker_search"
+MAX_TERMS = 8
+
+INCOME = "income"
+EXPENDITURE = "expenditure"
+
+SOURCES = {
+    INCOME: (Income, "nameOfRevenue"),
+    EXPENDITURE: (Expenditure, "nameOfItem"),
+}
+
+ARCHIVED = {
+    INCOME: ArchivedIncome,
+    EXPENDITURE: ArchivedExpenditure,
+}
+
+TERM = re.compile(r"\w+")
+
+
+@dataclass
+class Hit:
+    kind: str
+    record_id: uuid.UUID
+    rank: float
+    rowid: int
+
+
+def is_supported(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+# ---------------- Schema ----------------
+def _owner_token(user_id):
+    return f"u{uuid.UUID(str(user_id)).hex}"
+
+
+def _tables(kind, using):
+    """The ledger model of `kind` and, once migrated, its archive, paired with the other one as twin."""
+    model, archived = SOURCES[kind][0], ARCHIVED[kind]
+    if archived._meta.db_table not in connections[using].introspection.table_names():
+        return [(model, None)]
+    return [(model, archived), (archived, model)]
+
+
+def _trigger_sql(kind, model, twin):
+    name_field = SOURCES[kind][1]
+    table = model._meta.db_table
+    name = model._meta.get_field(name_field).column
+    user = model._meta.get_field("user").column
+    insert = (
+        f"INSERT INTO {SEARCH_TABLE}(name, owner, kind, record) "
+        f"VALUES (new.\"{name}\", 'u' || new.\"{user}\", '{kind}', new.id);"
+    )
+    delete = f"DELETE FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'record:\"' || old.id || '\"';"
+    # Archiving or restoring a row inserts it into the twin before deleting it here.
+    insert_when = delete_when = ""
+    if twin is not None:
+        insert_when = f"WHEN NOT EXISTS (SELECT 1 FROM {twin._meta.db_table} WHERE id = new.id) "
+        delete_when = f"WHEN NOT EXISTS (SELECT 1 FROM {twin._meta.db_table} WHERE id = old.id) "
+    return [
+        f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} {insert_when}BEGIN {insert} END",
+        f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} {delete_when}BEGIN {delete} END",
+        f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF \"{name}\", \"{user}\" ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def _drop_triggers(cursor, model):
+    for suffix in ("ai", "ad", "au"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {model._meta.db_table}_search_{suffix}")
+
+
+def install(using="default"):
+    """
+    Create the FTS table if it is missing and (re)create its triggers.
+    Safe to run repeatedly; it also runs after every `migrate`, because
+    SQLite table rebuilds done by later migrations drop the triggers.
+    """
+    if not is_supported(using):
+        return
+    tables = {kind: _tables(kind, using) for kind in SOURCES}
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "name, owner, kind, record, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # Rank on the name only; the other columns are used for filtering.
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 0.0, 0.0, 0.0)')")
+        for kind, pairs in tables.items():
+            for model, twin in pairs:
+                _drop_triggers(cursor, model)
+                for statement in _trigger_sql(kind, model, twin):
+                    cursor.execute(statement)
+
+
+def drop_triggers(using="default"):
+    """
+    Remove the triggers but keep the index. Runs before `migrate`: SQLite
+    cannot rebuild a ledger table while its twin's triggers refer to it.
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        for kind, (model, _) in SOURCES.items():
+            _drop_triggers(cursor, model)
+            _drop_triggers(cursor, ARCHIVED[kind])
+
+
+def uninstall(using="default"):
+    if not is_supported(using):
+        return
+    drop_triggers(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def rebuild(user_id=None, using="default"):
+    """
+    Repopulate the index from the ledger tables, for everyone or for one
+    user. Each kind is copied with a single INSERT ... SELECT, so rows
+    never pass through Python. Returns the number of indexed records.
+    """
+    install(using)
+    indexed = 0
+    tables = [(kind, model) for kind in SOURCES for model, _ in _tables(kind, using)]
+    with connections[using].cursor() as cursor:
+        if user_id is None:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        else:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [f'owner:"{_owner_token(user_id)}"'])
+        for kind, model in tables:
+            table = model._meta.db_table
+            name = model._meta.get_field(SOURCES[kind][1]).column
+            user = model._meta.get_field("user").column
+            sql = (
+                f"INSERT INTO {SEARCH_TABLE}(name, owner, kind, record) "
+                f"SELECT \"{name}\", 'u' || \"{user}\", '{kind}', id FROM {table}"
+            )
+            params = []
+            if user_id is not None:
+                sql += f" WHERE \"{user}\" = %s"
+                params.append(uuid.UUID(str(user_id)).hex)
+            cursor.execute(sql, params)
+            indexed += cursor.rowcount
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+# ---------------- Queries ----------------
+def terms(query):
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def match_expression(user_id, query, kind=None):
+    """
+    Every term must prefix-match a word of the name, within the user's
+    own records. Terms are quoted so user input can never be read as
+    FTS5 query syntax.
+    """
+    parts = [f'owner:"{_owner_token(user_id)}"']
+    if kind is not None:
+        parts.append(f'kind:"{kind}"')
+    parts.extend(f'name:"{term}"*' for term in terms(query))
+    return " AND ".join(parts)
+
+
+def search(user_id, query, kind=None, after=None, limit=50):
+    """
+    Return up to `limit` hits, best first. `after` is the `(rank, rowid)`
+    of the last hit on the previous page.
+
+    bm25 scores depend on the whole index, so any write, even another
+    user's, rescales them between pages. The page therefore continues
+    after the last hit's current score, re-read by its rowid, rather than
+    the score the client was sent; the stored score is only used once
+    that record has left the index. Relative order, and so the walk, is
+    stable unless the changes reorder the user's own matches.
+    """
+    if not is_supported():
+        return _search_fallback(user_id, query, kind, after, limit)
+
+    match = match_expression(user_id, query, kind)
+    sql = f"SELECT kind, record, rank, rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+    params = [match]
+    with connections[sharding.ledger_db()].cursor() as cursor:
+        if after is not None:
+            rank, rowid = after
+            cursor.execute(f"SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = %s", [match, rowid])
+            row = cursor.fetchone()
+            if row is not None:
+                rank = row[0]
+            sql += " AND (rank > %s OR (rank = %s AND rowid > %s))"
+            params += [rank, rank, rowid]
+        sql += " ORDER BY rank, rowid LIMIT %s"
+        params.append(limit)
+
+        cursor.execute(sql, params)
+        return [Hit(kind, uuid.UUID(record), rank, rowid) for kind, record, rank, rowid in cursor.fetchall()]
+
+
+def _search_fallback(user_id, query, kind, after, limit):
+    # Without FTS there is no relevance score: newest first, and the
+    # position in that ordering stands in for the rowid in the cursor.
+    offset = after[1] if after is not None else 0
+    hits = []
+    for source_kind, (model, name_field) in SOURCES.items():
+        if kind is not None and kind != source_kind:
+            continue
+        for source in (model, ARCHIVED[source_kind]):
+            queryset = source.objects.filter(user_id=user_id)
+            for term in terms(query):
+                queryset = queryset.filter(**{f"{name_field}__icontains": term})
+            hits += [(created_at, source_kind, pk) for pk, created_at in queryset.values_list("id", "created_at")]
+    hits.sort(key=lambda hit: hit[0], reverse=True)
+    return [
+        Hit(source_kind, pk, 0.0, position)
+        for position, (_, source_kind, pk) in enumerate(hits[offset:offset + limit], start=offset + 1)
+    ]
+
+
+def load_records(user_id, hits):
+    """Fetch the model instances behind `hits`, in hit order, skipping any that vanished."""
+    found = {}
+    for kind, (model, _) in SOURCES.items():
+        ids = [hit.record_id for hit in hits if hit.kind == kind]
+        if ids:
+            found[kind] = model.objects.filter(user_id=user_id).in_bulk(ids)
+            archived = [pk for pk in ids if pk not in found[kind]]
+            if archived:
+                found[kind].update(ARCHIVED[kind].objects.filter(user_id=user_id).in_bulk(archived))
+    return [(hit, found[hit.kind][hit.record_id]) for hit in hits if hit.record_id in found.get(hit.kind, {})]
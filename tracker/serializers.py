@@ -1,9 +1,21 @@
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from tracker.models import Income, Expenditure
+from tracker import search
+
+
+class SparseFieldsSerializer(ModelSerializer):
+    """Pass `fields=[...]` to limit the output to those fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 # Income
-class IncomeSerializer(ModelSerializer):
+class IncomeSerializer(SparseFieldsSerializer):
     class Meta:
         model = Income
         fields = ["id", "nameOfRevenue", "amount", "created_at", "updated_at"]
@@ -11,8 +23,132 @@ class IncomeSerializer(ModelSerializer):
 
 
 # Expenditure
-class ExpenditureSerializer(ModelSerializer):
+class ExpenditureSerializer(SparseFieldsSerializer):
     class Meta:
         model = Expenditure
         fields = ["id", "category", "nameOfItem", "amount", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
+
+
+# Ledger filters
+class LedgerFilterSerializer(serializers.Serializer):
+    category = serializers.ListField(
+        child=serializers.ChoiceField(choices=Expenditure.CATEGORY_CHOICES),
+        required=False,
+        allow_empty=False,
+    )
+    created_after = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+    created_before = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+    min_amount = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    max_amount = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+
+    def validate(self, attrs):
+        model = self.context.get("model")
+        if "category" in attrs and model is not None and model is not Expenditure:
+            raise serializers.ValidationError({"category": ["Only expenditures can be filtered by category."]})
+
+        created_after = attrs.get("created_after")
+        created_before = attrs.get("created_before")
+        if created_after and created_before and created_after >= created_before:
+            raise serializers.ValidationError({"created_before": ["Must be later than created_after."]})
+
+        min_amount = attrs.get("min_amount")
+        max_amount = attrs.get("max_amount")
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise serializers.ValidationError({"max_amount": ["Must not be less than min_amount."]})
+        return attrs
+
+
+class ListQuerySerializer(LedgerFilterSerializer):
+    ordering = serializers.ChoiceField(choices=["created_at", "-created_at", "amount", "-amount", "id", "-id"], default="-created_at")
+
+
+# Bulk update / delete selection
+class BulkSelectionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False, max_length=5000)
+    filter = LedgerFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either `ids` or `filter`, but not both.")
+        if "filter" in attrs and not attrs["filter"]:
+            raise serializers.ValidationError({"filter": ["At least one filter is required."]})
+        return attrs
+
+
+# Summary
+class SummaryQuerySerializer(LedgerFilterSerializer):
+    period = serializers.ChoiceField(choices=["day", "week", "month"], default="month")
+
+
+class SummaryTotalsSerializer(serializers.Serializer):
+    income = serializers.DecimalField(max_digits=20, decimal_places=2)
+    expenditure = serializers.DecimalField(max_digits=20, decimal_places=2)
+    net = serializers.DecimalField(max_digits=20, decimal_places=2)
+    income_count = serializers.IntegerField()
+    expenditure_count = serializers.IntegerField()
+
+
+class SummaryPeriodSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    income = serializers.DecimalField(max_digits=20, decimal_places=2)
+    expenditure = serializers.DecimalField(max_digits=20, decimal_places=2)
+    net = serializers.DecimalField(max_digits=20, decimal_places=2)
+    income_count = serializers.IntegerField()
+    expenditure_count = serializers.IntegerField()
+
+
+class SummaryCategorySerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=Expenditure.CATEGORY_CHOICES)
+    total = serializers.DecimalField(max_digits=20, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class SummarySerializer(serializers.Serializer):
+    period = serializers.CharField()
+    totals = SummaryTotalsSerializer()
+    periods = SummaryPeriodSerializer(many=True)
+    categories = SummaryCategorySerializer(many=True)
+
+
+# Statement import
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ofx"], required=False)
+
+    def validate(self, attrs):
+        if "file_format" not in attrs:
+            extension = attrs["file"].name.rsplit(".", 1)[-1].lower()
+            if extension not in ("csv", "ofx", "qfx"):
+                raise serializers.ValidationError({"file_format": ["Could not tell the format from the file name; pass csv or ofx."]})
+            attrs["file_format"] = "csv" if extension == "csv" else "ofx"
+        return attrs
+
+
+class StatementImportReportSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    imported = serializers.DictField(child=serializers.IntegerField())
+    rejected = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+# Search
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    kind = serializers.ChoiceField(choices=["income", "expenditure"], required=False)
+
+    def validate_q(self, value):
+        if not search.terms(value):
+            raise serializers.ValidationError("Enter at least one word to search for.")
+        return value
+
+
+class SearchHitSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=["income", "expenditure"])
+    score = serializers.FloatField(help_text="Relevance; lower is a better match.")
+    record = serializers.DictField(help_text="The income or expenditure record, as returned by its detail endpoint.")
+
+
+class SearchResultsSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    results = SearchHitSerializer(many=True)
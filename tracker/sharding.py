@@ -0,0 +1,242 @@
+# tracker/sharding.py
+"""
+User-hash sharding of the ledger tables.
+
+Every income, expenditure and rollup row belongs to exactly one user, so
+a user's whole ledger lives on one of the `TRACKER_SHARDS` database
+aliases, while `accounts.User` and `ShardAssignment` stay on the default
+(global) database. With a single shard (the default configuration)
+everything here is a no-op.
+
+Placement:
+
+- Users created while sharding is on get a `ShardAssignment` to the
+  shard their ID hashes to.
+- Users without an assignment (created before sharding was turned on)
+  live on the first shard.
+- `manage.py rebalance_shards` moves users between shards, online
+  (see `move_user`).
+
+Views activate the user's shard for the duration of a request (see
+`ShardMixin`); `tracker.routers.ShardRouter` then sends every tracker
+query to it, and write paths open their transactions with
+`transaction.atomic(using=ledger_db())`. Lookups are cached in the
+tracker cache for `TRACKER_SHARD_CACHE_SECONDS`, so in a multi-process
+deployment that cache must be shared.
+"""
+import contextlib
+import contextvars
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import cache
+from .models import Income, Expenditure, ArchivedIncome, ArchivedExpenditure, MonthlyRollup, ShardAssignment
+
+
+_active_shard = contextvars.ContextVar("tracker_shard", default=None)
+
+LEDGER_MODELS = [Income, Expenditure, ArchivedIncome, ArchivedExpenditure]
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Your data is being moved. Please retry in a few seconds."
+    default_code = "shard_moving"
+
+
+def shard_aliases():
+    return list(getattr(settings, "TRACKER_SHARDS", None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def hashed_shard(user_id):
+    aliases = shard_aliases()
+    return aliases[uuid.UUID(str(user_id)).int % len(aliases)]
+
+
+def _cache_timeout():
+    return getattr(settings, "TRACKER_SHARD_CACHE_SECONDS", 10)
+
+
+def _cache_key(user_id):
+    return f"tracker:shard:{user_id}"
+
+
+def _placement(user_id):
+    """`(alias, moving)` for the user, from the cache or `ShardAssignment`."""
+    placement = cache.get_cache().get(_cache_key(user_id))
+    if placement is None:
+        row = ShardAssignment.objects.filter(user_id=user_id).values_list("alias", "moving").first()
+        placement = tuple(row) if row else (shard_aliases()[0], False)
+        cache.get_cache().set(_cache_key(user_id), placement, timeout=_cache_timeout())
+    return placement
+
+
+def forget_placement(user_id):
+    cache.get_cache().delete(_cache_key(user_id))
+
+
+def shard_for_user(user_id, for_write=False):
+    """The alias holding the user's ledger. Writes fail with `ShardMoving` while it is being moved."""
+    if not is_sharded():
+        return shard_aliases()[0]
+    alias, moving = _placement(user_id)
+    if for_write and moving:
+        raise ShardMoving()
+    return alias
+
+
+def assign(user_id):
+    """Place a new user on the shard their ID hashes to."""
+    ShardAssignment.objects.create(user_id=user_id, alias=hashed_shard(user_id))
+
+
+def delete_user(user_id):
+    """Remove a deleted user's ledger and assignment from their shard."""
+    alias, _ = _placement(user_id)
+    for model in [*LEDGER_MODELS, MonthlyRollup]:
+        model.objects.using(alias).filter(user_id=user_id).delete()
+    ShardAssignment.objects.filter(user_id=user_id).delete()
+    forget_placement(user_id)
+
+
+def activate(alias):
+    """Route tracker queries in the current context to `alias`; returns a token for `deactivate`."""
+    return _active_shard.set(alias)
+
+
+def deactivate(token):
+    _active_shard.reset(token)
+
+
+@contextlib.contextmanager
+def using_shard(alias):
+    """Run the block against `alias`."""
+    token = activate(alias)
+    try:
+        yield alias
+    finally:
+        deactivate(token)
+
+
+@contextlib.contextmanager
+def user_shard(user_id, for_write=False):
+    """Run the block against the user's shard; for scripts and commands."""
+    with using_shard(shard_for_user(user_id, for_write=for_write)) as alias:
+        yield alias
+
+
+def active_shard():
+    return _active_shard.get()
+
+
+def ledger_db():
+    """The alias tracker writes go to in the current context: the active shard, else the default database."""
+    return _active_shard.get() or DEFAULT_DB_ALIAS
+
+
+# ---------------- Moving users ----------------
+def _copy(model, source, target, ids, batch_size):
+    """Insert the given rows from `source` into `target` unchanged (auto_now fields included)."""
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic(using=target):
+            for obj in model.objects.using(source).filter(pk__in=ids[start:start + batch_size]):
+                obj.save_base(raw=True, force_insert=True, using=target)
+
+
+def _delete(model, using, user_id, batch_size, ids=None):
+    queryset = model.objects.using(using).filter(user_id=user_id)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    deleted = 0
+    while True:
+        batch = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        with transaction.atomic(using=using):
+            deleted += model.objects.using(using).filter(pk__in=batch).delete()[0]
+
+
+def _sync_ledger(model, user_id, source, target, batch_size):
+    """Make the user's `model` rows on `target` equal to those on `source`; returns the number copied."""
+    wanted = dict(model.objects.using(source).filter(user_id=user_id).values_list("pk", "updated_at"))
+    present = dict(model.objects.using(target).filter(user_id=user_id).values_list("pk", "updated_at"))
+    stale = [pk for pk, updated_at in present.items() if wanted.get(pk) != updated_at]
+    _delete(model, target, user_id, batch_size, ids=stale)
+    missing = [pk for pk in wanted if pk not in present or pk in stale]
+    _copy(model, source, target, missing, batch_size)
+    return len(missing)
+
+
+def _sync_rollups(user_id, source, target):
+    # A handful of rows per user; their integer keys are per database, so copy without them.
+    rows = list(MonthlyRollup.objects.using(source).filter(user_id=user_id))
+    with transaction.atomic(using=target):
+        MonthlyRollup.objects.using(target).filter(user_id=user_id).delete()
+        for row in rows:
+            row.pk = None
+        MonthlyRollup.objects.using(target).bulk_create(rows)
+
+
+def _sync(user_id, source, target, batch_size):
+    copied = sum(_sync_ledger(model, user_id, source, target, batch_size) for model in LEDGER_MODELS)
+    _sync_rollups(user_id, source, target)
+    return copied
+
+
+def move_user(user_id, target, batch_size=500, grace=None, log=None):
+    """
+    Move a user's ledger to the `target` shard while the API keeps
+    serving them:
+
+    1. Copy every row to the target in batches; reads and writes continue
+       on the source meanwhile.
+    2. Mark the user as moving. Their writes get 503 (`ShardMoving`);
+       wait `grace` seconds so every process sees the mark.
+    3. Copy what changed during step 1, then point the assignment at the
+       target.
+    4. Wait `grace` seconds for in-flight reads, then delete the rows
+       from the source in batches.
+
+    Returns the source alias. `grace` defaults to the placement cache
+    lifetime.
+    """
+    if target not in shard_aliases():
+        raise ValueError(f"{target!r} is not one of TRACKER_SHARDS.")
+    grace = _cache_timeout() if grace is None else grace
+    log = log or (lambda message: None)
+    forget_placement(user_id)
+    source = shard_for_user(user_id)
+    if source == target:
+        return source
+
+    log(f"{user_id}: copying {source} -> {target}")
+    _sync(user_id, source, target, batch_size)
+
+    assignment, _ = ShardAssignment.objects.update_or_create(user_id=user_id, defaults={"alias": source, "moving": True})
+    forget_placement(user_id)
+    try:
+        time.sleep(grace)
+        copied = _sync(user_id, source, target, batch_size)
+        log(f"{user_id}: {copied} rows changed during the copy")
+        assignment.alias = target
+    finally:
+        assignment.moving = False
+        assignment.save(update_fields=["alias", "moving", "updated_at"])
+        forget_placement(user_id)
+    cache.bump_generation(user_id)
+
+    time.sleep(grace)
+    for model in [*LEDGER_MODELS, MonthlyRollup]:
+        _delete(model, source, user_id, batch_size)
+    log(f"{user_id}: moved to {target}")
+    return source
@@ -0,0 +1,165 @@
+# tracker/summary.py
+from collections import defaultdict
+from datetime import time
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from . import archive
+from .filters import apply_ledger_filters
+from .models import Income, Expenditure, MonthlyRollup
+
+
+TRUNCATE = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+ZERO = Decimal("0.00")
+
+
+def _totals_by_period(queryset, period):
+    """One GROUP BY over the `(user, created_at)` index."""
+    bucket = TRUNCATE[period]("created_at", output_field=DateField())
+    rows = (
+        queryset.annotate(period=bucket)
+        .values("period")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by("period")
+    )
+    return {row["period"]: (row["total"], row["count"]) for row in rows}
+
+
+def _add_totals(totals, more):
+    for key, (total, count) in more.items():
+        previous_total, previous_count = totals.get(key, (ZERO, 0))
+        totals[key] = (previous_total + total, previous_count + count)
+    return totals
+
+
+def _totals_by_category(queryset):
+    """One GROUP BY over the `(user, category)` index."""
+    rows = (
+        queryset.values("category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by("category")
+    )
+    return [{"category": row["category"], "total": row["total"], "count": row["count"]} for row in rows]
+
+
+def _is_month_boundary(value):
+    local = timezone.localtime(value)
+    return local.day == 1 and local.time() == time(0)
+
+
+def _can_use_rollups(period, filters):
+    return (
+        period == "month"
+        and "min_amount" not in filters
+        and "max_amount" not in filters
+        and all(_is_month_boundary(filters[key]) for key in ("created_after", "created_before") if key in filters)
+    )
+
+
+def _rollup_buckets(user, filters):
+    """
+    Read month buckets from `MonthlyRollup`, which is O(months) rather
+    than O(rows). Only valid when the date range falls on month boundaries.
+    """
+    rollups = MonthlyRollup.objects.filter(user_id=user.id, count__gt=0)
+    if "created_after" in filters:
+        rollups = rollups.filter(month__gte=timezone.localtime(filters["created_after"]).date())
+    if "created_before" in filters:
+        rollups = rollups.filter(month__lt=timezone.localtime(filters["created_before"]).date())
+    if "category" in filters:
+        rollups = rollups.filter(
+            Q(kind=MonthlyRollup.INCOME) | Q(kind=MonthlyRollup.EXPENDITURE, category__in=filters["category"])
+        )
+
+    income_by_period = {}
+    expenditure_by_period = defaultdict(lambda: (ZERO, 0))
+    by_category = defaultdict(lambda: (ZERO, 0))
+    for row in rollups:
+        if row.kind == MonthlyRollup.INCOME:
+            income_by_period[row.month] = (row.total, row.count)
+        else:
+            total, count = expenditure_by_period[row.month]
+            expenditure_by_period[row.month] = (total + row.total, count + row.count)
+            total, count = by_category[row.category]
+            by_category[row.category] = (total + row.total, count + row.count)
+
+    categories = [
+        {"category": category, "total": total, "count": count}
+        for category, (total, count) in sorted(by_category.items())
+    ]
+    return income_by_period, dict(expenditure_by_period), categories
+
+
+def build_summary(user, period="month", filters=None):
+    """
+    Aggregate a user's ledger in the database: income, expenditure and
+    net balance per `period` bucket, plus expenditure per category.
+    `filters` is validated `LedgerFilterSerializer` data; a category
+    filter only narrows expenditures.
+
+    Monthly summaries over whole months are served from `MonthlyRollup`;
+    anything finer is grouped from the raw rows, including archived ones
+    when the range reaches back past the archive watermark.
+    """
+    filters = filters or {}
+
+    if _can_use_rollups(period, filters):
+        income_by_period, expenditure_by_period, categories = _rollup_buckets(user, filters)
+    else:
+        income_filters = {key: value for key, value in filters.items() if key != "category"}
+        incomes = apply_ledger_filters(Income.objects.filter(user_id=user.id), income_filters)
+        expenditures = apply_ledger_filters(Expenditure.objects.filter(user_id=user.id), filters)
+
+        income_by_period = _totals_by_period(incomes, period)
+        expenditure_by_period = _totals_by_period(expenditures, period)
+        categories = _totals_by_category(expenditures)
+
+        if archive.reaches_archive(filters):
+            archived_incomes = apply_ledger_filters(archive.ARCHIVES[Income].objects.filter(user_id=user.id), income_filters)
+            archived_expenditures = apply_ledger_filters(archive.ARCHIVES[Expenditure].objects.filter(user_id=user.id), filters)
+            _add_totals(income_by_period, _totals_by_period(archived_incomes, period))
+            _add_totals(expenditure_by_period, _totals_by_period(archived_expenditures, period))
+            by_category = _add_totals(
+                {row["category"]: (row["total"], row["count"]) for row in categories},
+                {row["category"]: (row["total"], row["count"]) for row in _totals_by_category(archived_expenditures)},
+            )
+            categories = [
+                {"category": category, "total": total, "count": count}
+                for category, (total, count) in sorted(by_category.items())
+            ]
+
+    periods = []
+    for bucket in sorted(income_by_period.keys() | expenditure_by_period.keys()):
+        income, income_count = income_by_period.get(bucket, (ZERO, 0))
+        expenditure, expenditure_count = expenditure_by_period.get(bucket, (ZERO, 0))
+        periods.append({
+            "period": bucket,
+            "income": income,
+            "expenditure": expenditure,
+            "net": income - expenditure,
+            "income_count": income_count,
+            "expenditure_count": expenditure_count,
+        })
+
+    income_total = sum((row["income"] for row in periods), ZERO)
+    expenditure_total = sum((row["expenditure"] for row in periods), ZERO)
+    return {
+        "period": period,
+        "totals": {
+            "income": income_total,
+            "expenditure": expenditure_total,
+            "net": income_total - expenditure_total,
+            "income_count": sum(row["income_count"] for row in periods),
+            "expenditure_count": sum(row["expenditure_count"] for row in periods),
+        },
+        "periods": periods,
+        "categories": categories,
+    }
@@ -1,10 +1,27 @@
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
 from rest_framework.test import APIClient
 from accounts.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
 
+# The test run is one process, so its in-memory cache is shared by every "worker"
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    settings.CACHE_SHARED = True
+
+
+# Start every test with an empty response cache
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 # API client fixture
 @pytest.fixture
 def api_client():
@@ -54,3 +71,39 @@ def other_user(db):
         last_name="User"
     )
     return user
+
+
+# A second SQLite file standing in for a read replica
+@pytest.fixture
+def replica_db(tmp_path, settings, django_db_blocker):
+    alias = "replica"
+    connections.settings[alias] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {},
+        alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(tmp_path / "replica.sqlite3")},
+    })[alias]
+    with django_db_blocker.unblock():
+        call_command("migrate", database=alias, verbosity=0)
+    settings.TRACKER_REPLICA_DATABASES = [alias]
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+@pytest.fixture
+def shard_dbs(tmp_path, settings, django_db_blocker):
+    aliases = ["shard1", "shard2"]
+    configured = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {},
+        **{alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(tmp_path / f"{alias}.sqlite3")} for alias in aliases},
+    })
+    settings.TRACKER_SHARDS = [DEFAULT_DB_ALIAS, *aliases]
+    with django_db_blocker.unblock():
+        for alias in aliases:
+            connections.settings[alias] = configured[alias]
+            call_command("migrate", database=alias, verbosity=0)
+    yield aliases
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
@@ -1,8 +1,31 @@
+import importlib
+import io
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from tracker.models import Income, Expenditure
+from tracker.models import Income, Expenditure, ArchivedIncome, MonthlyRollup, ShardAssignment
+from tracker.serializers import ExpenditureSerializer
+from tracker import cache as tracker_cache
+from tracker import routers, search, sharding
 from accounts.models import User
 
 
@@ -168,3 +191,831 @@ def test_cross_user_access_blocked(api_client: APIClient, test_user, auth_token:
     # Test 
     response = api_client.get(url)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+# Pagination
+@pytest.mark.django_db
+def test_list_incomes_keyset_pagination(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    for i in range(5):
+        Income.objects.create(user=test_user, nameOfRevenue=f"Salary {i}", amount=1000 + i)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list") + "?page_size=2"
+
+    seen = []
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) <= 2
+        seen.extend(response.data["results"])
+        url = response.data["next"]
+
+    assert len(seen) == 5
+    assert len({row["id"] for row in seen}) == 5
+    created = [row["created_at"] for row in seen]
+    assert created == sorted(created, reverse=True)
+
+
+@pytest.mark.django_db
+def test_list_expenditures_invalid_cursor(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-list") + "?cursor=not-a-cursor"
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+# Bulk create
+@pytest.mark.django_db
+def test_bulk_create_expenditures(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-bulk")
+    data = [
+        {"category": "FOOD", "nameOfItem": f"Item {i}", "amount": "10.00"}
+        for i in range(20)
+    ]
+    response = api_client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.data) == 20
+    assert Expenditure.objects.filter(user=test_user).count() == 20
+
+
+@pytest.mark.django_db
+def test_bulk_create_incomes_reports_item_errors(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-bulk")
+    data = [
+        {"nameOfRevenue": "Salary", "amount": "2500.00"},
+        {"amount": "100.00"},
+    ]
+    response = api_client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["errors"][0]["index"] == 1
+    assert "nameOfRevenue" in response.data["errors"][0]["errors"]
+    assert Income.objects.filter(user=test_user).count() == 0
+
+
+# Bulk update / delete
+@pytest.mark.django_db
+def test_bulk_update_expenditures_by_ids(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    mine = [Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Taxi", amount=20) for _ in range(3)]
+    theirs = Expenditure.objects.create(user=other_user, category="FOOD", nameOfItem="Taxi", amount=20)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-bulk")
+    data = {"ids": [str(exp.id) for exp in mine] + [str(theirs.id)], "changes": {"category": "TRANSPORT"}}
+    response = api_client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["updated"] == 3
+    assert Expenditure.objects.filter(user=test_user, category="TRANSPORT").count() == 3
+    theirs.refresh_from_db()
+    assert theirs.category == "FOOD"
+
+
+@pytest.mark.django_db
+def test_bulk_delete_expenditures_by_filter(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Bread", amount=5)
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Milk", amount=3)
+    Expenditure.objects.create(user=test_user, category="RENT", nameOfItem="March rent", amount=900)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-bulk")
+    response = api_client.delete(url, {"filter": {"category": ["FOOD"]}}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["deleted"] == 2
+    assert list(Expenditure.objects.filter(user=test_user).values_list("category", flat=True)) == ["RENT"]
+
+
+@pytest.mark.django_db
+def test_bulk_delete_requires_selection(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    response = api_client.delete(reverse("income-bulk"), {}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Income.objects.filter(user=test_user).count() == 1
+
+
+# Summary
+@pytest.mark.django_db
+def test_summary_totals_by_month_and_category(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2000)
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=300)
+    Expenditure.objects.create(user=test_user, category="TRANSPORT", nameOfItem="Bus", amount=200)
+    Expenditure.objects.create(user=other_user, category="FOOD", nameOfItem="Groceries", amount=999)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    response = api_client.get(reverse("summary"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["totals"]["income"] == "2000.00"
+    assert response.data["totals"]["expenditure"] == "500.00"
+    assert response.data["totals"]["net"] == "1500.00"
+    assert len(response.data["periods"]) == 1
+    assert response.data["periods"][0]["expenditure_count"] == 2
+    assert {row["category"]: row["total"] for row in response.data["categories"]} == {
+        "FOOD": "300.00",
+        "TRANSPORT": "200.00",
+    }
+
+
+@pytest.mark.django_db
+def test_summary_rejects_unknown_period(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    response = api_client.get(reverse("summary") + "?period=year")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_summary_by_day_reads_raw_rows(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=300)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    response = api_client.get(reverse("summary") + "?period=day&category=FOOD")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["totals"]["expenditure"] == "300.00"
+
+
+# Rollups
+@pytest.mark.django_db
+def test_rollups_follow_viewset_writes(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    created = api_client.post(reverse("expense-list"), {"category": "FOOD", "nameOfItem": "Lunch", "amount": "20.00"}, format="json")
+    api_client.post(reverse("expense-bulk"), [
+        {"category": "FOOD", "nameOfItem": "Dinner", "amount": "30.00"},
+        {"category": "RENT", "nameOfItem": "Rent", "amount": "900.00"},
+    ], format="json")
+
+    url = reverse("expense-detail", kwargs={"expenditureID": created.data["id"]})
+    api_client.patch(url, {"category": "TRANSPORT", "amount": "25.00"}, format="json")
+    api_client.patch(reverse("expense-bulk"), {"filter": {"category": ["RENT"]}, "changes": {"amount": "950.00"}}, format="json")
+    api_client.delete(reverse("expense-bulk"), {"filter": {"category": ["FOOD"]}}, format="json")
+
+    stored = {
+        row.category: (str(row.total), row.count)
+        for row in MonthlyRollup.objects.filter(user=test_user, count__gt=0)
+    }
+    assert stored == {"TRANSPORT": ("25.00", 1), "RENT": ("950.00", 1)}
+    call_command("rebuild_rollups", "--verify")
+
+
+@pytest.mark.django_db
+def test_rebuild_rollups_repairs_drift(test_user):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+    # Set-based writes outside the API leave the rollups behind.
+    Income.objects.filter(user=test_user).update(amount=3000)
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_rollups", "--verify")
+
+    with pytest.raises(CommandError, match="user IDs"):
+        call_command("rebuild_rollups", "--user", "not-a-uuid")
+
+    call_command("rebuild_rollups", "--user", str(test_user.id))
+    call_command("rebuild_rollups", "--verify")
+    rollup = MonthlyRollup.objects.get(user=test_user)
+    assert rollup.kind == MonthlyRollup.INCOME
+    assert rollup.total == 3000
+
+
+@pytest.mark.django_db
+def test_rollups_follow_orm_writes_and_backfill(test_user):
+    lunch = Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Lunch", amount=20)
+    bus = Expenditure.objects.create(user=test_user, category="TRANSPORT", nameOfItem="Bus", amount=3)
+    lunch.amount, lunch.category = 25, "ENTERTAINMENT"
+    lunch.save()
+    bus.delete()
+    Expenditure.objects.get(pk=lunch.pk).save(update_fields=["nameOfItem"])
+    call_command("rebuild_rollups", "--verify")
+
+    # Rows from before rollups existed are counted by the backfill migration.
+    MonthlyRollup.objects.all().delete()
+    backfill = importlib.import_module("tracker.migrations.0015_backfill_rollups")
+    backfill.backfill_rollups(django_apps, SimpleNamespace(connection=connection))
+    call_command("rebuild_rollups", "--verify")
+    assert MonthlyRollup.objects.get(user=test_user).category == "ENTERTAINMENT"
+
+
+# Response cache
+@pytest.mark.django_db
+def test_list_is_cached_until_a_write_commits(
+    api_client: APIClient, test_user, auth_token: dict[str, str], django_capture_on_commit_callbacks
+):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+
+    first = api_client.get(url)
+    second = api_client.get(url)
+    assert first["X-Cache"] == "MISS"
+    assert second["X-Cache"] == "HIT"
+    assert second.data == first.data
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.post(url, {"nameOfRevenue": "Bonus", "amount": "500.00"}, format="json")
+
+    third = api_client.get(url)
+    assert third["X-Cache"] == "MISS"
+    assert len(third.data["results"]) == 2
+    assert tracker_cache.stats() == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.django_db
+def test_cache_is_scoped_per_user(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    api_client.get(reverse("summary"))
+
+    other_client = APIClient()
+    other_client.force_authenticate(user=other_user)
+    response = other_client.get(reverse("summary"))
+
+    assert response["X-Cache"] == "MISS"
+    assert response.data["totals"]["income_count"] == 0
+
+
+@pytest.mark.django_db
+def test_orm_writes_invalidate_cached_responses(
+    api_client: APIClient, test_user, auth_token: dict[str, str], django_capture_on_commit_callbacks
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+    api_client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+
+    response = api_client.get(url)
+    assert response["X-Cache"] == "MISS"
+    assert len(response.data["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_cache_and_etags_are_off_without_a_shared_cache(
+    api_client: APIClient, test_user, auth_token: dict[str, str], settings
+):
+    settings.CACHE_SHARED = False
+    exp = Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=150)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-detail", kwargs={"expenditureID": exp.id})
+
+    first = api_client.get(url)
+    second = api_client.get(url, HTTP_IF_NONE_MATCH="*")
+    assert second.status_code == status.HTTP_200_OK
+    assert "X-Cache" not in second and "ETag" not in first
+    assert tracker_cache.stats() == {"hits": 0, "misses": 0}
+
+    # An If-Match that cannot be checked is refused rather than ignored.
+    stale = api_client.patch(url, {"amount": "160.00"}, format="json", HTTP_IF_MATCH='"stale"')
+    assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert api_client.patch(url, {"amount": "160.00"}, format="json", HTTP_IF_MATCH="*").status_code == status.HTTP_200_OK
+    assert api_client.patch(url, {"amount": "170.00"}, format="json").status_code == status.HTTP_200_OK
+
+
+# Conditional requests
+@pytest.mark.django_db
+def test_unchanged_list_returns_not_modified(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+
+    first = api_client.get(url)
+    etag = first["ETag"]
+    second = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second["ETag"] == etag
+    assert not second.content
+
+
+@pytest.mark.django_db
+def test_if_match_rejects_stale_update(
+    api_client: APIClient, test_user, auth_token: dict[str, str], django_capture_on_commit_callbacks
+):
+    exp = Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=150)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-detail", kwargs={"expenditureID": exp.id})
+    etag = api_client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = api_client.patch(url, {"amount": "160.00"}, format="json", HTTP_IF_MATCH=etag)
+    assert first.status_code == status.HTTP_200_OK
+    assert api_client.get(url)["ETag"] != etag
+
+    stale = api_client.patch(url, {"amount": "170.00"}, format="json", HTTP_IF_MATCH=etag)
+    assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+    exp.refresh_from_db()
+    assert str(exp.amount) == "160.00"
+
+
+# Fast read path
+@pytest.mark.django_db
+def test_fast_reads_match_serializer_output(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem='Café "crème"\u2028to go', amount="12.5")
+    Expenditure.objects.create(user=test_user, category="RENT", nameOfItem="Rent", amount=900)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    rows = list(Expenditure.objects.filter(user=test_user).order_by("-created_at", "-id"))
+    renderer = JSONRenderer()
+
+    listed = api_client.get(reverse("expense-list"))
+    expected = renderer.render({"next": None, "results": ExpenditureSerializer(rows, many=True).data})
+    assert listed.content == expected
+
+    detail = api_client.get(reverse("expense-detail", kwargs={"expenditureID": rows[0].id}))
+    assert detail.content == renderer.render(ExpenditureSerializer(rows[0]).data)
+
+
+@pytest.mark.django_db
+def test_amounts_are_stored_and_summed_as_minor_units(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    for amount in ("12.34", "1.05", "9999.99"):
+        api_client.post(reverse("expense-list"), {"category": "FOOD", "nameOfItem": "Item", "amount": amount}, format="json")
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT amount, typeof(amount) FROM tracker_expenditure ORDER BY amount")
+        assert cursor.fetchall() == [(105, "integer"), (1234, "integer"), (999999, "integer")]
+        cursor.execute("SELECT total, typeof(total) FROM tracker_monthlyrollup")
+        assert cursor.fetchall() == [(1001338, "integer")]
+
+    with CaptureQueriesContext(connection) as queries:
+        listed = api_client.get(reverse("expense-list"), {"ordering": "amount", "min_amount": "1.05"})
+    assert [row["amount"] for row in listed.data["results"]] == ["1.05", "12.34", "9999.99"]
+    assert '"tracker_expenditure"."amount" >= 105' in queries.captured_queries[-1]["sql"]
+    assert api_client.get(reverse("summary"), {"period": "day"}).data["totals"]["expenditure"] == "10013.38"
+    assert api_client.get(reverse("summary")).data["totals"]["expenditure"] == "10013.38"
+
+
+@pytest.mark.django_db
+def test_sparse_fields_trim_output_and_query(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    for amount in (10, 20, 30):
+        Income.objects.create(user=test_user, nameOfRevenue="Gig", amount=amount)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    with CaptureQueriesContext(connection) as queries:
+        first = api_client.get(reverse("income-list"), {"fields": "amount,id", "page_size": 2})
+    assert [set(item) for item in first.data["results"]] == [{"id", "amount"}] * 2
+    listing = [query["sql"] for query in queries.captured_queries if '"tracker_income"' in query["sql"]]
+    assert listing and "nameOfRevenue" not in listing[-1]
+
+    second = api_client.get(first.data["next"])
+    assert [item["amount"] for item in first.data["results"] + second.data["results"]] == ["30.00", "20.00", "10.00"]
+
+    bad = api_client.get(reverse("income-list"), {"fields": "amount,secret"})
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+    assert "secret" in bad.data["fields"][0]
+
+
+# List filtering
+@pytest.mark.django_db
+def test_list_filters_by_category_and_date(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Old lunch", amount=10, created_at=datetime(2025, 1, 5, tzinfo=dt_timezone.utc))
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Lunch", amount=12, created_at=datetime(2025, 3, 5, tzinfo=dt_timezone.utc))
+    Expenditure.objects.create(user=test_user, category="TRANSPORT", nameOfItem="Bus", amount=3, created_at=datetime(2025, 3, 6, tzinfo=dt_timezone.utc))
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    response = api_client.get(reverse("expense-list"), {"category": "FOOD", "created_after": "2025-02-01"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["nameOfItem"] for item in response.data["results"]] == ["Lunch"]
+    index = next(index for index in Expenditure._meta.indexes if index.name == response["X-Query-Index"])
+    assert list(index.fields) == ["user", "category", "created_at"]
+
+
+@pytest.mark.django_db
+def test_list_orders_by_amount_across_pages(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    for amount in (40, 10, 30, 20, 50):
+        Income.objects.create(user=test_user, nameOfRevenue=f"Gig {amount}", amount=amount)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    first = api_client.get(reverse("income-list"), {"ordering": "amount", "min_amount": "15", "page_size": 2})
+    second = api_client.get(first.data["next"])
+
+    assert first.status_code == status.HTTP_200_OK
+    amounts = [item["amount"] for item in first.data["results"] + second.data["results"]]
+    assert amounts == ["20.00", "30.00", "40.00", "50.00"]
+
+
+@pytest.mark.django_db
+def test_ids_are_time_ordered_and_list_in_creation_order(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    legacy = Income.objects.create(id=uuid.uuid4(), user=test_user, nameOfRevenue="Legacy", amount=5)
+    created = [Income.objects.create(user=test_user, nameOfRevenue=f"Gig {n}", amount=n + 1) for n in range(5)]
+    assert test_user.id.version == 7
+    assert all(income.id.version == 7 for income in created)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    first = api_client.get(reverse("income-list"), {"ordering": "id", "page_size": 4})
+    second = api_client.get(first.data["next"])
+
+    index = next(index for index in Income._meta.indexes if index.name == first["X-Query-Index"])
+    assert list(index.fields) == ["user", "id"]
+    ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+    # The pre-migration row sorts wherever its random ID falls; new rows keep creation order.
+    assert ids == [str(id) for id in sorted([legacy.id, *(income.id for income in created)])]
+    assert [id for id in ids if id != str(legacy.id)] == [str(income.id) for income in created]
+    assert api_client.get(reverse("income-detail", args=[legacy.id])).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_list_rejects_unindexed_combination(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    response = api_client.get(reverse("expense-list"), {"min_amount": "10"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "supported" in response.data
+
+
+# Search
+@pytest.mark.django_db
+def test_search_ranks_matches_within_the_user(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="TRANSPORT", nameOfItem="Uber to airport", amount=32)
+    Expenditure.objects.create(user=test_user, category="RENT", nameOfItem="Rent March", amount=900)
+    Income.objects.create(user=test_user, nameOfRevenue="Rental income March", amount=400)
+    Expenditure.objects.create(user=other_user, category="RENT", nameOfItem="Rent March", amount=800)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    response = api_client.get(reverse("search"), {"q": "rent mar"})
+
+    assert response.status_code == status.HTTP_200_OK
+    names = [hit["record"].get("nameOfItem") or hit["record"].get("nameOfRevenue") for hit in response.data["results"]]
+    assert names == ["Rent March", "Rental income March"]
+
+    expenditures_only = api_client.get(reverse("search"), {"q": "march", "kind": "expenditure"})
+    assert [hit["kind"] for hit in expenditures_only.data["results"]] == ["expenditure"]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_writes(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    exp = Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=50)
+    Expenditure.objects.filter(id=exp.id).update(nameOfItem="Farmers market")
+    for index in range(3):
+        Income.objects.create(user=test_user, nameOfRevenue=f"Market stall {index}", amount=100)
+    Income.objects.filter(nameOfRevenue="Market stall 0").delete()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    assert api_client.get(reverse("search"), {"q": "groceries"}).data["results"] == []
+
+    first = api_client.get(reverse("search"), {"q": "market", "page_size": 2})
+    second = api_client.get(first.data["next"])
+    ids = [hit["record"]["id"] for hit in first.data["results"] + second.data["results"]]
+    assert len(ids) == len(set(ids)) == 3
+    assert second.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_search_pages_survive_other_users_indexing(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    for name in ("Rent", "Rent deposit", "Rent for the March flat", "Garage rent and storage unit"):
+        Expenditure.objects.create(user=test_user, category="RENT", nameOfItem=name, amount=900)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    first = api_client.get(reverse("search"), {"q": "rent", "page_size": 2})
+    # Other users' writes change the corpus statistics behind every score.
+    Expenditure.objects.bulk_create([
+        Expenditure(user=other_user, category="RENT", nameOfItem="Rent " + "word " * index, amount=900) for index in range(40)
+    ])
+    second = api_client.get(first.data["next"])
+
+    ids = [hit["record"]["id"] for hit in first.data["results"] + second.data["results"]]
+    assert sorted(ids) == sorted(str(id) for id in Expenditure.objects.filter(user=test_user).values_list("id", flat=True))
+    assert second.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(test_user):
+    Income.objects.create(user=test_user, nameOfRevenue="Consulting", amount=700)
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM tracker_search")
+
+    call_command("rebuild_search_index", stdout=io.StringIO())
+
+    assert [hit.kind for hit in search.search(test_user.id, "consult")] == ["income"]
+
+
+# Export
+@pytest.mark.django_db
+def test_export_expenditures_csv(api_client: APIClient, test_user, other_user, auth_token: dict[str, str]):
+    Expenditure.objects.create(user=test_user, category="FOOD", nameOfItem="Groceries", amount=150)
+    Expenditure.objects.create(user=test_user, category="RENT", nameOfItem="Rent, March", amount=900)
+    Expenditure.objects.create(user=other_user, category="FOOD", nameOfItem="Not mine", amount=1)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("expense-export", kwargs={"fmt": "csv"})
+    response = api_client.get(url, HTTP_ACCEPT="text/csv")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "id,category,nameOfItem,amount,created_at,updated_at"
+    assert len(lines) == 3
+    assert '"Rent, March",900.00' in lines[2]
+
+
+@pytest.mark.django_db
+def test_export_incomes_ndjson_matches_api_shape(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    listed = api_client.get(reverse("income-list")).json()["results"]
+    response = api_client.get(reverse("income-export", kwargs={"fmt": "ndjson"}))
+
+    exported = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+    assert exported == listed
+
+
+# Statement import
+@pytest.mark.django_db
+def test_import_csv_statement(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    statement = (
+        "Date,Description,Amount,Category\n"
+        "2025-09-01,Salary,2500.00,\n"
+        "2025-09-02,Uber,-14.50,TRANSPORT\n"
+        "2025-09-03,Vet,-80.00,PETS\n"
+        "2025-09-04,Tiny,0.10,\n"
+    )
+    upload = SimpleUploadedFile("statement.csv", statement.encode(), content_type="text/csv")
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    response = api_client.post(reverse("statement-import"), {"file": upload}, format="multipart")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["rows"] == 4
+    assert response.data["imported"] == {"income": 1, "expenditure": 1}
+    assert response.data["rejected"] == 2
+    assert [error["row"] for error in response.data["errors"]] == [4, 5]
+
+    uber = Expenditure.objects.get(user=test_user)
+    assert uber.category == "TRANSPORT"
+    assert str(uber.amount) == "14.50"
+    assert uber.created_at.date().isoformat() == "2025-09-02"
+    call_command("rebuild_rollups", "--verify")
+
+
+@pytest.mark.django_db
+def test_import_statement_command_reads_ofx(tmp_path, test_user):
+    statement = tmp_path / "statement.ofx"
+    statement.write_text(
+        "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250905120000[0:GMT]<TRNAMT>-42.00<NAME>Groceries\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250906<TRNAMT>1200.00<NAME>Payroll\n"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+    )
+
+    call_command("import_statement", str(statement), "--user", test_user.email, "--batch-size", "1")
+
+    assert Expenditure.objects.get(user=test_user).nameOfItem == "Groceries"
+    income = Income.objects.get(user=test_user)
+    assert income.amount == 1200
+    assert income.created_at.date().isoformat() == "2025-09-06"
+
+
+@pytest.mark.django_db
+def test_async_ledger_routes_match_sync(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    client = AsyncClient()
+    headers = {"Authorization": f"Bearer {auth_token['access']}"}
+    created = async_to_sync(client.post)(
+        reverse("async-expense-list"),
+        {"nameOfItem": "Lunch", "category": "FOOD", "amount": "12.50"},
+        content_type="application/json",
+        headers=headers,
+    )
+    assert created.status_code == status.HTTP_201_CREATED
+    expenditure_id = created.json()["id"]
+    assert MonthlyRollup.objects.get(user=test_user, kind=MonthlyRollup.EXPENDITURE).total == 12.5
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    for name, kwargs in [("expense-list", {}), ("expense-detail", {"expenditureID": expenditure_id})]:
+        query = "?fields=id,amount"
+        response = async_to_sync(client.get)(reverse(f"async-{name}", kwargs=kwargs) + query, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == api_client.get(reverse(name, kwargs=kwargs) + query).content
+
+    detail_url = reverse("async-expense-detail", kwargs={"expenditureID": expenditure_id})
+    updated = async_to_sync(client.patch)(detail_url, {"amount": "20.00"}, content_type="application/json", headers=headers)
+    assert updated.status_code == status.HTTP_200_OK
+    assert updated.json()["amount"] == "20.00"
+    assert MonthlyRollup.objects.get(user=test_user, kind=MonthlyRollup.EXPENDITURE).total == 20
+
+    assert async_to_sync(client.delete)(detail_url, headers=headers).status_code == status.HTTP_204_NO_CONTENT
+    assert async_to_sync(client.get)(detail_url, headers=headers).status_code == status.HTTP_404_NOT_FOUND
+    assert MonthlyRollup.objects.get(user=test_user, kind=MonthlyRollup.EXPENDITURE).count == 0
+
+    assert async_to_sync(client.get)(reverse("async-expense-list")).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def _run_parallel_writers(path, options, writers=6):
+    """Each writer reads, pauses, then inserts in one transaction; returns the errors raised."""
+    alias = f"writers-{path.stem}"
+    connections.settings[alias] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {},
+        alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path), "OPTIONS": options},
+    })[alias]
+    with connections[alias].cursor() as cursor:
+        cursor.execute("CREATE TABLE entry (id INTEGER PRIMARY KEY, seen INTEGER)")
+    connections[alias].close()
+
+    errors = []
+
+    def write():
+        try:
+            with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM entry")
+                seen = cursor.fetchone()[0]
+                time.sleep(0.05)
+                cursor.execute("INSERT INTO entry (seen) VALUES (%s)", [seen])
+        except OperationalError as exc:
+            errors.append(exc)
+        finally:
+            connections[alias].close()
+
+    threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    del connections.settings[alias]
+    return errors
+
+
+def test_production_sqlite_profile_serializes_parallel_writers(tmp_path, django_db_blocker):
+    with django_db_blocker.unblock():
+        assert any("locked" in str(error) for error in _run_parallel_writers(tmp_path / "default.sqlite3", {}))
+        assert _run_parallel_writers(tmp_path / "production.sqlite3", settings.SQLITE_PRODUCTION_OPTIONS) == []
+
+    with sqlite3.connect(tmp_path / "production.sqlite3") as db:
+        assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        # Every writer committed, each after seeing all earlier ones.
+        assert sorted(seen for (seen,) in db.execute("SELECT seen FROM entry")) == list(range(6))
+
+
+@pytest.mark.django_db
+def test_reads_go_to_replica_outside_read_your_writes_window(
+    api_client: APIClient, test_user, auth_token: dict[str, str], replica_db, django_capture_on_commit_callbacks
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+    with django_capture_on_commit_callbacks(execute=True):
+        created = api_client.post(url, {"nameOfRevenue": "Salary", "amount": "2500.00"}, format="json")
+
+    # The writer reads its own row from the primary, although the replica has not seen it.
+    assert [row["id"] for row in api_client.get(url).data["results"]] == [created.data["id"]]
+    assert not Income.objects.using(replica_db).exists()
+
+    tracker_cache.get_cache().clear()
+    assert api_client.get(url).data["results"] == []
+
+    # The replica catches up.
+    User.objects.using(replica_db).create(
+        id=test_user.id, email=test_user.email, username=test_user.username, password=test_user.password
+    )
+    Income.objects.using(replica_db).create(id=created.data["id"], user_id=test_user.id, nameOfRevenue="Salary", amount=2500)
+    tracker_cache.get_cache().clear()
+    assert [row["id"] for row in api_client.get(url).data["results"]] == [created.data["id"]]
+    assert Income.objects.count() == 1
+
+
+def test_a_request_reads_from_one_replica(settings):
+    settings.TRACKER_REPLICA_DATABASES = ["replica1", "replica2", "replica3"]
+    router = routers.ReplicaRouter()
+    chosen = set()
+    for _ in range(10):
+        token = routers.enable_replica_reads()
+        try:
+            picks = {router.db_for_read(Income) for _ in range(20)}
+        finally:
+            routers.reset_replica_reads(token)
+        assert len(picks) == 1
+        chosen |= picks
+    assert chosen <= set(settings.TRACKER_REPLICA_DATABASES)
+    assert router.db_for_read(Income) is None
+
+
+@pytest.mark.django_db
+def test_replicas_are_not_read_without_a_shared_cache(
+    api_client: APIClient, test_user, auth_token: dict[str, str], replica_db, settings
+):
+    settings.CACHE_SHARED = False
+    Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=2500)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    assert len(api_client.get(reverse("income-list")).data["results"]) == 1
+    assert not Income.objects.using(replica_db).exists()
+
+
+def test_orm_writes_outside_requests_stay_on_the_user_shard(test_user, shard_dbs):
+    shard1, _ = shard_dbs
+    ShardAssignment.objects.create(user_id=test_user.id, alias=shard1)
+    sharding.forget_placement(test_user.id)
+    generation = tracker_cache.get_generation(test_user.id)
+
+    # As the admin saves: on the instance, with no shard active.
+    income = Income(user=test_user, nameOfRevenue="Salary", amount=2500)
+    income.save()
+    assert Income.objects.using(shard1).filter(id=income.id).exists()
+    # Invalidated once the shard committed (the default database's test transaction never does).
+    assert tracker_cache.get_generation(test_user.id) != generation
+    assert MonthlyRollup.objects.using(shard1).get(user_id=test_user.id).total == 2500
+    assert not MonthlyRollup.objects.using(DEFAULT_DB_ALIAS).exists()
+
+    income.delete()
+    assert not MonthlyRollup.objects.using(shard1).filter(count__gt=0).exists()
+
+
+def test_ledger_lives_on_user_shard_and_rebalances_online(
+    api_client: APIClient, test_user, auth_token: dict[str, str], shard_dbs, django_capture_on_commit_callbacks
+):
+    shard1, shard2 = shard_dbs
+    ShardAssignment.objects.create(user_id=test_user.id, alias=shard1)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+    with django_capture_on_commit_callbacks(execute=True):
+        created = api_client.post(url, {"nameOfRevenue": "Salary", "amount": "2500.00"}, format="json")
+    assert created.status_code == status.HTTP_201_CREATED
+
+    assert Income.objects.using(shard1).filter(user_id=test_user.id).count() == 1
+    assert not Income.objects.using(DEFAULT_DB_ALIAS).exists()
+    assert [row["id"] for row in api_client.get(url).data["results"]] == [created.data["id"]]
+
+    # Writes are refused while the user is being moved; reads carry on.
+    ShardAssignment.objects.filter(user_id=test_user.id).update(moving=True)
+    sharding.forget_placement(test_user.id)
+    assert api_client.post(url, {"nameOfRevenue": "Bonus", "amount": "100.00"}, format="json").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    ShardAssignment.objects.filter(user_id=test_user.id).update(moving=False)
+
+    call_command("rebalance_shards", "--user", str(test_user.id), "--to", shard2, "--grace", "0", stdout=io.StringIO())
+
+    assert ShardAssignment.objects.get(user_id=test_user.id).alias == shard2
+    assert not Income.objects.using(shard1).exists()
+    assert not MonthlyRollup.objects.using(shard1).exists()
+    moved = Income.objects.using(shard2).get(id=created.data["id"])
+    assert moved.updated_at.isoformat().replace("+00:00", "Z") == created.data["updated_at"]
+    assert MonthlyRollup.objects.using(shard2).get(user_id=test_user.id).total == 2500
+    assert [row["id"] for row in api_client.get(url).data["results"]] == [created.data["id"]]
+    assert api_client.get(reverse("search"), {"q": "salary"}).data["results"][0]["record"]["id"] == created.data["id"]
+
+
+@pytest.mark.django_db
+def test_archived_rows_stay_readable_and_writable(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    now = datetime.now(dt_timezone.utc)
+    recent = Income.objects.create(user=test_user, nameOfRevenue="Salary", amount=3000, created_at=now - timedelta(days=5))
+    older = Income.objects.create(user=test_user, nameOfRevenue="Bonus", amount=500, created_at=now - timedelta(days=100))
+    oldest = Income.objects.create(user=test_user, nameOfRevenue="Old salary", amount=2000, created_at=now - timedelta(days=200))
+    call_command("rebuild_rollups")
+
+    call_command("archive_ledger", "--older-than-days", "90", "--batch-size", "1", "--grace", "0", stdout=io.StringIO())
+    assert list(Income.objects.values_list("id", flat=True)) == [recent.id]
+    assert ArchivedIncome.objects.count() == 2
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+    url = reverse("income-list")
+    first = api_client.get(url, {"page_size": 2})
+    second = api_client.get(first.data["next"])
+    assert [row["id"] for row in first.data["results"] + second.data["results"]] == [str(recent.id), str(older.id), str(oldest.id)]
+
+    # A range inside the hot window never touches the archive.
+    with CaptureQueriesContext(connection) as queries:
+        hot_only = api_client.get(url, {"created_after": (now - timedelta(days=30)).isoformat()})
+    assert [row["id"] for row in hot_only.data["results"]] == [str(recent.id)]
+    assert not any(ArchivedIncome._meta.db_table in query["sql"] for query in queries.captured_queries)
+
+    assert api_client.get(reverse("income-detail", args=[oldest.id])).data["nameOfRevenue"] == "Old salary"
+    assert api_client.get(reverse("summary"), {"period": "day"}).data["totals"]["income"] == "5500.00"
+    assert api_client.get(reverse("search"), {"q": "old"}).data["results"][0]["record"]["id"] == str(oldest.id)
+
+    # Writing to an archived row brings it back to the hot table.
+    response = api_client.patch(reverse("income-detail", args=[oldest.id]), {"amount": "2100.00"}, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert Income.objects.get(id=oldest.id).amount == 2100
+    assert not ArchivedIncome.objects.filter(id=oldest.id).exists()
+    assert [hit.record_id for hit in search.search(test_user.id, "old")] == [oldest.id]
+    call_command("rebuild_rollups", "--verify", stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+def test_exports_and_bulk_writes_cover_archived_rows(api_client: APIClient, test_user, auth_token: dict[str, str]):
+    now = datetime.now(dt_timezone.utc)
+    for name, days in (("Recent", 5), ("Older", 100), ("Oldest", 200), ("Ancient", 300)):
+        Income.objects.create(user=test_user, nameOfRevenue=name, amount=100, created_at=now - timedelta(days=days))
+    call_command("archive_ledger", "--older-than-days", "90", "--grace", "0", stdout=io.StringIO())
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth_token['access']}")
+
+    export = api_client.get(reverse("income-export", kwargs={"fmt": "csv"}))
+    names = [line.split(",")[1] for line in b"".join(export.streaming_content).decode().splitlines()[1:]]
+    assert names == ["Ancient", "Oldest", "Older", "Recent"]
+
+    updated = api_client.patch(reverse("income-bulk"), {
+        "filter": {"created_before": (now - timedelta(days=150)).isoformat()}, "changes": {"amount": "250.00"},
+    }, format="json")
+    assert updated.data == {"updated": 2}
+    # Bulk writes leave cold rows in the archive.
+    assert sorted(ArchivedIncome.objects.values_list("nameOfRevenue", "amount")) == [("Ancient", 250), ("Older", 100), ("Oldest", 250)]
+    ancient = ArchivedIncome.objects.get(nameOfRevenue="Ancient")
+    recent = Income.objects.get(nameOfRevenue="Recent")
+    deleted = api_client.delete(reverse("income-bulk"), {"ids": [str(ancient.id), str(recent.id)]}, format="json")
+    assert deleted.data == {"deleted": 2}
+
+    assert not Income.objects.exists()
+    assert sorted(ArchivedIncome.objects.values_list("nameOfRevenue", "amount")) == [("Older", 100), ("Oldest", 250)]
+    call_command("rebuild_rollups", "--verify", stdout=io.StringIO())
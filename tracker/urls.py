@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import IncomeViewSet, ExpenditureViewSet
+from .views import IncomeViewSet, ExpenditureViewSet, SummaryView, StatementImportView, SearchView
 
 router = DefaultRouter(trailing_slash=False)
 
@@ -9,5 +9,8 @@ router.register(r'income', IncomeViewSet, basename='income')
 router.register(r'expenditure', ExpenditureViewSet, basename='expense')
 
 urlpatterns = [
+    path('summary', SummaryView.as_view(), name='summary'),
+    path('import', StatementImportView.as_view(), name='statement-import'),
+    path('search', SearchView.as_view(), name='search'),
     path('', include(router.urls)),
 ]
@@ -1,8 +1,31 @@
 # tracker/utils.py
-def apply_schemas(schema_decorator):
+import functools
+
+
+def apply_schemas(schema_decorator, method_schemas=None):
     """
     Apply a schema decorator (created with extend_schema_view)
     to a viewset.
     Usage: @apply_schemas(income_schemas)
+
+    `method_schemas` maps extra handlers that extend_schema_view cannot
+    see (methods mapped onto an existing @action with `.mapping`) to
+    their extend_schema decorators.
+    Usage: @apply_schemas(income_schemas, income_bulk_schemas)
     """
-    return schema_decorator
+    if not method_schemas:
+        return schema_decorator
+
+    def decorator(viewset):
+        for method_name, method_schema in method_schemas.items():
+            method = getattr(viewset, method_name)
+
+            # Wrap the inherited handler so the annotation stays on this viewset only.
+            @functools.wraps(method)
+            def wrapped(self, request, *args, _method=method, **kwargs):
+                return _method(self, request, *args, **kwargs)
+
+            setattr(viewset, method_name, method_schema(wrapped))
+        return schema_decorator(viewset)
+
+    return decorator
@@ -1,38 +1,129 @@
 # tracker/views.py
+import io
+
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from accounts.authentication import StatelessJWTAuthentication
 from .models import Income, Expenditure
-from .serializers import IncomeSerializer, ExpenditureSerializer
-from .docs import income_schemas, expenditure_schemas
+from .serializers import (
+    IncomeSerializer,
+    ExpenditureSerializer,
+    SummaryQuerySerializer,
+    SummarySerializer,
+    StatementImportSerializer,
+    StatementImportReportSerializer,
+    SearchQuerySerializer,
+    SearchHitSerializer,
+)
+from .docs import income_schemas, expenditure_schemas, income_bulk_schemas, expenditure_bulk_schemas, summary_schema, import_schema, search_schema
+from .summary import build_summary
+from .importers import import_statement
 from .utils import apply_schemas
+from .pagination import KeysetPagination, SearchPagination
+from .mixins import ArchiveMixin, BulkMixin, CachedReadMixin, ConditionalMixin, ExportMixin, FastReadMixin, FilteredListMixin, LedgerWriteMixin, ReplicaReadMixin, ShardMixin, SparseFieldsMixin
+from . import cache, search
 
 
 
 # Income ViewSet
-@apply_schemas(income_schemas)
-class IncomeViewSet(ModelViewSet):
+@apply_schemas(income_schemas, income_bulk_schemas)
+class IncomeViewSet(ShardMixin, ReplicaReadMixin, SparseFieldsMixin, FilteredListMixin, ConditionalMixin, CachedReadMixin, ArchiveMixin, FastReadMixin, LedgerWriteMixin, BulkMixin, ExportMixin, ModelViewSet):
     serializer_class = IncomeSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     lookup_field = 'id'
     lookup_url_kwarg = "incomeID"
+    export_filename = "incomes"
 
     def get_queryset(self):
-        return Income.objects.filter(user=self.request.user)
-
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        return Income.objects.filter(user_id=self.request.user.id)
 
 
 # Expenditure ViewSet
-@apply_schemas(expenditure_schemas)
-class ExpenditureViewSet(ModelViewSet):
+@apply_schemas(expenditure_schemas, expenditure_bulk_schemas)
+class ExpenditureViewSet(ShardMixin, ReplicaReadMixin, SparseFieldsMixin, FilteredListMixin, ConditionalMixin, CachedReadMixin, ArchiveMixin, FastReadMixin, LedgerWriteMixin, BulkMixin, ExportMixin, ModelViewSet):
     serializer_class = ExpenditureSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     lookup_field = "id"
     lookup_url_kwarg = "expenditureID"
+    export_filename = "expenditures"
 
     def get_queryset(self):
-        return Expenditure.objects.filter(user=self.request.user)
+        return Expenditure.objects.filter(user_id=self.request.user.id)
+
+
+# Summary
+@summary_schema
+class SummaryView(ShardMixin, APIView):
+    serializer_class = SummarySerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = SummaryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = dict(query.validated_data)
+        period = filters.pop("period")
+
+        def build_response():
+            summary = build_summary(request.user, period, filters)
+            return Response(SummarySerializer(summary).data)
+
+        return cache.cached_response(request, "summary", build_response)
+
+
+# Statement import
+@import_schema
+class StatementImportView(ShardMixin, APIView):
+    serializer_class = StatementImportSerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        serializer = StatementImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        # Large uploads are spooled to disk by Django; read them back as a text stream.
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace", newline="")
+        report = import_statement(request.user, stream, serializer.validated_data["file_format"])
+        return Response(StatementImportReportSerializer(report).data, status=status.HTTP_201_CREATED)
+
+
+# Search
+@search_schema
+class SearchView(ShardMixin, APIView):
+    serializer_class = SearchHitSerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    record_serializers = {
+        search.INCOME: IncomeSerializer,
+        search.EXPENDITURE: ExpenditureSerializer,
+    }
+
+    def get(self, request):
+        query = SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        q = query.validated_data["q"]
+        kind = query.validated_data.get("kind")
+
+        def build_response():
+            paginator = SearchPagination()
+            hits = paginator.paginate_search(
+                request, lambda after, limit: search.search(request.user.id, q, kind=kind, after=after, limit=limit)
+            )
+            results = [
+                {"kind": hit.kind, "score": hit.rank, "record": self.record_serializers[hit.kind](record).data}
+                for hit, record in search.load_records(request.user.id, hits)
+            ]
+            return paginator.get_paginated_response(SearchHitSerializer(results, many=True).data)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        return cache.cached_response(request, "search", build_response)
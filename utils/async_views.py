@@ -0,0 +1,87 @@
+# utils/async_views.py
+"""
+A small async counterpart of DRF's `APIView`.
+
+DRF views are synchronous, so under ASGI Django runs each one in a
+worker thread via `sync_to_async`. `AsyncAPIView` is a plain Django
+async class-based view that keeps the parts of the DRF request cycle the
+API relies on: `request.data` and `request.query_params`, JWT
+authentication, and DRF exceptions rendered through the configured
+exception handler. The async endpoints therefore answer like their sync
+counterparts.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.authentication import StatelessJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Subclasses implement `async def get/post/...(self, request, ...)`,
+    receiving a DRF `Request`. With an `authentication_class` every
+    request must authenticate; set it to None for public endpoints.
+    """
+    authentication_class = StatelessJWTAuthentication
+    renderer = JSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like APIView: bearer-token requests carry no CSRF cookie, so
+        # Django's CSRF middleware must not reject them.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.request = request = Request(request, parsers=[JSONParser()])
+        try:
+            await self.initial(request)
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            return await handler(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    async def initial(self, request):
+        request.user, request.auth = AnonymousUser(), None
+        if self.authentication_class is None:
+            return
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # Same as APIView: 401 with a challenge when there is an authenticator.
+            if self.authentication_class is not None:
+                exc.auth_header = self.authentication_class().authenticate_header(self.request)
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+
+        context = {"view": self, "args": self.args, "kwargs": self.kwargs, "request": self.request}
+        response = api_settings.EXCEPTION_HANDLER(exc, context)
+        if response is None:
+            raise exc
+        rendered = self.render(response.data, status=response.status_code)
+        for header, value in response.items():
+            if header.lower() != "content-type":
+                rendered[header] = value
+        return rendered
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return self.json_response(self.renderer.render(data), status=status)
+
+    @staticmethod
+    def json_response(content, status=status.HTTP_200_OK):
+        return HttpResponse(content, status=status, content_type="application/json")
@@ -0,0 +1,118 @@
+# utils/benchmark.py
+"""
+Measurement and baseline comparison for the in-process benchmarks in
+`tracker/benchmarks` and `accounts/benchmarks`.
+
+A case is a callable making the i-th request through the Django test
+client. `measure` runs it three times over: a few warm-up requests, so
+one-off work (imports, URL resolution, cached lookups) is not counted; a
+short profiled pass recording the most queries any request made and its
+peak Python memory under `tracemalloc`; then the timed pass, with no
+instrumentation, for the latency percentiles.
+
+Results are plain dicts so a run can be dumped as JSON and a later run
+compared against it with `regressions`.
+"""
+import gc
+import math
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+# Requests in the warm-up and profiled passes.
+WARMUP_CALLS = 3
+PROFILED_CALLS = 5
+
+# Latency changes smaller than this are noise, whatever the ratio.
+NOISE_FLOOR_MS = 1.0
+
+# Latency percentiles a run is gated on; p99 is recorded but too noisy
+# at a few hundred samples to fail a build.
+GATED_LATENCIES = ("p50_ms", "p95_ms")
+
+
+def calls_needed(iterations):
+    """Distinct requests `measure` makes, for cases that use up a row per call."""
+    return WARMUP_CALLS + PROFILED_CALLS + iterations
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples`."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def _check(response, expected_status):
+    if response.status_code != expected_status:
+        raise AssertionError(f"Expected {expected_status}, got {response.status_code}: {response.content[:500]!r}")
+
+
+def measure(call, iterations, expected_status=200):
+    """
+    Call `call(i)` for i in `range(calls_needed(iterations))` and return
+    the latency percentiles (ms), the most queries a request made and
+    the highest peak memory (KiB) a request allocated.
+    """
+    for i in range(WARMUP_CALLS):
+        _check(call(i), expected_status)
+
+    queries = 0
+    peak = 0
+    tracemalloc.start()
+    try:
+        for i in range(WARMUP_CALLS, WARMUP_CALLS + PROFILED_CALLS):
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                response = call(i)
+                _, request_peak = tracemalloc.get_traced_memory()
+            _check(response, expected_status)
+            queries = max(queries, sum(len(context) for context in captured))
+            peak = max(peak, request_peak - before)
+    finally:
+        tracemalloc.stop()
+
+    # Like timeit, keep collector pauses out of the samples.
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(WARMUP_CALLS + PROFILED_CALLS, calls_needed(iterations)):
+            started = time.perf_counter()
+            response = call(i)
+            samples.append((time.perf_counter() - started) * 1000)
+            _check(response, expected_status)
+    finally:
+        gc.enable()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "queries": queries,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def regressions(result, baseline, threshold):
+    """
+    Describe how `result` is worse than `baseline` (both `measure`
+    results): a gated latency or peak memory more than `threshold`
+    (a fraction) above it, or any extra query.
+    """
+    found = []
+    for key in GATED_LATENCIES:
+        old, new = baseline[key], result[key]
+        if new > old * (1 + threshold) and new - old > NOISE_FLOOR_MS:
+            found.append(f"{key} {old} -> {new}")
+    if result["queries"] > baseline["queries"]:
+        found.append(f"queries {baseline['queries']} -> {result['queries']}")
+    if result["peak_kib"] > baseline["peak_kib"] * (1 + threshold):
+        found.append(f"peak_kib {baseline['peak_kib']} -> {result['peak_kib']}")
+    return found
@@ -0,0 +1,29 @@
+# utils/caches.py
+"""
+Whether a configured cache is shared by every worker process.
+
+Several features keep cross-request state in a Django cache: the tracker
+response cache and ETags, the read-your-writes pin for replicas, and the
+token blacklist version. They are only correct when a write in one
+process is visible to the next request in any other, so they check
+`is_shared` and fall back to the database (or turn themselves off) when
+it is not.
+
+In-process backends (`LocMemCache`, `DummyCache`) are not shared. Set
+`CACHE_SHARED = True` when the deployment is a single process anyway
+(`runserver`, tests), or `False` to force the fallbacks.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias="default"):
+    override = getattr(settings, "CACHE_SHARED", None)
+    if override is not None:
+        return override
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
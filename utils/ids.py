@@ -0,0 +1,46 @@
+# utils/ids.py
+"""
+Time-ordered UUIDv7 primary keys (RFC 9562).
+
+The top 48 bits are the Unix time in milliseconds, so new rows append to
+the right edge of the primary-key B-tree instead of landing on random
+pages, and sorting by ID sorts by creation time. Within one millisecond
+the 12-bit `rand_a` field is a counter (RFC 9562 method 1), so IDs made
+by one process are strictly increasing; across processes they are
+ordered to the millisecond. The remaining 62 bits are random.
+
+`uuid.uuid7` only arrives in Python 3.14, and migrations reference this
+function, so it stays the default on every version.
+"""
+import os
+import threading
+import time
+import uuid
+
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def uuid7():
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Start low in the range so the counter rarely overflows.
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # Same millisecond, or the clock went back: keep counting from the last ID.
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)